@@ -9,6 +9,25 @@ class Config:
     # Google configuration
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+    # LLM model tier configuration
+    LLM_TIERING_ENABLED = os.getenv("LLM_TIERING_ENABLED", "true").lower() == "true"
+    LLM_MODEL_LIGHT = os.getenv("LLM_MODEL_LIGHT", "gemini-2.5-flash-lite")
+    LLM_TEMPERATURE_LIGHT = float(os.getenv("LLM_TEMPERATURE_LIGHT", "0.2"))
+    LLM_MODEL_STRONG = os.getenv("LLM_MODEL_STRONG", "gemini-2.5-flash")
+    LLM_TEMPERATURE_STRONG = float(os.getenv("LLM_TEMPERATURE_STRONG", "0.2"))
+    LLM_LIGHT_MAX_WORDS = int(os.getenv("LLM_LIGHT_MAX_WORDS", "12"))
+
+    # LLM hedging, retry and fallback configuration (seconds)
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9"))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "8"))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1"))
+    LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "gemini-2.0-flash")
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+    LLM_TOTAL_BUDGET = float(os.getenv("LLM_TOTAL_BUDGET", "60"))
+
     # LangSmith configuration
     LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
     LANGSMITH_TRACING = os.getenv("LANGSMITH_TRACING", "true")
@@ -20,6 +39,60 @@ class Config:
     # Backend configuration
     BACKEND_API_BASE_URL = os.getenv("BACKEND_API_BASE_URL")
 
+    # Backend HTTP client configuration
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_TIMEOUT_GET = float(os.getenv("HTTP_TIMEOUT_GET", "30"))
+    HTTP_TIMEOUT_POST = float(os.getenv("HTTP_TIMEOUT_POST", "30"))
+    HTTP_TIMEOUT_PUT = float(os.getenv("HTTP_TIMEOUT_PUT", "30"))
+    HTTP_TIMEOUT_DELETE = float(os.getenv("HTTP_TIMEOUT_DELETE", "30"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+    # Backend response cache configuration (TTLs in seconds)
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+    CACHE_TTL_DETAIL = float(os.getenv("CACHE_TTL_DETAIL", "300"))
+    CACHE_TTL_LIST = float(os.getenv("CACHE_TTL_LIST", "60"))
+    CACHE_TTL_ANALYTICS = float(os.getenv("CACHE_TTL_ANALYTICS", "60"))
+    CACHE_TTL_VOLATILE = float(os.getenv("CACHE_TTL_VOLATILE", "15"))
+
+    # Batch detail tools configuration
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "5"))
+    BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "50"))
+
+    # Fetch-all (auto-pagination) configuration
+    FETCH_ALL_PAGE_SIZE = int(os.getenv("FETCH_ALL_PAGE_SIZE", "100"))
+    FETCH_ALL_CONCURRENCY = int(os.getenv("FETCH_ALL_CONCURRENCY", "4"))
+    FETCH_ALL_MAX_ROWS = int(os.getenv("FETCH_ALL_MAX_ROWS", "10000"))
+
+    # Local analytics engine configuration (requires numpy)
+    ANALYTICS_ENGINE_ENABLED = os.getenv("ANALYTICS_ENGINE_ENABLED", "false").lower() == "true"
+    ANALYTICS_ENGINE_REFRESH_INTERVAL = float(os.getenv("ANALYTICS_ENGINE_REFRESH_INTERVAL", "60"))
+    ANALYTICS_ENGINE_BULK_THRESHOLD = int(os.getenv("ANALYTICS_ENGINE_BULK_THRESHOLD", "200"))
+    ANALYTICS_ENGINE_MAX_TRANSACTIONS = int(os.getenv("ANALYTICS_ENGINE_MAX_TRANSACTIONS", "1000000"))
+
+    # Local entity store (SQLite mirror) configuration
+    ENTITY_STORE_ENABLED = os.getenv("ENTITY_STORE_ENABLED", "false").lower() == "true"
+    ENTITY_STORE_PATH = os.getenv("ENTITY_STORE_PATH", "entity_store.sqlite3")
+    ENTITY_STORE_REFRESH_INTERVAL = float(os.getenv("ENTITY_STORE_REFRESH_INTERVAL", "120"))
+    ENTITY_STORE_MAX_ROWS = int(os.getenv("ENTITY_STORE_MAX_ROWS", "1000000"))
+    ENTITY_STORE_MAX_RESULTS = int(os.getenv("ENTITY_STORE_MAX_RESULTS", "100"))
+
+    # Entity name index (resolve_entity) configuration
+    ENTITY_INDEX_ENABLED = os.getenv("ENTITY_INDEX_ENABLED", "true").lower() == "true"
+    ENTITY_INDEX_REFRESH_INTERVAL = float(os.getenv("ENTITY_INDEX_REFRESH_INTERVAL", "300"))
+    ENTITY_INDEX_MAX_ENTITIES = int(os.getenv("ENTITY_INDEX_MAX_ENTITIES", "100000"))
+    ENTITY_INDEX_MIN_OVERLAP = float(os.getenv("ENTITY_INDEX_MIN_OVERLAP", "0.3"))
+    ENTITY_INDEX_MIN_SCORE = float(os.getenv("ENTITY_INDEX_MIN_SCORE", "0.3"))
+
+    # Answer cache (near-duplicate questions) configuration
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "300"))
+    ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("ANSWER_CACHE_MIN_SIMILARITY", "0.9"))
+
     # MongoDB configuration
     MONGO_INITDB_ROOT_USERNAME = os.getenv("MONGO_INITDB_ROOT_USERNAME")
     MONGO_INITDB_ROOT_PASSWORD = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
@@ -28,6 +101,56 @@ class Config:
     MONGODB_PORT = os.getenv("MONGODB_PORT", "27019")
     MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", MONGO_INITDB_DATABASE)
     MONGODB_COLLECTION_CHAT_HISTORY = os.getenv("MONGODB_COLLECTION_CHAT_HISTORY")
+    MONGODB_COLLECTION_SESSION_SUMMARY = os.getenv(
+        "MONGODB_COLLECTION_SESSION_SUMMARY", "session_summaries"
+    )
+    MONGODB_COLLECTION_SESSION_INDEX = os.getenv(
+        "MONGODB_COLLECTION_SESSION_INDEX", "session_index"
+    )
+    MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000"))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(
+        os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000")
+    )
+
+    # Session history cache configuration
+    SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "1000"))
+    SESSION_CACHE_IDLE_TTL = float(os.getenv("SESSION_CACHE_IDLE_TTL", "1800"))
+    SESSION_CACHE_MAX_MESSAGES = int(os.getenv("SESSION_CACHE_MAX_MESSAGES", "200"))
+
+    # Chat history replay configuration
+    HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "10"))
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+    HISTORY_SUMMARY_ENABLED = os.getenv("HISTORY_SUMMARY_ENABLED", "true").lower() == "true"
+    HISTORY_SUMMARY_BATCH = int(os.getenv("HISTORY_SUMMARY_BATCH", "6"))
+
+    # Intent router (fast path) configuration
+    ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+    ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.75"))
+    ROUTER_LLM_FORMAT = os.getenv("ROUTER_LLM_FORMAT", "false").lower() == "true"
+
+    # Tool execution configuration (seconds)
+    TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "20"))
+    TOOL_TIMEOUT_OVERRIDES = os.getenv("TOOL_TIMEOUT_OVERRIDES", "")
+    AGENT_TURN_DEADLINE = float(os.getenv("AGENT_TURN_DEADLINE", "45"))
+
+    # Agent mode: "react" (tool, LLM, tool, ...) or "plan" (plan all calls, run them, answer once)
+    AGENT_MODE = os.getenv("AGENT_MODE", "react").lower()
+    PLAN_MAX_TOOL_CALLS = int(os.getenv("PLAN_MAX_TOOL_CALLS", "6"))
+
+    # Tool output compaction configuration
+    TOOL_OUTPUT_COMPACTION = os.getenv("TOOL_OUTPUT_COMPACTION", "true").lower() == "true"
+    TOOL_OUTPUT_MAX_ROWS = int(os.getenv("TOOL_OUTPUT_MAX_ROWS", "20"))
+    TOOL_OUTPUT_TOKEN_BUDGET = int(os.getenv("TOOL_OUTPUT_TOKEN_BUDGET", "2000"))
+
+    # Record/replay of LLM and backend calls: "off", "record" or "replay"
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+    CASSETTE_DIR = os.getenv("CASSETTE_DIR", "cassettes")
+    # Replayed calls take their recorded time multiplied by this (0 = instant)
+    CASSETTE_TIME_SCALE = float(os.getenv("CASSETTE_TIME_SCALE", "1"))
+    # Replay a model call recorded for the same question and step when no exact match exists
+    CASSETTE_LOOSE_MATCH = os.getenv("CASSETTE_LOOSE_MATCH", "false").lower() == "true"
 
     # Construct MongoDB URL
     MONGODB_URL = f"mongodb://{MONGO_INITDB_ROOT_USERNAME}:{MONGO_INITDB_ROOT_PASSWORD}@{MONGODB_HOST}:{MONGODB_PORT}/{MONGO_INITDB_DATABASE}?authSource=admin"
@@ -45,6 +168,9 @@ class Config:
             "MONGO_INITDB_DATABASE",
             "MONGODB_COLLECTION_CHAT_HISTORY",
         ]
+        if cls.CASSETTE_MODE == "replay":
+            # Replay serves every model call from the cassette and traces nothing
+            required_vars = [var for var in required_vars if var not in ("GOOGLE_API_KEY", "LANGSMITH_API_KEY")]
         missing_vars = [var for var in required_vars if not getattr(cls, var)]
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {missing_vars}")
@@ -2,38 +2,92 @@ from langchain.agents import (
     AgentExecutor,
     create_tool_calling_agent,
 )
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from app.tools import get_all_tools
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 import uuid
 from app.config.config import Config
 import logging
 from datetime import datetime
-from app.core.llm import get_llm
+from app.core.answer_cache import AnswerCache
+from app.core.cassette import cassette
+from app.core.llm import LIGHT, TIERS, TurnUsage, classify_tier, get_tier_llm, llm_metrics
 from app.core.memory import SessionService
+from app.core.planner import PlanExecutor
+from app.core.history import HistoryWindow
+from app.core.router import IntentRouter
+from app.core.tool_execution import TurnStats, as_agent_tool, tool_turn
 from app.core.tracing import TracingService
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """You are an intelligent AI assistant that helps users interact with a business database.
+You have access to tools to find information about:
+- Customers
+- Inventory
+- Products
+- Transactions and Transaction Items
+- Employees
+
+IMPORTANT RULES:
+{rules}
+{history_summary}"""
+
+RULES = [
+    "You must ONLY answer questions related to the database entities listed above and database analytics.",
+    "If a user asks about anything else, politely refuse and state that you can only assist with the business database.",
+    "Keep responses helpful and concise.",
+    "If a user greets you, reply naturally.",
+    "If a tool fails, explain the error and suggest alternatives.",
+]
+ENTITY_INDEX_RULE = "When the user names a customer or product instead of giving its ID, call resolve_entity first to get the UUID."
+RECORDS_RULE = "For questions about ALL records (how many, which ones, totals per group), use count_records, filter_records or group_records instead of paging through the list tools."
+
+
+def build_system_prompt() -> str:
+    """The system prompt with rules for the enabled tools; {history_summary} is filled in per turn"""
+    rules = [*RULES, *([ENTITY_INDEX_RULE] if Config.ENTITY_INDEX_ENABLED else []), RECORDS_RULE]
+    numbered = "\n".join(f"{number}. {rule}" for number, rule in enumerate(rules, start=1))
+    return SYSTEM_PROMPT.replace("{rules}", numbered)
+
 
 class AIAgent:
     """Main AI Agent that orchestrates between different tools"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        session_service: Optional[SessionService] = None,
+        agent_mode: Optional[str] = None,
+    ):
 
         # Validate environment variables
         Config.validate()
         
         # Initialize Services
         self.tracing_service = TracingService()
-        self.session_service = SessionService()
+        self.session_service = session_service or SessionService()
+
+        # Initialize one LLM per model tier; summaries and formatting passes use the light one
+        self.models = {tier: get_tier_llm(tier) for tier in TIERS}
+        self.history_window = HistoryWindow(self.models[LIGHT], self.session_service)
 
-        # Initialize LLM model using core module
-        self.llm = get_llm()
+        # Initialize tools and one agent per tier; tool calls are time-bounded and their results compacted
+        self.system_prompt = build_system_prompt()
+        raw_tools = get_all_tools()
+        self.tools = [as_agent_tool(tool) for tool in raw_tools]
+        self.agents = {tier: self._create_agent(llm) for tier, llm in self.models.items()}
 
-        # Initialize tools and agent
-        self.tools = get_all_tools()
-        self.agent = self._create_agent()
+        # "plan" batches a turn's tool calls into one planning and one answering LLM call
+        self.agent_mode = (agent_mode or Config.AGENT_MODE).lower()
+        self.planner = PlanExecutor(self.tools, self.models)
+
+        # Rules-based fast path for common questions; it renders the full tool results
+        self.router = IntentRouter(raw_tools, self.models[LIGHT])
+
+        # Answers to near-duplicate questions, reused while their data is unchanged
+        self.answer_cache = AnswerCache(tool.name for tool in self.tools)
         
         
     # ---------------------------------------------------------------------------#
@@ -68,28 +122,14 @@ class AIAgent:
                     return action.tool
         return None
     
-    def _create_agent(self) -> AgentExecutor:
-        """Create the main agent executor"""
+    def _create_agent(self, llm: BaseChatModel) -> AgentExecutor:
+        """Create an agent executor running on `llm`"""
 
         prompt = ChatPromptTemplate.from_messages(
             [
                 (
                     "system",
-                    """You are an intelligent AI assistant that helps users interact with a business database.
-                    You have access to tools to find information about:
-                    - Customers
-                    - Inventory
-                    - Products
-                    - Transactions and Transaction Items
-                    - Employees
-                    
-                    IMPORTANT RULES:
-                    1. You must ONLY answer questions related to the database entities listed above and database analytics.
-                    2. If a user asks about anything else, politely refuse and state that you can only assist with the business database.
-                    3. Keep responses helpful and concise.
-                    4. If a user greets you, reply naturally.
-                    5. If a tool fails, explain the error and suggest alternatives.
-                    """,
+                    self.system_prompt,
                 ),
                 MessagesPlaceholder(variable_name="chat_history"),
                 ("user", "{input}"),
@@ -98,7 +138,7 @@ class AIAgent:
         )
         
         agent = create_tool_calling_agent(
-            llm=self.llm,
+            llm=llm,
             tools=self.tools,
             prompt=prompt
         )
@@ -116,6 +156,36 @@ class AIAgent:
             callbacks=callbacks,  # Add callbacks for tracing
         )
 
+    def _format_history_summary(self, summary: str) -> str:
+        """Format the rolling history summary for the system prompt"""
+        if not summary:
+            return ""
+        return f"\nSummary of the earlier conversation:\n{summary}"
+
+    def _build_run_config(
+        self, message: str, session_id: str, model_tier: str, usage: TurnUsage
+    ) -> Dict[str, Any]:
+        """Build the run config (tags, metadata and usage callback) used for tracing"""
+        return {
+            "callbacks": [usage],
+            "tags": [
+                "ai-agent",
+                "actor-tools",
+            ],  # Tags for filtering in LangSmith
+            "metadata": {
+                "session_id": session_id,
+                "user_input": message,
+                "model_tier": model_tier,
+                "timestamp": datetime.now().isoformat(),
+            },
+        }
+
+    def _pick_tier(self, message: str) -> str:
+        """Pick the model tier for a turn and count it"""
+        tier = classify_tier(message)
+        llm_metrics.count_turn(tier)
+        return tier
+
     async def process_message(
         self, message: str, session_id: Optional[str] = None
     ) -> Dict[str, Any]:
@@ -124,61 +194,108 @@ class AIAgent:
         # Generate session ID if not provided
         if not session_id:
             session_id = str(uuid.uuid4())
+        cassette.record_turn(message, session_id)
 
         try:
             # Get MongoDB chat history for this session
-            chat_history_obj = self.session_service.get_or_create_session_history(session_id)
-            
-            # Get messages from history
-            chat_history_messages = chat_history_obj.messages
+            chat_history_obj = await self.session_service.get_or_create_session_history(session_id)
             
-            # For simple greetings, handle directly to avoid unnecessary tool calls
-            if self._is_simple_greeting(message):
-                response_text = "Hello! How can I help you today?"
-                
+            # For greetings and common questions, skip agent planning entirely
+            routed = await self._route(message)
+            if routed:
                 # Save to chat history
-                chat_history_obj.add_user_message(message)
-                chat_history_obj.add_ai_message(response_text)
+                await chat_history_obj.aadd_messages(
+                    [HumanMessage(content=message), AIMessage(content=routed["response"])]
+                )
                 
                 return {
-                    "response": response_text,
+                    "response": routed["response"],
                     "session_id": session_id,
-                    "tool_used": None,
+                    "tool_used": routed["tool_used"],
+                    "routed_intent": routed["intent"],
+                    "success": True,
+                    "session_traces_url": self.tracing_service.get_session_traces_url(session_id),
+                    "project_traces_url": self.tracing_service.get_project_traces_url(),
+                }
+
+            # Near-duplicates of recent questions reuse the earlier answer; mid-conversation
+            # only answers from this session match, since the question may lean on its history
+            stored_messages = await chat_history_obj.aget_messages()
+            cache_scope = session_id if stored_messages else None
+            cached = self.answer_cache.lookup(message, cache_scope)
+            if cached:
+                await chat_history_obj.aadd_messages(
+                    [HumanMessage(content=message), AIMessage(content=cached["response"])]
+                )
+
+                return {
+                    "response": cached["response"],
+                    "session_id": session_id,
+                    "tool_used": cached["tool_used"],
+                    "cached": True,
+                    "cache_match": cached,
                     "success": True,
                     "session_traces_url": self.tracing_service.get_session_traces_url(session_id),
                     "project_traces_url": self.tracing_service.get_project_traces_url(),
                 }
                 
-            # Execute the agent with tracing (ainvoke = async invoke)
-            response = await self.agent.ainvoke(
-                {
-                    "input": message,
-                    "chat_history": chat_history_messages,
-                },
-                config={
-                    "tags": [
-                        "ai-agent",
-                        "actor-tools",
-                    ],  # Tags for filtering in LangSmith
-                    "metadata": {
-                        "session_id": session_id,
-                        "user_input": message,
-                        "timestamp": datetime.now().isoformat(),
-                    },
-                },
+            # Replay recent turns verbatim and older ones as a rolling summary
+            history_summary, chat_history_messages = await self.history_window.load(
+                session_id, stored_messages
             )
 
+            # Execute the agent with tracing (ainvoke = async invoke)
+            # Tool calls requested in the same step run concurrently
+            model_tier = self._pick_tier(message)
+            usage = TurnUsage()
+            config = self._build_run_config(message, session_id, model_tier, usage)
+            agent_mode = "react"
+            with tool_turn() as turn_stats:
+                response = None
+                if self.agent_mode == "plan":
+                    response = await self.planner.run(
+                        message,
+                        self.system_prompt.format(history_summary=self._format_history_summary(history_summary)),
+                        chat_history_messages,
+                        model_tier,
+                        config,
+                    )
+                    agent_mode = "plan" if response else "plan_fallback"
+                if response is None:
+                    response = await self.agents[model_tier].ainvoke(
+                        {
+                            "input": message,
+                            "chat_history": chat_history_messages,
+                            "history_summary": self._format_history_summary(history_summary),
+                        },
+                        config=config,
+                    )
+            tool_timing = turn_stats.summary()
+            logger.info(f"Tool timing for session {session_id}: {tool_timing}")
+
             # Save to chat history
-            chat_history_obj.add_user_message(message)
-            chat_history_obj.add_ai_message(response["output"])
+            await chat_history_obj.aadd_messages(
+                [HumanMessage(content=message), AIMessage(content=response["output"])]
+            )
+            self.history_window.schedule_refresh(session_id)
 
             # Determine which tool was used
             tool_used = self._determine_tool_used(response)
+            if response.get("tool_calls"):
+                tool_used = response["tool_calls"][-1]
+            self.answer_cache.store(
+                message, response["output"], tool_used, turn_stats.outputs, tool_timing, cache_scope
+            )
 
             return {
                 "response": response["output"],
                 "session_id": session_id,
                 "tool_used": tool_used,
+                "model_tier": model_tier,
+                "agent_mode": agent_mode,
+                "llm_usage": usage.summary(),
+                "tool_timing": tool_timing,
+                "tool_outputs": turn_stats.outputs,
                 "success": True,
                 "session_traces_url": self.tracing_service.get_session_traces_url(session_id),
                 "project_traces_url": self.tracing_service.get_project_traces_url(),
@@ -189,10 +306,11 @@ class AIAgent:
 
             # Still save error to chat history
             try:
-                chat_history = self.session_service.get_or_create_session_history(session_id)
+                chat_history = await self.session_service.get_or_create_session_history(session_id)
                 error_response = f"I apologize, but I encountered an error: {str(e)}"
-                chat_history.add_user_message(message)
-                chat_history.add_ai_message(error_response)
+                await chat_history.aadd_messages(
+                    [HumanMessage(content=message), AIMessage(content=error_response)]
+                )
             except Exception as history_error:
                 logger.error(f"Failed to save error to chat history: {history_error}")
 
@@ -204,7 +322,263 @@ class AIAgent:
                 "error": str(e),
             }
 
-    def _is_simple_greeting(self, message: str) -> bool:
-        """Check if message is a simple greeting"""
-        greetings = ["hello", "hi", "hey", "good morning", "good afternoon", "good evening"]
-        return message.lower().strip() in greetings
+    async def stream_message(
+        self, message: str, session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process user message and yield events as the agent runs.
+
+        Yields dicts with an "event" name and its "data": "token" for LLM output
+        as it arrives, "tool_start" / "tool_end" around each tool call, and a
+        final "end" (or "error") event. Chat history is saved once at the end.
+        """
+
+        # Generate session ID if not provided
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        cassette.record_turn(message, session_id, stream=True)
+
+        try:
+            chat_history_obj = await self.session_service.get_or_create_session_history(session_id)
+
+            # For greetings and common questions, skip agent planning entirely
+            routed = await self._route(message)
+            if routed:
+                if routed["tool_used"]:
+                    yield {"event": "tool_start", "data": {"tool": routed["tool_used"], "input": routed["args"]}}
+                    yield {"event": "tool_end", "data": {"tool": routed["tool_used"], "output": None}}
+                yield {"event": "token", "data": {"content": routed["response"]}}
+
+                await chat_history_obj.aadd_messages(
+                    [HumanMessage(content=message), AIMessage(content=routed["response"])]
+                )
+
+                yield {
+                    "event": "end",
+                    "data": {
+                        "response": routed["response"],
+                        "session_id": session_id,
+                        "tool_used": routed["tool_used"],
+                        "routed_intent": routed["intent"],
+                        "success": True,
+                    },
+                }
+                return
+
+            stored_messages = await chat_history_obj.aget_messages()
+            cache_scope = session_id if stored_messages else None
+            cached = self.answer_cache.lookup(message, cache_scope)
+            if cached:
+                yield {"event": "token", "data": {"content": cached["response"]}}
+
+                await chat_history_obj.aadd_messages(
+                    [HumanMessage(content=message), AIMessage(content=cached["response"])]
+                )
+
+                yield {
+                    "event": "end",
+                    "data": {
+                        "response": cached["response"],
+                        "session_id": session_id,
+                        "tool_used": cached["tool_used"],
+                        "cached": True,
+                        "cache_match": cached,
+                        "success": True,
+                    },
+                }
+                return
+
+            tool_used = None
+            output = None
+            full_outputs: Dict[str, Any] = {}
+
+            history_summary, chat_history_messages = await self.history_window.load(
+                session_id, stored_messages
+            )
+
+            model_tier = self._pick_tier(message)
+            usage = TurnUsage()
+            config = self._build_run_config(message, session_id, model_tier, usage)
+            agent_mode = "react"
+            with tool_turn() as turn_stats:
+                if self.agent_mode == "plan":
+                    planned: Dict[str, Any] = {}
+                    async for event in self._stream_plan(
+                        message, history_summary, chat_history_messages, model_tier, config, turn_stats, planned
+                    ):
+                        yield event
+                    output, tool_used = planned.get("output"), planned.get("tool_used")
+                    agent_mode = "plan" if output is not None else "plan_fallback"
+
+                if output is None:
+                    async for event in self.agents[model_tier].astream_events(
+                        {
+                            "input": message,
+                            "chat_history": chat_history_messages,
+                            "history_summary": self._format_history_summary(history_summary),
+                        },
+                        config=config,
+                        version="v2",
+                    ):
+                        kind = event["event"]
+
+                        if kind == "on_chat_model_stream":
+                            content = self._chunk_text(event["data"]["chunk"])
+                            if content:
+                                yield {"event": "token", "data": {"content": content}}
+
+                        elif kind == "on_tool_start":
+                            tool_used = event["name"]
+                            yield {
+                                "event": "tool_start",
+                                "data": {"tool": event["name"], "input": event["data"].get("input")},
+                            }
+
+                        elif kind == "on_custom_event" and event["name"] == "tool_output":
+                            # Full result; the tool's own output is the compacted one the model saw
+                            full_outputs[event["run_id"]] = event["data"]["output"]
+
+                        elif kind == "on_tool_end":
+                            yield {
+                                "event": "tool_end",
+                                "data": {
+                                    "tool": event["name"],
+                                    "output": full_outputs.pop(
+                                        event["run_id"], event["data"].get("output")
+                                    ),
+                                },
+                            }
+
+                        elif kind == "on_chain_end" and not event.get("parent_ids"):
+                            # Final output of the top-level AgentExecutor run
+                            run_output = event["data"].get("output")
+                            if isinstance(run_output, dict):
+                                output = run_output.get("output")
+
+            if output is None:
+                raise RuntimeError("Agent finished without producing an output")
+
+            # Save to chat history
+            await chat_history_obj.aadd_messages(
+                [HumanMessage(content=message), AIMessage(content=output)]
+            )
+            self.history_window.schedule_refresh(session_id)
+            tool_timing = turn_stats.summary()
+            self.answer_cache.store(message, output, tool_used, turn_stats.outputs, tool_timing, cache_scope)
+
+            yield {
+                "event": "end",
+                "data": {
+                    "response": output,
+                    "session_id": session_id,
+                    "tool_used": tool_used,
+                    "model_tier": model_tier,
+                    "agent_mode": agent_mode,
+                    "llm_usage": usage.summary(),
+                    "tool_timing": tool_timing,
+                    "success": True,
+                    "session_traces_url": self.tracing_service.get_session_traces_url(session_id),
+                    "project_traces_url": self.tracing_service.get_project_traces_url(),
+                },
+            }
+
+        except Exception as e:
+            logger.error(f"Error streaming message: {e}")
+
+            error_response = f"I apologize, but I encountered an error: {str(e)}"
+            try:
+                chat_history = await self.session_service.get_or_create_session_history(session_id)
+                await chat_history.aadd_messages(
+                    [HumanMessage(content=message), AIMessage(content=error_response)]
+                )
+            except Exception as history_error:
+                logger.error(f"Failed to save error to chat history: {history_error}")
+
+            yield {
+                "event": "error",
+                "data": {
+                    "response": error_response,
+                    "session_id": session_id,
+                    "tool_used": None,
+                    "success": False,
+                    "error": str(e),
+                },
+            }
+
+    async def _stream_plan(
+        self,
+        message: str,
+        history_summary: str,
+        chat_history_messages: List[BaseMessage],
+        model_tier: str,
+        config: Dict[str, Any],
+        turn_stats: TurnStats,
+        planned: Dict[str, Any],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a plan-then-execute turn.
+
+        Sets "output" and "tool_used" in `planned` when the plan answered the
+        question; leaves them unset to fall back to ReAct.
+        """
+        system_prompt = self.system_prompt.format(
+            history_summary=self._format_history_summary(history_summary)
+        )
+        plan = await self.planner.plan(message, system_prompt, chat_history_messages, model_tier, config)
+        if plan is None:
+            return
+        if not plan.tool_calls:
+            output = self._chunk_text(plan)
+            yield {"event": "token", "data": {"content": output}}
+            planned["output"] = output
+            return
+
+        for call in plan.tool_calls:
+            yield {"event": "tool_start", "data": {"tool": call["name"], "input": call["args"]}}
+        recorded = len(turn_stats.outputs)
+        results = await self.planner.execute(plan, config)
+        # Report the full results, as the ReAct stream does
+        full = turn_stats.outputs[recorded:]
+        for result in results:
+            match = next(
+                (item for item in full if item["tool"] == result["tool"] and item["args"] == result["args"]),
+                None,
+            )
+            if match:
+                full.remove(match)
+            yield {
+                "event": "tool_end",
+                "data": {"tool": result["tool"], "output": match["output"] if match else result["output"]},
+            }
+
+        chunks = []
+        try:
+            async for text in self.planner.stream_synthesis(
+                self.planner.synthesis_messages(message, system_prompt, chat_history_messages, results),
+                model_tier,
+                config,
+            ):
+                chunks.append(text)
+                yield {"event": "token", "data": {"content": text}}
+        except LookupError:
+            logger.info("Planned results were not enough, falling back to ReAct")
+            return
+        planned["output"] = "".join(chunks)
+        planned["tool_used"] = results[-1]["tool"]
+
+    def _chunk_text(self, chunk: Any) -> str:
+        """Extract the text content from a streamed message chunk"""
+        content = getattr(chunk, "content", "")
+        if isinstance(content, list):
+            # Some models stream content as a list of parts
+            return "".join(
+                part.get("text", "") if isinstance(part, dict) else str(part)
+                for part in content
+            )
+        return content or ""
+
+    async def _route(self, message: str) -> Optional[Dict[str, Any]]:
+        """Try the intent router's fast path, or None to run the full agent"""
+        if not Config.ROUTER_ENABLED:
+            return None
+        return await self.router.handle(message)
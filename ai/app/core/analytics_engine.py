@@ -0,0 +1,424 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+from app.config.config import Config
+from app.utils.api import FetchError, fetch, fetch_by_ids, invalidate_cache, iter_pages
+
+logger = logging.getLogger(__name__)
+
+# Transactions counted as sales by the backend's /analytics endpoints
+COMPLETED = "COMPLETED"
+PAID = "PAID"
+
+GROUP_BY_OPTIONS = ("day", "week", "month", "status", "payment_status", "product", "category")
+
+
+def _epoch_ms(value: Any) -> int:
+    """Parse an ISO timestamp from the backend into UTC epoch milliseconds"""
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def _local_response(endpoint: str, payload: Any) -> Dict[str, Any]:
+    """Wrap a local result in the same envelope fetch() returns"""
+    return {
+        "success": True,
+        "data": {"statusCode": 200, "data": payload},
+        "endpoint_used": endpoint,
+        "method": "GET",
+        "source": "local",
+    }
+
+
+class _Columns:
+    """Immutable columnar arrays built from the snapshot"""
+
+    def __init__(self, np: Any, transactions: Dict[str, Dict[str, Any]], product_ids: List[str]):
+        product_index = {uuid: index for index, uuid in enumerate(product_ids)}
+        records = list(transactions.values())
+
+        self.sale_date = np.array([r["sale_date"] for r in records], dtype="datetime64[ms]")
+        self.status = np.array([r["status"] for r in records], dtype=str)
+        self.payment_status = np.array([r["payment_status"] for r in records], dtype=str)
+        self.total_amount = np.array([r["total_amount"] for r in records], dtype=np.float64)
+
+        item_txn, item_product, item_quantity, item_subtotal = [], [], [], []
+        for index, record in enumerate(records):
+            for product_uuid, quantity, subtotal in record["items"]:
+                item_txn.append(index)
+                item_product.append(product_index[product_uuid])
+                item_quantity.append(quantity)
+                item_subtotal.append(subtotal)
+
+        self.item_txn = np.array(item_txn, dtype=np.int64)
+        self.item_product = np.array(item_product, dtype=np.int64)
+        self.item_quantity = np.array(item_quantity, dtype=np.float64)
+        self.item_subtotal = np.array(item_subtotal, dtype=np.float64)
+        self.product_ids = product_ids
+
+
+class AnalyticsEngine:
+    """
+    In-process columnar snapshot of transactions and transaction items.
+
+    The snapshot is kept in NumPy arrays (sale_date, status, payment_status,
+    total_amount, and per item product_uuid, quantity and subtotal) so sales
+    summaries, top-N products and grouped breakdowns run in memory instead of
+    as SQL aggregations on the backend.
+
+    The backend list endpoint has no "updated since" filter, so a refresh
+    pages through /transactions/list (which carries updated_at) and only
+    loads the items of transactions that are new or whose updated_at moved.
+    Transactions missing from a complete scan are dropped.
+    """
+
+    def __init__(self):
+        self._np: Any = None
+        self._transactions: Dict[str, Dict[str, Any]] = {}
+        self._products: Dict[str, Dict[str, Any]] = {}
+        self._columns: Optional[_Columns] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.last_refresh: Optional[datetime] = None
+        self.last_refresh_seconds = 0.0
+        self.last_changed = 0
+
+    @property
+    def ready(self) -> bool:
+        return Config.ANALYTICS_ENGINE_ENABLED and self._columns is not None
+
+    def _numpy(self) -> Any:
+        if self._np is None:
+            import numpy
+
+            self._np = numpy
+        return self._np
+
+    # ---------------------------------------------------------------------------#
+    #                               Synchronization                              #
+    # ---------------------------------------------------------------------------#
+
+    def start(self) -> None:
+        """Start refreshing the snapshot in the background (called from the FastAPI lifespan)"""
+        try:
+            self._numpy()
+        except ImportError:
+            logger.warning("ANALYTICS_ENGINE_ENABLED is set but 'numpy' is not installed, using the backend")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing analytics snapshot: {e}")
+            await asyncio.sleep(Config.ANALYTICS_ENGINE_REFRESH_INTERVAL)
+
+    async def refresh(self) -> int:
+        """Bring the snapshot up to date, return the number of transactions changed"""
+        async with self._lock:
+            started = time.monotonic()
+            np = self._numpy()
+
+            seen: Set[str] = set()
+            changed: Dict[str, Dict[str, Any]] = {}
+            total = 0
+            # Read past the response cache, so pages are current and interactive entries stay cached
+            async for page in iter_pages(
+                "/transactions/list", max_rows=Config.ANALYTICS_ENGINE_MAX_TRANSACTIONS, cache=False
+            ):
+                total = page["count"]
+                for row in page["rows"]:
+                    seen.add(row["uuid"])
+                    known = self._transactions.get(row["uuid"])
+                    if known is None or known["updated_at"] != row.get("updated_at"):
+                        changed[row["uuid"]] = row
+
+            items = await self._load_items(list(changed))
+            for uuid, row in changed.items():
+                if uuid not in items:
+                    # Retried on the next refresh since updated_at is not recorded
+                    continue
+                self._transactions[uuid] = {
+                    "sale_date": _epoch_ms(row["sale_date"]),
+                    "status": row.get("status") or "",
+                    "payment_status": row.get("payment_status") or "",
+                    "total_amount": float(row.get("total_amount") or 0),
+                    "updated_at": row.get("updated_at"),
+                    "items": items[uuid],
+                }
+
+            removed = 0
+            # Pages can overlap or skip rows if the list changes mid-scan, so only a scan
+            # that saw every transaction can tell which ones were deleted
+            if len(seen) == total:
+                for uuid in set(self._transactions) - seen:
+                    del self._transactions[uuid]
+                    removed += 1
+
+            product_ids = sorted(
+                {item[0] for record in self._transactions.values() for item in record["items"]}
+            )
+            if changed or removed or self._columns is None:
+                if any(uuid not in self._products for uuid in product_ids):
+                    await self._load_products()
+                self._columns = _Columns(np, self._transactions, product_ids)
+
+            if changed or removed:
+                # Cached transaction and analytics responses no longer match the backend
+                invalidate_cache("/transactions")
+                invalidate_cache("/analytics")
+
+            self.refreshes += 1
+            self.last_changed = len(changed) + removed
+            self.last_refresh = datetime.now(timezone.utc)
+            self.last_refresh_seconds = round(time.monotonic() - started, 3)
+            if self.last_changed:
+                logger.info(
+                    f"Analytics snapshot refreshed: {len(changed)} changed, {removed} removed, "
+                    f"{len(self._transactions)} transactions in {self.last_refresh_seconds}s"
+                )
+            return self.last_changed
+
+    async def _load_items(self, uuids: List[str]) -> Dict[str, List[tuple]]:
+        """Get (product_uuid, quantity, subtotal) items for the given transactions"""
+        if not uuids:
+            return {}
+
+        def parse(transaction: Dict[str, Any]) -> List[tuple]:
+            return [
+                (item["product_uuid"], float(item.get("quantity") or 0), float(item.get("subtotal") or 0))
+                for item in transaction.get("items") or []
+            ]
+
+        items: Dict[str, List[tuple]] = {}
+        if len(uuids) > Config.ANALYTICS_ENGINE_BULK_THRESHOLD:
+            # Cheaper to load every transaction with its items in one request
+            response = await fetch("GET", "/transactions", cache=False)
+            if not response["success"]:
+                raise FetchError(response)
+            wanted = set(uuids)
+            for transaction in response["data"].get("data") or []:
+                if transaction["uuid"] in wanted:
+                    items[transaction["uuid"]] = parse(transaction)
+            return items
+
+        for start in range(0, len(uuids), Config.BATCH_MAX_IDS):
+            response = await fetch_by_ids(
+                "/transactions", uuids[start : start + Config.BATCH_MAX_IDS], cache=False
+            )
+            for result in response.get("data", {}).get("results", []):
+                if result["success"]:
+                    items[result["id"]] = parse(result["data"].get("data") or {})
+        return items
+
+    async def _load_products(self) -> None:
+        """Load product names, codes and categories for top-N results"""
+        async for page in iter_pages("/products/list/page", cache=False):
+            for product in page["rows"]:
+                self._products[product["uuid"]] = {
+                    "product_name": product.get("product_name"),
+                    "product_code": product.get("product_code"),
+                    "category": product.get("category"),
+                }
+
+    def get_stats(self) -> Dict[str, Any]:
+        columns = self._columns
+        return {
+            "enabled": Config.ANALYTICS_ENGINE_ENABLED,
+            "ready": self.ready,
+            "transactions": len(columns.sale_date) if columns else 0,
+            "items": len(columns.item_txn) if columns else 0,
+            "refreshes": self.refreshes,
+            "last_refresh": self.last_refresh,
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "last_changed": self.last_changed,
+        }
+
+    # ---------------------------------------------------------------------------#
+    #                                   Queries                                  #
+    # ---------------------------------------------------------------------------#
+
+    def _date_mask(self, columns: _Columns, start_date: str, end_date: str) -> Any:
+        """Transactions whose sale_date falls within the dates (inclusive, whole days)"""
+        # Days are UTC, matching the backend when it runs in UTC
+        np = self._np
+        start = np.datetime64(start_date, "D").astype("datetime64[ms]")
+        end = (np.datetime64(end_date, "D") + 1).astype("datetime64[ms]")
+        return (columns.sale_date >= start) & (columns.sale_date < end)
+
+    def _sales_mask(self, columns: _Columns, start_date: str, end_date: str) -> Any:
+        """Completed, paid transactions within the dates, as the backend counts sales"""
+        return (
+            self._date_mask(columns, start_date, end_date)
+            & (columns.status == COMPLETED)
+            & (columns.payment_status == PAID)
+        )
+
+    def sales_summary(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        """Same result as GET /analytics/sales-summary"""
+        columns = self._columns
+        mask = self._sales_mask(columns, start_date, end_date)
+        return _local_response(
+            "/analytics/sales-summary",
+            {
+                "total_revenue": round(float(columns.total_amount[mask].sum()), 2),
+                "transaction_count": int(mask.sum()),
+                "period": {"start": start_date, "end": end_date},
+            },
+        )
+
+    def _product_totals(self, columns: _Columns, transaction_mask: Any) -> tuple:
+        """Quantity, revenue and item count per product for the selected transactions"""
+        np = self._np
+        item_mask = transaction_mask[columns.item_txn]
+        products = columns.item_product[item_mask]
+        size = len(columns.product_ids)
+        quantity = np.bincount(products, weights=columns.item_quantity[item_mask], minlength=size)
+        revenue = np.bincount(products, weights=columns.item_subtotal[item_mask], minlength=size)
+        counts = np.bincount(products, minlength=size)
+        return quantity, revenue, counts
+
+    def _product_row(self, columns: _Columns, index: int, quantity: float, revenue: float) -> Dict[str, Any]:
+        uuid = columns.product_ids[index]
+        return {
+            "product_uuid": uuid,
+            **self._products.get(uuid, {}),
+            "total_quantity": quantity,
+            "total_revenue": round(revenue, 2),
+        }
+
+    def top_products(self, limit: int, start_date: str, end_date: str) -> Dict[str, Any]:
+        """Same result as GET /analytics/top-products"""
+        np = self._np
+        columns = self._columns
+        quantity, revenue, counts = self._product_totals(
+            columns, self._sales_mask(columns, start_date, end_date)
+        )
+        sold = np.flatnonzero(counts)
+        top = sold[np.argsort(-quantity[sold], kind="stable")][:limit]
+        return _local_response(
+            "/analytics/top-products",
+            [
+                self._product_row(columns, int(index), float(quantity[index]), float(revenue[index]))
+                for index in top
+            ],
+        )
+
+    def sales_breakdown(
+        self, group_by: str, start_date: str, end_date: str, only_paid: bool = True
+    ) -> Dict[str, Any]:
+        """Revenue and counts per day, week, month, status, payment status, product or category"""
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY_OPTIONS)}")
+
+        np = self._np
+        columns = self._columns
+        if only_paid:
+            mask = self._sales_mask(columns, start_date, end_date)
+        else:
+            mask = self._date_mask(columns, start_date, end_date)
+
+        if group_by in ("product", "category"):
+            quantity, revenue, counts = self._product_totals(columns, mask)
+            rows = [
+                self._product_row(columns, int(index), float(quantity[index]), float(revenue[index]))
+                for index in np.flatnonzero(counts)
+            ]
+            if group_by == "category":
+                categories: Dict[str, Dict[str, Any]] = {}
+                for row in rows:
+                    group = categories.setdefault(
+                        row.get("category") or "Unknown",
+                        {"category": row.get("category") or "Unknown", "total_quantity": 0, "total_revenue": 0.0},
+                    )
+                    group["total_quantity"] += row["total_quantity"]
+                    group["total_revenue"] = round(group["total_revenue"] + row["total_revenue"], 2)
+                rows = list(categories.values())
+            rows.sort(key=lambda row: row["total_revenue"], reverse=True)
+        else:
+            if group_by == "week":
+                # Label weeks by their Monday (1970-01-01 was a Thursday)
+                days = columns.sale_date[mask].astype("datetime64[D]")
+                keys = (days - (days.astype(np.int64) + 3) % 7).astype(str)
+            elif group_by in ("day", "month"):
+                unit = "D" if group_by == "day" else "M"
+                keys = columns.sale_date[mask].astype(f"datetime64[{unit}]").astype(str)
+            else:
+                keys = getattr(columns, group_by)[mask]
+            groups, inverse = np.unique(keys, return_inverse=True)
+            revenue = np.bincount(inverse, weights=columns.total_amount[mask], minlength=len(groups))
+            counts = np.bincount(inverse, minlength=len(groups))
+            rows = [
+                {
+                    group_by: str(group),
+                    "total_revenue": round(float(revenue[index]), 2),
+                    "transaction_count": int(counts[index]),
+                }
+                for index, group in enumerate(groups)
+            ]
+
+        return _local_response(
+            "/analytics/sales-breakdown",
+            {"group_by": group_by, "period": {"start": start_date, "end": end_date}, "rows": rows},
+        )
+
+    # ---------------------------------------------------------------------------#
+    #                                 Verification                               #
+    # ---------------------------------------------------------------------------#
+
+    async def check_consistency(self, start_date: str, end_date: str, limit: int = 5) -> Dict[str, Any]:
+        """Compare local results with the backend's /analytics endpoints for a date range"""
+        if not self.ready:
+            raise RuntimeError("Analytics snapshot is not loaded")
+
+        params = {"start_date": start_date, "end_date": end_date}
+        backend_summary, backend_top = await asyncio.gather(
+            fetch("GET", "/analytics/sales-summary", params=params, cache=False),
+            fetch("GET", "/analytics/top-products", params={**params, "limit": limit}, cache=False),
+        )
+        for response in (backend_summary, backend_top):
+            if not response["success"]:
+                raise FetchError(response)
+
+        local_summary = self.sales_summary(start_date, end_date)["data"]["data"]
+        remote_summary = backend_summary["data"]["data"]
+        summary_match = (
+            local_summary["transaction_count"] == remote_summary["transaction_count"]
+            and abs(local_summary["total_revenue"] - float(remote_summary["total_revenue"])) < 0.01
+        )
+
+        def quantities(rows: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+            return {row["product_uuid"]: float(row["total_quantity"]) for row in rows}
+
+        local_top = quantities(self.top_products(limit, start_date, end_date)["data"]["data"])
+        remote_top = quantities(backend_top["data"]["data"])
+        # Ties at the cut-off may be ordered differently, so compare quantities by rank
+        top_match = sorted(local_top.values(), reverse=True) == sorted(remote_top.values(), reverse=True)
+
+        return {
+            "consistent": summary_match and top_match,
+            "period": params,
+            "sales_summary": {"match": summary_match, "local": local_summary, "backend": remote_summary},
+            "top_products": {"match": top_match, "local": local_top, "backend": remote_top},
+        }
+
+
+# Application-wide snapshot used by the analytics tools
+analytics_engine = AnalyticsEngine()
@@ -0,0 +1,351 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+import logging
+import math
+import re
+import time
+import unicodedata
+import zlib
+from app.config.config import Config
+from app.utils.api import cache_ttl_for, data_version
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+NON_WORD_RE = re.compile(r"[^\w]+")
+THOUSANDS_RE = re.compile(r"(?<=\d),(?=\d{3}\b)")
+TRAILING_ZEROS_RE = re.compile(r"\b(\d+)\.0+\b")
+LAST_DAYS_RE = re.compile(r"\b(?:last|past) (\d+) days\b")
+
+NUMBER_WORDS = {
+    word: str(number)
+    for number, word in enumerate(
+        "zero one two three four five six seven eight nine ten eleven twelve thirteen "
+        "fourteen fifteen sixteen seventeen eighteen nineteen twenty".split()
+    )
+}
+NUMBER_WORDS.update({"thirty": "30", "forty": "40", "fifty": "50", "hundred": "100", "dozen": "12"})
+
+# Common phrasings of the same request, rewritten to one form
+SYNONYM_PHRASES = [
+    ("total number of", "how many"),
+    ("number of", "how many"),
+    ("count of", "how many"),
+    ("amount of", "how much"),
+]
+
+# Politeness and phrasing words that do not change what is being asked
+FILLER_WORDS = {
+    "a", "an", "the", "please", "pls", "can", "could", "would", "you", "me", "tell",
+    "show", "give", "list", "what", "whats", "is", "are", "do", "does", "i", "want",
+    "to", "know", "need", "get", "find", "of", "for", "our", "my", "we", "us", "kindly",
+    "was", "were", "there", "been",
+}
+
+# Words that flip or narrow the meaning; two questions only match if they agree on these
+POLARITY_WORDS = {
+    "not", "no", "without", "except", "most", "least", "highest", "lowest", "top",
+    "bottom", "best", "worst", "max", "min", "maximum", "minimum", "first", "last",
+    "more", "less", "above", "below", "over", "under", "before", "after", "increase",
+    "decrease", "unpaid", "paid", "active", "inactive",
+}
+
+# Questions that lean on the conversation so far are never answered from the cache
+REFERRING_WORDS = {
+    "it", "its", "them", "they", "he", "she", "him", "her", "his", "their", "those",
+    "these", "same", "previous", "again", "else",
+}
+# Elliptical follow-ups such as "what about chiang mai" or "and in march?"
+FOLLOW_UP_RE = re.compile(r"^\s*(?:and|also|what about|how about|what if|same for)\b", re.IGNORECASE)
+
+# Words of the business domain and of asking about it; any other word names something
+# (a city, a person, a product) and must match exactly, so "bangkok noi" never reuses "bangkok"
+VOCABULARY = {
+    "how", "many", "much", "which", "who", "whom", "whose", "when", "where", "why", "in",
+    "on", "at", "by", "from", "with", "per", "each", "all", "any", "every", "and", "or",
+    "between", "than", "since", "until", "during", "within", "as", "into", "have", "has",
+    "had", "made", "make", "sold", "sell", "sells", "selling", "bought", "buy", "spent",
+    "spend", "did", "currently", "now", "still", "so", "far", "overall", "total", "totals",
+    "sum", "average", "avg", "count", "amount", "customer", "customers", "client", "clients",
+    "product", "products", "item", "items", "inventory", "stock", "stocks", "warehouse",
+    "warehouses", "transaction", "transactions", "order", "orders", "sale", "sales",
+    "revenue", "income", "price", "prices", "cost", "costs", "value", "quantity",
+    "quantities", "units", "unit", "payment", "payments", "pending", "due", "status",
+    "method", "methods", "category", "categories", "city", "cities", "date", "dates", "day",
+    "days", "week", "weeks", "month", "months", "year", "years", "period", "summary",
+    "breakdown", "report", "details", "detail", "information", "info", "name", "names",
+    "code", "codes", "email", "emails", "phone", "address", "type", "types", "new",
+    "recent", "latest", "largest", "biggest", "smallest", "cheapest", "expensive",
+    "popular", "low", "high", "running", "out", "left", "available", "employee",
+    "employees", "staff", "record", "records", "group", "grouped", "compare", "vs",
+    "versus", "completed", "cancelled", "canceled", "refunded", "ranked", "rank", "ranking",
+    "number", "numbers", "this", "that", "one", "ones", "up", "last", "next",
+}
+
+VECTOR_BUCKETS = 1 << 20
+
+
+def _resolve_dates(text: str, today: date) -> str:
+    """Replace relative dates with the absolute dates they mean today"""
+    month_start = today.replace(day=1)
+    last_month = (month_start - timedelta(days=1)).replace(day=1)
+    week_start = today - timedelta(days=today.weekday())
+
+    text = LAST_DAYS_RE.sub(
+        lambda match: f"{today - timedelta(days=int(match.group(1)) - 1)} to {today}", text
+    )
+    replacements = [
+        ("today", str(today)),
+        ("yesterday", str(today - timedelta(days=1))),
+        ("this week", f"week of {week_start}"),
+        ("last week", f"week of {week_start - timedelta(days=7)}"),
+        ("this month", month_start.strftime("%Y-%m")),
+        ("last month", last_month.strftime("%Y-%m")),
+        ("this year", str(today.year)),
+        ("last year", str(today.year - 1)),
+    ]
+    for phrase, absolute in replacements:
+        text = re.sub(rf"\b{phrase}\b", absolute, text)
+    return text
+
+
+def normalize_question(question: str, today: Optional[date] = None) -> str:
+    """
+    Canonical form of a question for cache lookups.
+
+    Casefolds, strips accents, resolves relative dates against today,
+    turns number words into digits, rewrites common phrasings to one form
+    and drops filler words.
+    """
+    text = unicodedata.normalize("NFKD", question)
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    text = TRAILING_ZEROS_RE.sub(r"\1", THOUSANDS_RE.sub("", text))
+    # Keep dashes inside dates and codes, drop every other punctuation mark
+    text = " ".join(NON_WORD_RE.sub(" ", text.replace("-", "_")).split()).replace("_", "-")
+    text = " ".join(NUMBER_WORDS.get(word, word) for word in text.split())
+    text = _resolve_dates(text, today or date.today())
+    for phrase, canonical in SYNONYM_PHRASES:
+        text = re.sub(rf"\b{phrase}\b", canonical, text)
+    return " ".join(word for word in text.split() if word not in FILLER_WORDS)
+
+
+def _signature(words: List[str]) -> Tuple[str, ...]:
+    """Numbers, dates, codes, names and polarity words, which must match exactly"""
+    return tuple(
+        sorted(
+            word
+            for word in set(words)
+            if word in POLARITY_WORDS or word not in VOCABULARY or any(c.isdigit() for c in word)
+        )
+    )
+
+
+def _vector(text: str) -> Dict[int, float]:
+    """Unit-length hashed vector of word unigrams, bigrams and character trigrams"""
+    words = text.split()
+    features = [(word, 1.0) for word in words]
+    features += [(f"{first} {second}", 1.0) for first, second in zip(words, words[1:])]
+    padded = f" {text} "
+    features += [(f"#{padded[i : i + 3]}", 0.5) for i in range(len(padded) - 2)]
+
+    vector: Dict[int, float] = {}
+    for feature, weight in features:
+        bucket = zlib.crc32(feature.encode()) % VECTOR_BUCKETS
+        vector[bucket] = vector.get(bucket, 0.0) + weight
+    norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+    return {bucket: weight / norm for bucket, weight in vector.items()}
+
+
+def _similarity(left: Dict[int, float], right: Dict[int, float]) -> float:
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(weight * right.get(bucket, 0.0) for bucket, weight in left.items())
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    normalized: str
+    signature: Tuple[str, ...]
+    vector: Dict[int, float]
+    response: str
+    tool_used: Optional[str]
+    # Tools the answer was built from, and the data version of each endpoint they read
+    tools: Tuple[str, ...]
+    versions: Dict[str, int] = field(default_factory=dict)
+    # Session the answer belongs to when it was given mid-conversation, None for fresh sessions
+    scope: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+
+class AnswerCache:
+    """
+    Reuse final answers across near-duplicate questions.
+
+    Questions are normalized, then matched exactly or by cosine similarity of
+    hashed n-gram vectors, fully offline. Numbers, dates, codes, names and
+    polarity words must agree exactly before similarity is considered.
+    Answers given mid-conversation are scoped to their session, so a
+    follow-up is never answered from another conversation; questions that
+    refer back to the conversation are not cached at all. An answer is only reused while
+    every tool it used is still available and the data behind every endpoint
+    it read is at the same version (writes and syncs bump versions), and for
+    no longer than the shortest response cache TTL of those endpoints.
+    """
+
+    def __init__(self, tool_names: Iterable[str]):
+        self.tool_names = frozenset(tool_names)
+        # (scope, normalized question) -> CachedAnswer
+        self._answers = TTLCache(max_entries=Config.ANSWER_CACHE_MAX_ENTRIES)
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.stored = 0
+        self.uncacheable = 0
+
+    def _usable(self, answer: CachedAnswer) -> bool:
+        """Whether the answer's tools and data are unchanged since it was stored"""
+        return set(answer.tools) <= self.tool_names and all(
+            data_version(endpoint) == version for endpoint, version in answer.versions.items()
+        )
+
+    def _refers_back(self, question: str, words: List[str]) -> bool:
+        return bool(REFERRING_WORDS.intersection(words)) or bool(FOLLOW_UP_RE.match(question))
+
+    def lookup(self, question: str, scope: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached answer for the question, or None.
+
+        `scope` is the session id when the session already has history, so
+        only answers given in the same conversation can match.
+        """
+        if not Config.ANSWER_CACHE_ENABLED:
+            return None
+
+        normalized = normalize_question(question)
+        words = normalized.split()
+        if not words or self._refers_back(question, words):
+            return None
+
+        key, similarity = (scope, normalized), 1.0
+        answer: Optional[CachedAnswer] = self._answers.get(key)
+        if answer is None:
+            signature, vector = _signature(words), _vector(normalized)
+            best: Optional[CachedAnswer] = None
+            similarity = 0.0
+            for candidate in self._answers.values():
+                if candidate.scope != scope or candidate.signature != signature:
+                    continue
+                score = _similarity(vector, candidate.vector)
+                if score > similarity:
+                    best, similarity = candidate, score
+            if best is None or similarity < Config.ANSWER_CACHE_MIN_SIMILARITY:
+                self.misses += 1
+                return None
+            key = (scope, best.normalized)
+            # Also drops the entry if it expired in the meantime
+            answer = self._answers.get(key)
+            if answer is None:
+                self.misses += 1
+                return None
+
+        if not self._usable(answer):
+            self._answers.pop(key)
+            self.stale += 1
+            self.misses += 1
+            return None
+
+        if similarity >= 1.0:
+            self.exact_hits += 1
+        else:
+            self.similar_hits += 1
+        return {
+            "response": answer.response,
+            "tool_used": answer.tool_used,
+            "cached_question": answer.question,
+            "similarity": round(similarity, 3),
+            "age_seconds": round(time.time() - answer.created_at, 1),
+        }
+
+    def store(
+        self,
+        question: str,
+        response: str,
+        tool_used: Optional[str],
+        tool_outputs: List[Dict[str, Any]],
+        tool_timing: Optional[Dict[str, Any]] = None,
+        scope: Optional[str] = None,
+    ) -> bool:
+        """
+        Cache a successful answer, return whether it was stored.
+
+        Answers from turns with failed, timed out or writing tool calls, and
+        answers to questions that refer back to the conversation, are not cached.
+        `scope` is the session id when the session already had history.
+        """
+        if not Config.ANSWER_CACHE_ENABLED:
+            return False
+
+        normalized = normalize_question(question)
+        words = normalized.split()
+        failed = tool_timing and (tool_timing.get("timeouts") or tool_timing.get("errors"))
+        if (
+            not words
+            or not response
+            or failed
+            or self._refers_back(question, words)
+            or any(
+                not isinstance(call["output"], dict)
+                or not call["output"].get("success")
+                or call["output"].get("method") not in ("GET", "LOCAL")
+                for call in tool_outputs
+            )
+        ):
+            self.uncacheable += 1
+            return False
+
+        endpoints = {
+            call["output"]["endpoint_used"]
+            for call in tool_outputs
+            if isinstance(call["output"].get("endpoint_used"), str)
+        }
+        ttl = min([Config.ANSWER_CACHE_TTL, *(cache_ttl_for(endpoint) for endpoint in endpoints)])
+        self._answers.set(
+            (scope, normalized),
+            CachedAnswer(
+                question=question,
+                normalized=normalized,
+                signature=_signature(words),
+                vector=_vector(normalized),
+                response=response,
+                tool_used=tool_used,
+                tools=tuple(sorted({call["tool"] for call in tool_outputs})),
+                versions={endpoint: data_version(endpoint) for endpoint in endpoints},
+                scope=scope,
+            ),
+            ttl=ttl,
+        )
+        self.stored += 1
+        return True
+
+    def clear(self) -> int:
+        """Drop every cached answer, return the count removed"""
+        removed = len(self._answers)
+        self._answers.clear()
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "enabled": Config.ANSWER_CACHE_ENABLED,
+            "size": len(self._answers),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.similar_hits) / lookups, 4) if lookups else 0.0,
+            "stale": self.stale,
+            "stored": self.stored,
+            "uncacheable": self.uncacheable,
+        }
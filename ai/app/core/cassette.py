@@ -0,0 +1,450 @@
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, IO, List, Optional, Sequence
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import httpx
+from app.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+# One JSON object per line in each file of the cassette directory
+LLM_FILE = "llm.jsonl"
+HTTP_FILE = "http.jsonl"
+TURNS_FILE = "turns.jsonl"
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+def _tool_names(tools: Optional[Sequence[Any]]) -> List[str]:
+    return sorted(convert_to_openai_tool(tool)["function"]["name"] for tool in tools or [])
+
+
+def llm_keys(messages: List[BaseMessage], tools: Optional[Sequence[Any]]) -> Dict[str, str]:
+    """
+    Match keys for a model request.
+
+    "exact" covers every message (tool call ids left out, since they are
+    generated). "loose" covers only the last user message, how many tool
+    steps followed it and the bound tools, so with CASSETTE_LOOSE_MATCH a
+    replay still matches when tool results differ slightly (timings, cache
+    hits) from the recording.
+    """
+    names = _tool_names(tools)
+    last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+    question = _text(messages[last_human].content) if last_human >= 0 else ""
+    step = sum(1 for m in messages[last_human + 1 :] if isinstance(m, AIMessage) and m.tool_calls)
+    exact = [
+        [
+            message.type,
+            _text(message.content),
+            [[call["name"], call["args"]] for call in getattr(message, "tool_calls", None) or []],
+        ]
+        for message in messages
+    ]
+    return {"exact": _digest([exact, names]), "loose": _digest([question, step, names])}
+
+
+def http_key(request: httpx.Request) -> str:
+    """Match key for a backend request: method, path, sorted query and body"""
+    return _digest(
+        [request.method, request.url.path, sorted(request.url.params.multi_items()), request.content.decode(errors="replace")]
+    )
+
+
+class Cassette:
+    """
+    Recorded model calls, backend calls and chat turns in one directory.
+
+    In record mode each interaction is appended as it completes, with how
+    long it took and when it started. In replay mode interactions are
+    looked up by key; repeated requests get the recorded responses in order,
+    cycling once they run out.
+    """
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self.directory: Optional[Path] = None
+        self._lock = threading.Lock()
+        self._files: Dict[str, IO[str]] = {}
+        self._started = time.monotonic()
+        # file -> match kind -> key -> [entries]
+        self._entries: Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]] = {}
+        self._cursors: Dict[tuple, int] = {}
+        self.counters: Dict[str, int] = {}
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _count(self, name: str) -> None:
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def start(self, mode: Optional[str] = None, directory: Optional[str] = None) -> None:
+        """Open the cassette for recording or load it for replay (called from the FastAPI lifespan)"""
+        mode = mode or Config.CASSETTE_MODE
+        if mode not in (RECORD, REPLAY):
+            return
+        self.stop()
+        self.mode = mode
+        self.directory = Path(directory or Config.CASSETTE_DIR)
+        self._started = time.monotonic()
+        self.counters = {}
+
+        if self.recording:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._files = {name: open(self.directory / name, "a") for name in (LLM_FILE, HTTP_FILE, TURNS_FILE)}
+            logger.info(f"Recording cassette to {self.directory}")
+            return
+
+        self._entries = {}
+        self._cursors = {}
+        for name in (LLM_FILE, HTTP_FILE):
+            index: Dict[str, Dict[str, List[Dict[str, Any]]]] = {"exact": {}, "loose": {}}
+            for entry in self._read(name):
+                index["exact"].setdefault(entry["key"], []).append(entry)
+                if entry.get("loose_key"):
+                    index["loose"].setdefault(entry["loose_key"], []).append(entry)
+            self._entries[name] = index
+        logger.info(
+            f"Replaying cassette from {self.directory} "
+            f"({sum(len(v) for v in self._entries[LLM_FILE]['exact'].values())} model calls, "
+            f"{sum(len(v) for v in self._entries[HTTP_FILE]['exact'].values())} backend calls)"
+        )
+
+    def stop(self) -> None:
+        with self._lock:
+            for file in self._files.values():
+                file.close()
+            self._files = {}
+        if self.mode:
+            logger.info(f"Cassette {self.mode} finished: {self.counters}")
+        self.mode = None
+
+    def _read(self, name: str) -> List[Dict[str, Any]]:
+        path = (self.directory or Path(Config.CASSETTE_DIR)) / name
+        if not path.exists():
+            return []
+        with open(path) as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def turns(self) -> List[Dict[str, Any]]:
+        """Recorded chat turns, in the order they arrived"""
+        return sorted(self._read(TURNS_FILE), key=lambda turn: turn["offset"])
+
+    def offset(self) -> float:
+        """Seconds since recording started"""
+        return round(time.monotonic() - self._started, 4)
+
+    def record(self, name: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            file = self._files.get(name)
+            if file is None:
+                return
+            file.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+            file.flush()
+        self._count(f"recorded_{name.split('.')[0]}")
+
+    def record_turn(self, message: str, session_id: str, stream: bool = False) -> None:
+        """Record an incoming chat turn, so the same traffic can be replayed later"""
+        if self.recording:
+            self.record(TURNS_FILE, {"offset": self.offset(), "session_id": session_id, "message": message, "stream": stream})
+
+    def lookup(self, name: str, key: str, loose_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Next recorded entry for a request, matching exactly first, then loosely if enabled"""
+        index = self._entries.get(name, {})
+        kind = name.split(".")[0]
+        if not Config.CASSETTE_LOOSE_MATCH:
+            loose_key = None
+        for match, value in (("exact", key), ("loose", loose_key)):
+            entries = index.get(match, {}).get(value) if value else None
+            if entries:
+                with self._lock:
+                    cursor = self._cursors.get((name, match, value), 0)
+                    self._cursors[(name, match, value)] = cursor + 1
+                self._count(f"{kind}_{match}_hits")
+                if match == "loose":
+                    logger.warning(f"Replaying a loosely matched {kind} call; its response may not fit the request")
+                return entries[cursor % len(entries)]
+        self._count(f"{kind}_misses")
+        return None
+
+    async def wait(self, seconds: float) -> None:
+        """Sleep for a recorded duration, scaled by CASSETTE_TIME_SCALE"""
+        delay = seconds * Config.CASSETTE_TIME_SCALE
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        warnings = []
+        loose_hits = sum(count for name, count in self.counters.items() if name.endswith("_loose_hits"))
+        if loose_hits:
+            warnings.append(f"{loose_hits} calls were replayed from a loose match and may not fit their requests")
+        return {
+            "mode": self.mode or "off",
+            "directory": str(self.directory) if self.directory else None,
+            "loose_match": Config.CASSETTE_LOOSE_MATCH,
+            **self.counters,
+            "warnings": warnings,
+        }
+
+
+# Application-wide cassette
+cassette = Cassette()
+
+
+def _recorded_message(message: BaseMessage) -> Dict[str, Any]:
+    return {
+        "content": message.content,
+        "tool_calls": [
+            {"name": call["name"], "args": call["args"], "id": call.get("id")}
+            for call in getattr(message, "tool_calls", None) or []
+        ],
+        "usage": getattr(message, "usage_metadata", None),
+    }
+
+
+def _replayed_message(entry: Dict[str, Any]) -> AIMessage:
+    recorded = entry["message"]
+    return AIMessage(
+        content=recorded["content"],
+        tool_calls=[{**call, "type": "tool_call"} for call in recorded["tool_calls"]],
+        usage_metadata=recorded.get("usage"),
+    )
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Chat model that records the calls of `inner`, or replays them.
+
+    With no `inner` model every call is served from the cassette, and a
+    request that was never recorded raises LookupError.
+    """
+
+    model: str
+    inner: Optional[BaseChatModel] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        # Tools are formatted by the inner model when it is called
+        return self.bind(cassette_tools=list(tools), cassette_tool_options=kwargs)
+
+    def _inner_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs = dict(kwargs)
+        tools = kwargs.pop("cassette_tools", None)
+        options = kwargs.pop("cassette_tool_options", None) or {}
+        if tools:
+            kwargs.update(getattr(self.inner.bind_tools(tools, **options), "kwargs", {}))
+        return kwargs
+
+    def _replay(self, messages: List[BaseMessage], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        keys = llm_keys(messages, kwargs.get("cassette_tools"))
+        entry = cassette.lookup(LLM_FILE, keys["exact"], keys["loose"])
+        if entry is None:
+            raise LookupError(f"Model call not found in cassette {cassette.directory}")
+        return entry
+
+    def _record(self, messages: List[BaseMessage], kwargs: Dict[str, Any], message: BaseMessage, **timing: Any) -> None:
+        keys = llm_keys(messages, kwargs.get("cassette_tools"))
+        cassette.record(
+            LLM_FILE,
+            {"key": keys["exact"], "loose_key": keys["loose"], "model": self.model, **timing, "message": _recorded_message(message)},
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.inner is None:
+            entry = self._replay(messages, kwargs)
+            time.sleep(entry["seconds"] * Config.CASSETTE_TIME_SCALE)
+            return ChatResult(generations=[ChatGeneration(message=_replayed_message(entry))])
+
+        offset, started = cassette.offset(), time.monotonic()
+        result = self.inner._generate(messages, stop=stop, **self._inner_kwargs(kwargs))
+        self._record(messages, kwargs, result.generations[0].message, offset=offset, seconds=round(time.monotonic() - started, 4))
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.inner is None:
+            entry = self._replay(messages, kwargs)
+            await cassette.wait(entry["seconds"])
+            return ChatResult(generations=[ChatGeneration(message=_replayed_message(entry))])
+
+        offset, started = cassette.offset(), time.monotonic()
+        result = await self.inner._agenerate(messages, stop=stop, **self._inner_kwargs(kwargs))
+        self._record(messages, kwargs, result.generations[0].message, offset=offset, seconds=round(time.monotonic() - started, 4))
+        return result
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.inner is None:
+            async for chunk in self._replay_stream(self._replay(messages, kwargs)):
+                yield chunk
+            return
+
+        offset, started = cassette.offset(), time.monotonic()
+        first_chunk: Optional[float] = None
+        message: Optional[AIMessageChunk] = None
+        async for chunk in self.inner._astream(messages, stop=stop, **self._inner_kwargs(kwargs)):
+            if first_chunk is None:
+                first_chunk = round(time.monotonic() - started, 4)
+            message = chunk.message if message is None else message + chunk.message
+            yield chunk
+        # Only complete streams are recorded; a cancelled hedge never gets here
+        if message is not None:
+            self._record(
+                messages, kwargs, message,
+                offset=offset, seconds=round(time.monotonic() - started, 4), first_chunk_seconds=first_chunk,
+            )
+
+    async def _replay_stream(self, entry: Dict[str, Any]) -> AsyncIterator[ChatGenerationChunk]:
+        """Stream a recorded reply: the first chunk after the recorded delay, the rest spread over the remaining time"""
+        message = _replayed_message(entry)
+        first_chunk = entry.get("first_chunk_seconds")
+        if first_chunk is None:
+            first_chunk = entry["seconds"]
+        await cassette.wait(first_chunk)
+
+        if message.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content=message.content,
+                    tool_call_chunks=[
+                        {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+                        for index, call in enumerate(message.tool_calls)
+                    ],
+                    usage_metadata=message.usage_metadata,
+                )
+            )
+            return
+
+        words = _text(message.content).split(" ")
+        gap = max(0.0, entry["seconds"] - first_chunk) / max(1, len(words) - 1)
+        for index, word in enumerate(words):
+            if index:
+                await cassette.wait(gap)
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content=word if index == len(words) - 1 else word + " ",
+                    usage_metadata=message.usage_metadata if index == 0 else None,
+                )
+            )
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    HTTP transport that records backend calls made through `inner`, or replays them.
+
+    A replayed request that was never recorded gets a 404 in the backend's
+    response format, so fetch() reports it like any other failed call.
+    """
+
+    def __init__(self, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = http_key(request)
+
+        if self.inner is None:
+            entry = cassette.lookup(HTTP_FILE, key)
+            if entry is None:
+                return httpx.Response(
+                    404,
+                    json={"statusCode": 404, "message": f"{request.method} {request.url.path} not found in cassette"},
+                    request=request,
+                )
+            await cassette.wait(entry["seconds"])
+            content = entry["body"] if isinstance(entry["body"], str) else json.dumps(entry["body"])
+            return httpx.Response(
+                entry["status"], content=content, headers={"Content-Type": entry.get("content_type") or "application/json"},
+                request=request,
+            )
+
+        offset, started = cassette.offset(), time.monotonic()
+        response = await self.inner.handle_async_request(request)
+        content = await response.aread()
+        try:
+            body: Any = json.loads(content)
+        except ValueError:
+            body = content.decode(errors="replace")
+        cassette.record(
+            HTTP_FILE,
+            {
+                "key": key,
+                "method": request.method,
+                "path": request.url.path,
+                "offset": offset,
+                "seconds": round(time.monotonic() - started, 4),
+                "status": response.status_code,
+                "content_type": response.headers.get("Content-Type"),
+                "body": body,
+            },
+        )
+        return response
+
+    async def aclose(self) -> None:
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+def wrap_llm(model_name: str, model: Optional[BaseChatModel]) -> BaseChatModel:
+    """Wrap a model for the active cassette mode (replay needs no model at all)"""
+    if cassette.replaying:
+        return CassetteChatModel(model=model_name)
+    if cassette.recording and model is not None:
+        return CassetteChatModel(model=model_name, inner=model)
+    return model
+
+
+def wrap_transport(transport: httpx.AsyncBaseTransport) -> Optional[httpx.AsyncBaseTransport]:
+    """Transport for the backend client in the active cassette mode, or None outside record/replay"""
+    if cassette.replaying:
+        return CassetteTransport()
+    if cassette.recording:
+        return CassetteTransport(transport)
+    return None
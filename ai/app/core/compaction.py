@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from decimal import Decimal
+import json
+import re
+from app.config.config import Config
+
+# Fields the model needs per resource. A nested spec keeps only those fields
+# of an included object (or of each element of an included list).
+Projection = Dict[str, Optional["Projection"]]
+
+CUSTOMER_FIELDS: Projection = {
+    "uuid": None,
+    "customer_code": None,
+    "first_name": None,
+    "last_name": None,
+    "phone": None,
+    "email": None,
+    "city": None,
+    "is_active": None,
+}
+
+PRODUCT_FIELDS: Projection = {
+    "uuid": None,
+    "product_code": None,
+    "product_name": None,
+    "category": None,
+    "cost_price": None,
+    "selling_price": None,
+    "is_active": None,
+}
+
+INVENTORY_FIELDS: Projection = {
+    "uuid": None,
+    "product_uuid": None,
+    "product_code": None,
+    "product_name": None,
+    "warehouse_name": None,
+    "quantity": None,
+    "product": {"product_code": None, "product_name": None},
+}
+
+TRANSACTION_FIELDS: Projection = {
+    "uuid": None,
+    "sale_date": None,
+    "customer_uuid": None,
+    "total_amount": None,
+    "discount_amount": None,
+    "payment_method": None,
+    "payment_status": None,
+    "due_date": None,
+    "status": None,
+    "customer": {"customer_code": None, "first_name": None, "last_name": None},
+    "employee": {"employee_code": None, "first_name": None, "last_name": None},
+    "items": {"product_uuid": None, "quantity": None, "unit_price": None, "subtotal": None},
+}
+
+# Projection per tool; tools not listed keep every field
+TOOL_PROJECTIONS: Dict[str, Projection] = {
+    "get_customer_list": CUSTOMER_FIELDS,
+    "get_customer_details": CUSTOMER_FIELDS,
+    "get_customer_details_batch": CUSTOMER_FIELDS,
+    "get_product_list": PRODUCT_FIELDS,
+    "get_product_details": PRODUCT_FIELDS,
+    "get_product_details_batch": PRODUCT_FIELDS,
+    "get_inventory_list": INVENTORY_FIELDS,
+    "get_inventory_details": INVENTORY_FIELDS,
+    "get_low_stock_inventory": INVENTORY_FIELDS,
+    "get_transaction_list": TRANSACTION_FIELDS,
+    "get_transaction_details": TRANSACTION_FIELDS,
+    "get_transaction_details_batch": TRANSACTION_FIELDS,
+}
+
+# Decimal columns come back as strings ("1250.00"); integers are left alone so codes keep leading zeros
+DECIMAL_RE = re.compile(r"-?\d+\.\d+")
+DATETIME_RE = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}")
+
+# Keys of a list payload that hold its rows
+ROW_KEYS = ("rows", "results")
+
+
+def estimate_tokens(value: Any) -> int:
+    """Cheap offline token estimate of a JSON value (about 4 characters per token)"""
+    return len(json.dumps(value, default=str, separators=(",", ":"))) // 4
+
+
+def _normalize(value: Any) -> Any:
+    """Shorten scalars: numeric strings become numbers, timestamps lose seconds and zones"""
+    if isinstance(value, Decimal):
+        value = float(value)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else round(value, 2)
+    if isinstance(value, str):
+        if DECIMAL_RE.fullmatch(value):
+            return _normalize(float(value))
+        if DATETIME_RE.match(value):
+            date, time = value[:10], value[11:16]
+            return date if time == "00:00" else f"{date} {time}"
+    return value
+
+
+def project(value: Any, fields: Optional[Projection]) -> Any:
+    """Keep the projected fields of a row (or of each row), normalized, without nulls"""
+    if isinstance(value, list):
+        # Included lists (e.g. transaction items) get the same row cap
+        rows = [project(item, fields) for item in value[: Config.TOOL_OUTPUT_MAX_ROWS]]
+        if len(value) > len(rows):
+            rows.append(f"{len(value) - len(rows)} more rows not shown")
+        return rows
+    if not isinstance(value, dict):
+        return _normalize(value)
+
+    compact = {}
+    for key, item in value.items():
+        if fields is not None and key not in fields:
+            continue
+        item = project(item, fields.get(key) if fields is not None else None)
+        if item is not None and item != [] and item != {}:
+            compact[key] = item
+    return compact
+
+
+def _payload(envelope: Any) -> Any:
+    """Unwrap the backend's response envelope"""
+    if isinstance(envelope, dict) and "data" in envelope:
+        return envelope["data"]
+    return envelope
+
+
+def _project_rows(rows: List[Any], fields: Optional[Projection]) -> List[Any]:
+    """Project list rows, unwrapping the per-ID results of batch tools"""
+    compact = []
+    for row in rows:
+        if isinstance(row, dict) and "id" in row and "success" in row:
+            if row["success"]:
+                row = _payload(row.get("data"))
+            else:
+                compact.append({"id": row["id"], "error": row.get("error")})
+                continue
+        compact.append(project(row, fields))
+    return compact
+
+
+def _split_rows(payload: Any) -> Tuple[Optional[List[Any]], Dict[str, Any]]:
+    """Find the rows of a list payload and the fields that describe them"""
+    if isinstance(payload, list):
+        return payload, {}
+    if isinstance(payload, dict):
+        for key in ROW_KEYS:
+            if isinstance(payload.get(key), list):
+                return payload[key], {k: v for k, v in payload.items() if k != key}
+    return None, {}
+
+
+def _with_rows(rows: List[Any], total: int, extra: Dict[str, Any]) -> Dict[str, Any]:
+    data: Dict[str, Any] = {**extra, "rows": rows}
+    if total > len(rows):
+        data["more_rows"] = f"{total - len(rows)} more rows not shown"
+    return data
+
+
+def compact_tool_output(tool_name: str, output: Any) -> Any:
+    """
+    Shrink a tool result before it is given to the model.
+
+    The fetch() envelope is reduced to its payload, rows are projected to the
+    fields listed for the tool and normalized, lists are capped at
+    TOOL_OUTPUT_MAX_ROWS with a "more rows" marker, and rows are dropped
+    until the result fits TOOL_OUTPUT_TOKEN_BUDGET.
+    """
+    if not Config.TOOL_OUTPUT_COMPACTION or not isinstance(output, dict):
+        return output
+
+    if not output.get("success"):
+        return {"success": False, "error": output.get("error")}
+
+    payload = _payload(output.get("data"))
+    rows, extra = _split_rows(payload)
+    fields = TOOL_PROJECTIONS.get(tool_name)
+    if rows is None:
+        # Single record or aggregate
+        return {"success": True, "data": project(payload, fields)}
+
+    extra = project(extra, None)
+    total = len(rows)
+    rows = _project_rows(rows[: Config.TOOL_OUTPUT_MAX_ROWS], fields)
+    data = _with_rows(rows, total, extra)
+
+    budget = Config.TOOL_OUTPUT_TOKEN_BUDGET
+    while rows and estimate_tokens(data) > budget:
+        rows = rows[: len(rows) // 2]
+        data = _with_rows(rows, total, extra)
+
+    return {"success": True, "data": data}
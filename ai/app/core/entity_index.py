@@ -0,0 +1,248 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import asyncio
+import logging
+import re
+import time
+import unicodedata
+from app.config.config import Config
+from app.utils.api import data_version, iter_pages
+
+logger = logging.getLogger(__name__)
+
+NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> str:
+    """Casefold, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(NON_WORD_RE.sub(" ", text.casefold()).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of the normalized text, padded so short words still match"""
+    padded = f"  {text} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+@dataclass
+class IndexedEntity:
+    entity_type: str
+    uuid: str
+    name: str
+    code: str
+    details: Dict[str, Any]
+
+
+# entity type -> (list endpoint, name builder, code field, detail fields)
+SOURCES = {
+    "customer": (
+        "/customers/list",
+        lambda row: " ".join(p for p in (row.get("first_name"), row.get("last_name")) if p),
+        "customer_code",
+        ("city", "email", "phone"),
+    ),
+    "product": (
+        "/products/list/page",
+        lambda row: row.get("product_name") or "",
+        "product_code",
+        ("category", "selling_price"),
+    ),
+}
+
+
+class EntityIndex:
+    """
+    In-memory trigram index over customer and product names and codes.
+
+    Maps what users type ("john smith", "blue widget", "c-0012") to ranked
+    UUID candidates without listing pages through the agent. The index is
+    rebuilt from the list endpoints in the background and swapped in whole,
+    so lookups never see a half-built index.
+
+    It is built at startup, then rebuilt every ENTITY_INDEX_REFRESH_INTERVAL
+    seconds and soon after a write to customers or products invalidates their
+    cached responses.
+
+    Postings point at distinct normalized keys (names and codes) rather than
+    entities, so a name shared by many customers is scored once.
+    """
+
+    def __init__(self):
+        self._entities: List[IndexedEntity] = []
+        # Distinct normalized keys, their trigrams and the entities having them
+        self._keys: List[Tuple[str, frozenset, List[int]]] = []
+        # trigram -> ids of keys containing it
+        self._postings: Dict[str, List[int]] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stale_task: Optional[asyncio.Task] = None
+        # Data versions of the source endpoints when the index was built
+        self._versions: Dict[str, int] = {}
+        self.last_refresh: Optional[datetime] = None
+        self.last_refresh_seconds = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.last_refresh is not None
+
+    def start(self) -> None:
+        """Start refreshing the index in the background (called from the FastAPI lifespan)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._stale_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._stale_task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            # The first build starts right away, later ones every interval
+            if self.ready:
+                await asyncio.sleep(Config.ENTITY_INDEX_REFRESH_INTERVAL)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing entity index: {e}")
+                if not self.ready:
+                    await asyncio.sleep(Config.ENTITY_INDEX_REFRESH_INTERVAL)
+
+    def _current_versions(self) -> Dict[str, int]:
+        return {endpoint: data_version(endpoint) for endpoint, *_ in SOURCES.values()}
+
+    def refresh_if_stale(self) -> None:
+        """Rebuild in the background if a write invalidated the source endpoints since the last build"""
+        if self._versions == self._current_versions():
+            return
+        if self._stale_task is None or self._stale_task.done():
+            self._stale_task = asyncio.create_task(self._refresh_quietly())
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing entity index: {e}")
+
+    async def refresh(self) -> int:
+        """Rebuild the index from the backend, return the number of entities indexed"""
+        async with self._refresh_lock:
+            started = time.monotonic()
+            versions = self._current_versions()
+            entities: List[IndexedEntity] = []
+
+            for entity_type, (endpoint, name_of, code_field, detail_fields) in SOURCES.items():
+                async for page in iter_pages(endpoint, max_rows=Config.ENTITY_INDEX_MAX_ENTITIES, cache=False):
+                    for row in page["rows"]:
+                        name, code = name_of(row), str(row.get(code_field) or "")
+                        entities.append(
+                            IndexedEntity(
+                                entity_type=entity_type,
+                                uuid=row["uuid"],
+                                name=name,
+                                code=code,
+                                details={field: row.get(field) for field in detail_fields if row.get(field) is not None},
+                            )
+                        )
+
+            key_ids: Dict[str, int] = {}
+            keys: List[Tuple[str, frozenset, List[int]]] = []
+            postings: Dict[str, List[int]] = defaultdict(list)
+            for entity_id, entity in enumerate(entities):
+                for key in {normalize(entity.name), normalize(entity.code)} - {""}:
+                    if key not in key_ids:
+                        key_ids[key] = len(keys)
+                        grams = frozenset(trigrams(key))
+                        keys.append((key, grams, []))
+                        for gram in grams:
+                            postings[gram].append(key_ids[key])
+                    keys[key_ids[key]][2].append(entity_id)
+
+            self._entities, self._keys, self._postings = entities, keys, dict(postings)
+            self._versions = versions
+            self.last_refresh = datetime.now(timezone.utc)
+            self.last_refresh_seconds = round(time.monotonic() - started, 3)
+            logger.info(f"Entity index refreshed: {len(entities)} entities in {self.last_refresh_seconds}s")
+            return len(entities)
+
+    def _score(self, query: str, shared: int, query_size: int, key: str, key_size: int) -> float:
+        """Similarity between the query and one key"""
+        if key == query:
+            return 1.0
+        # Dice coefficient over trigrams
+        score = 2 * shared / (query_size + key_size)
+        if key.startswith(query) or f" {query}" in f" {key}":
+            # Typed a prefix or one whole word of the name
+            score = max(score, 0.6 + 0.3 * len(query) / len(key))
+        return score
+
+    def resolve(
+        self, query: str, entity_type: Optional[str] = None, limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Ranked candidates for a name or code, best first"""
+        normalized = normalize(query)
+        if not normalized:
+            return []
+
+        entities, keys = self._entities, self._keys
+        query_grams = trigrams(normalized)
+
+        # Only score keys sharing enough trigrams with the query
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for key_id in self._postings.get(gram, ()):
+                shared[key_id] += 1
+        minimum = max(1, int(len(query_grams) * Config.ENTITY_INDEX_MIN_OVERLAP))
+
+        # An entity matched through both its name and its code keeps the best score
+        best: Dict[int, float] = {}
+        for key_id, count in shared.items():
+            if count < minimum:
+                continue
+            key, grams, entity_ids = keys[key_id]
+            score = self._score(normalized, count, len(query_grams), key, len(grams))
+            if score < Config.ENTITY_INDEX_MIN_SCORE:
+                continue
+            for entity_id in entity_ids:
+                if score > best.get(entity_id, 0.0):
+                    best[entity_id] = score
+
+        candidates = [
+            (score, entities[entity_id])
+            for entity_id, score in best.items()
+            if not entity_type or entities[entity_id].entity_type == entity_type
+        ]
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return [
+            {
+                "type": entity.entity_type,
+                "uuid": entity.uuid,
+                "name": entity.name,
+                "code": entity.code,
+                "score": round(score, 3),
+                **entity.details,
+            }
+            for score, entity in candidates[:limit]
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "entities": len(self._entities),
+            "keys": len(self._keys),
+            "trigrams": len(self._postings),
+            "last_refresh": self.last_refresh,
+            "last_refresh_seconds": self.last_refresh_seconds,
+        }
+
+
+# Application-wide index used by the resolve_entity tool
+entity_index = EntityIndex()
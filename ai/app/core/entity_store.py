@@ -0,0 +1,418 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from app.config.config import Config
+from app.utils.api import invalidate_cache, iter_pages
+
+logger = logging.getLogger(__name__)
+
+FILTER_RE = re.compile(r"^\s*(\w+)\s*(>=|<=|!=|=|>|<|\bcontains\b)\s*(.*?)\s*$", re.IGNORECASE)
+NUMBER_RE = re.compile(r"-?\d+(\.\d+)?")
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+SQL_OPERATORS = {"=": "=", "!=": "!=", ">": ">", ">=": ">=", "<": "<", "<=": "<="}
+
+
+def _name(person: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not person:
+        return None
+    return " ".join(part for part in (person.get("first_name"), person.get("last_name")) if part)
+
+
+@dataclass
+class EntityTable:
+    """A backend list endpoint mirrored into one SQLite table"""
+
+    name: str
+    endpoint: str
+    # column -> SQLite type; the first column is the primary key
+    columns: Dict[str, str]
+    indexes: List[str]
+    # Builds the stored row from a backend row
+    extract: Callable[[Dict[str, Any]], Dict[str, Any]] = field(default=lambda row: row)
+    # What tools query; a view can add joined columns
+    source: Optional[str] = None
+    # column -> SQLite type of the columns the view adds
+    joined: Dict[str, str] = field(default_factory=dict)
+    # TEXT columns holding ISO timestamps, where a date-only filter means the whole day
+    timestamps: List[str] = field(default_factory=list)
+
+
+TABLES: Dict[str, EntityTable] = {
+    table.name: table
+    for table in (
+        EntityTable(
+            name="customers",
+            endpoint="/customers/list",
+            columns={
+                "uuid": "TEXT",
+                "customer_code": "TEXT COLLATE NOCASE",
+                "first_name": "TEXT COLLATE NOCASE",
+                "last_name": "TEXT COLLATE NOCASE",
+                "full_name": "TEXT COLLATE NOCASE",
+                "phone": "TEXT",
+                "email": "TEXT COLLATE NOCASE",
+                "address": "TEXT COLLATE NOCASE",
+                "city": "TEXT COLLATE NOCASE",
+                "postal_code": "TEXT",
+                "customer_type": "TEXT COLLATE NOCASE",
+                "is_active": "INTEGER",
+            },
+            indexes=["customer_code", "full_name", "city", "customer_type"],
+            extract=lambda row: {**row, "full_name": _name(row)},
+        ),
+        EntityTable(
+            name="products",
+            endpoint="/products/list/page",
+            columns={
+                "uuid": "TEXT",
+                "product_code": "TEXT COLLATE NOCASE",
+                "product_name": "TEXT COLLATE NOCASE",
+                "category": "TEXT COLLATE NOCASE",
+                "cost_price": "REAL",
+                "selling_price": "REAL",
+                "is_active": "INTEGER",
+            },
+            indexes=["product_code", "product_name", "category", "selling_price"],
+        ),
+        EntityTable(
+            name="inventory",
+            endpoint="/inventories/list/page",
+            columns={
+                "uuid": "TEXT",
+                "product_uuid": "TEXT",
+                "warehouse_name": "TEXT COLLATE NOCASE",
+                "quantity": "INTEGER",
+                "is_active": "INTEGER",
+            },
+            indexes=["product_uuid", "warehouse_name", "quantity"],
+            source=(
+                "(SELECT inventory.*, products.product_code, products.product_name, products.category "
+                "FROM inventory LEFT JOIN products ON products.uuid = inventory.product_uuid)"
+            ),
+            joined={
+                "product_code": "TEXT COLLATE NOCASE",
+                "product_name": "TEXT COLLATE NOCASE",
+                "category": "TEXT COLLATE NOCASE",
+            },
+        ),
+        EntityTable(
+            name="transactions",
+            endpoint="/transactions/list",
+            columns={
+                "uuid": "TEXT",
+                "sale_date": "TEXT",
+                "customer_uuid": "TEXT",
+                "customer_code": "TEXT COLLATE NOCASE",
+                "customer_name": "TEXT COLLATE NOCASE",
+                "employee_uuid": "TEXT",
+                "employee_code": "TEXT COLLATE NOCASE",
+                "employee_name": "TEXT COLLATE NOCASE",
+                "subtotal": "REAL",
+                "tax_amount": "REAL",
+                "discount_amount": "REAL",
+                "total_amount": "REAL",
+                "payment_method": "TEXT COLLATE NOCASE",
+                "payment_status": "TEXT COLLATE NOCASE",
+                "due_date": "TEXT",
+                "status": "TEXT COLLATE NOCASE",
+                "updated_at": "TEXT",
+            },
+            indexes=[
+                "customer_uuid",
+                "customer_code",
+                "sale_date",
+                "status, payment_status",
+                "total_amount",
+            ],
+            timestamps=["sale_date", "due_date", "updated_at"],
+            extract=lambda row: {
+                **row,
+                "customer_code": (row.get("customer") or {}).get("customer_code"),
+                "customer_name": _name(row.get("customer")),
+                "employee_code": (row.get("employee") or {}).get("employee_code"),
+                "employee_name": _name(row.get("employee")),
+            },
+        ),
+    )
+}
+
+
+def _index_name(table: str, columns: str) -> str:
+    return f"idx_{table}_" + "_".join(column.strip() for column in columns.split(","))
+
+
+def _parse_value(column: str, kind: str, raw: str) -> Any:
+    """Coerce a filter value to the column's declared type, so '0812' stays text and '5' is a number"""
+    raw = raw.strip("'\"")
+    if raw.lower() in ("null", "none"):
+        return None
+    if not kind.startswith(("INTEGER", "REAL")):
+        return raw
+    if raw.lower() in ("true", "false"):
+        return 1 if raw.lower() == "true" else 0
+    if not NUMBER_RE.fullmatch(raw):
+        raise ValueError(f"Column '{column}' holds numbers, got {raw!r}")
+    return float(raw) if kind.startswith("REAL") or "." in raw else int(raw)
+
+
+def _day_clause(column: str, op: str, day: str) -> Tuple[str, List[Any]]:
+    """Compare a timestamp column with a whole day: '= d' is 'd <= column < d+1'"""
+    next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+    if op == "=":
+        return f"({column} >= ? AND {column} < ?)", [day, next_day]
+    if op == "!=":
+        return f"({column} < ? OR {column} >= ?)", [day, next_day]
+    if op == "<=":
+        return f"{column} < ?", [next_day]
+    if op == ">":
+        return f"{column} >= ?", [next_day]
+    return f"{column} {SQL_OPERATORS[op]} ?", [day]
+
+
+class EntityStore:
+    """
+    Local SQLite mirror of customers, products, inventory and transactions.
+
+    Each table is synced from its backend list endpoint in the background.
+    Only transactions carry updated_at in list responses, so every row is
+    stored with a sync key (updated_at, or a hash of the row when there is
+    none) and only rows whose key changed are written. Rows missing from a
+    complete scan are deleted. Filter columns are indexed so selective
+    questions become one indexed query instead of many paged HTTP calls.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.ENTITY_STORE_PATH
+        self._connection: Optional[sqlite3.Connection] = None
+        # One connection shared between the sync and the tools' worker threads
+        self._db_lock = threading.Lock()
+        self._sync_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.synced: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return Config.ENTITY_STORE_ENABLED and len(self.synced) == len(TABLES)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            for table in TABLES.values():
+                columns = ", ".join(f"{name} {kind}" for name, kind in table.columns.items())
+                primary_key = next(iter(table.columns))
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table.name} "
+                    f"({columns}, sync_key TEXT, PRIMARY KEY ({primary_key}))"
+                )
+                for index in table.indexes:
+                    connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_index_name(table.name, index)} "
+                        f"ON {table.name} ({index})"
+                    )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._db_lock:
+            return work(self._connect())
+
+    # ---------------------------------------------------------------------------#
+    #                               Synchronization                              #
+    # ---------------------------------------------------------------------------#
+
+    def start(self) -> None:
+        """Start syncing in the background (called from the FastAPI lifespan)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def _sync_loop(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Error syncing entity store: {e}")
+            await asyncio.sleep(Config.ENTITY_STORE_REFRESH_INTERVAL)
+
+    async def sync(self) -> Dict[str, int]:
+        """Sync every table, return the number of rows changed per table"""
+        async with self._sync_lock:
+            changed = {}
+            for table in TABLES.values():
+                changed[table.name] = await self._sync_table(table)
+            return changed
+
+    def _sync_key(self, values: Tuple[Any, ...]) -> str:
+        """Digest of the values stored for a row, so only changes to them count"""
+        encoded = json.dumps(values, default=str).encode()
+        return hashlib.sha1(encoded).hexdigest()
+
+    async def _sync_table(self, table: EntityTable) -> int:
+        started = time.monotonic()
+
+        known: Dict[str, str] = await asyncio.to_thread(
+            self._execute,
+            lambda db: dict(db.execute(f"SELECT uuid, sync_key FROM {table.name}").fetchall()),
+        )
+
+        seen = set()
+        upserts: List[Tuple[Any, ...]] = []
+        total = 0
+        async for page in iter_pages(table.endpoint, max_rows=Config.ENTITY_STORE_MAX_ROWS, cache=False):
+            total = page["count"]
+            for row in page["rows"]:
+                if row["uuid"] in seen:
+                    continue
+                seen.add(row["uuid"])
+                stored = table.extract(row)
+                values = tuple(stored.get(column) for column in table.columns)
+                key = self._sync_key(values)
+                if known.get(row["uuid"]) != key:
+                    upserts.append(values + (key,))
+
+        # Pages can overlap or skip rows if the list changes mid-scan
+        complete = len(seen) == total
+        removed = [(uuid,) for uuid in known if uuid not in seen] if complete else []
+
+        columns = list(table.columns) + ["sync_key"]
+        placeholders = ", ".join("?" for _ in columns)
+
+        def write(db: sqlite3.Connection) -> None:
+            with db:
+                db.executemany(
+                    f"INSERT OR REPLACE INTO {table.name} ({', '.join(columns)}) VALUES ({placeholders})",
+                    upserts,
+                )
+                db.executemany(f"DELETE FROM {table.name} WHERE uuid = ?", removed)
+
+        # Nothing is written or invalidated unless a stored value changed
+        if upserts or removed:
+            await asyncio.to_thread(self._execute, write)
+            # Cached responses for the resource no longer match the backend
+            invalidate_cache("/" + table.endpoint.strip("/").split("/")[0])
+            logger.info(
+                f"Entity store synced {table.name}: {len(upserts)} upserted, {len(removed)} removed "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+
+        self.synced[table.name] = {
+            "rows": len(seen) if complete else len(known) + len(upserts),
+            "complete": complete,
+            "last_changed": len(upserts) + len(removed),
+            "last_sync": datetime.now(timezone.utc),
+        }
+        return len(upserts) + len(removed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": Config.ENTITY_STORE_ENABLED,
+            "ready": self.ready,
+            "path": self.path,
+            "tables": self.synced,
+        }
+
+    # ---------------------------------------------------------------------------#
+    #                                   Queries                                  #
+    # ---------------------------------------------------------------------------#
+
+    def column_types(self, resource: str) -> Dict[str, str]:
+        """SQLite type of each column a tool can filter and sort on"""
+        table = TABLES[resource]
+        return {**table.columns, **table.joined}
+
+    def columns_for(self, resource: str) -> List[str]:
+        """Columns a tool can filter and sort on"""
+        return list(self.column_types(resource))
+
+    def _where(self, resource: str, filters: List[str]) -> Tuple[str, List[Any]]:
+        """Translate 'column op value' filters into a parameterized WHERE clause"""
+        types = self.column_types(resource)
+        timestamps = TABLES[resource].timestamps
+        clauses, params = [], []
+        for expression in filters:
+            match = FILTER_RE.match(expression)
+            if not match:
+                raise ValueError(f"Invalid filter: {expression!r} (expected 'column op value')")
+            column, op, raw = match.group(1), match.group(2).lower(), match.group(3)
+            if column not in types:
+                raise ValueError(f"Unknown column '{column}' for {resource}. Columns: {', '.join(sorted(types))}")
+
+            if op == "contains":
+                clauses.append(f"{column} LIKE ?")
+                # Always a text match, even on numeric columns
+                params.append("%" + raw.strip("'\"") + "%")
+                continue
+
+            value = _parse_value(column, types[column], raw)
+            if value is None:
+                clauses.append(f"{column} IS {'NOT ' if op == '!=' else ''}NULL")
+            elif column in timestamps and DATE_RE.fullmatch(value):
+                clause, values = _day_clause(column, op, value)
+                clauses.append(clause)
+                params.extend(values)
+            else:
+                clauses.append(f"{column} {SQL_OPERATORS[op]} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    async def query(
+        self,
+        resource: str,
+        filters: Optional[List[str]] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """Filter, sort and limit a mirrored resource; returns rows and the total match count"""
+        table = TABLES.get(resource)
+        if table is None:
+            raise ValueError(f"Unknown resource '{resource}'")
+        if sort_by and sort_by not in self.columns_for(resource):
+            raise ValueError(f"Unknown sort column '{sort_by}' for {resource}")
+
+        source = table.source or table.name
+        where, params = self._where(resource, filters or [])
+        order = f" ORDER BY {sort_by} {'DESC' if descending else 'ASC'}" if sort_by else ""
+        limit = max(1, min(limit, Config.ENTITY_STORE_MAX_RESULTS))
+
+        def run(db: sqlite3.Connection) -> Dict[str, Any]:
+            matched = db.execute(f"SELECT COUNT(*) FROM {source} AS t{where}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT * FROM {source} AS t{where}{order} LIMIT ?", [*params, limit]
+            ).fetchall()
+            return {
+                "rows": [
+                    {key: row[key] for key in row.keys() if key != "sync_key" and row[key] is not None}
+                    for row in rows
+                ],
+                "matched": matched,
+            }
+
+        return await asyncio.to_thread(self._execute, run)
+
+
+# Application-wide mirror used by the query tools
+entity_store = EntityStore()
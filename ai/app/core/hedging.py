@@ -0,0 +1,294 @@
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, TypeVar
+import asyncio
+import logging
+import random
+import threading
+import time
+import httpx
+from app.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Recent successful latencies per (model, streaming) used to pick the hedge delay
+_latencies: Dict[str, Deque[float]] = {}
+
+# Client errors worth another attempt; any other 4xx fails the same way every time
+RETRYABLE_CLIENT_STATUSES = (408, 429)
+
+
+class HedgingStats:
+    """Counters for hedged, retried and fallback LLM attempts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+
+    def add(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            _latencies.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **{
+                    name: self.counters.get(name, 0)
+                    for name in (
+                        "calls", "hedges", "hedge_wins", "retries", "fallbacks",
+                        "failures", "budget_exhausted", "client_errors",
+                    )
+                },
+                "hedge_delays": {key: _hedge_delay(key) for key in list(_latencies)},
+            }
+
+
+# Application-wide hedging statistics
+hedging_stats = HedgingStats()
+
+
+def _model_name(model: BaseChatModel) -> str:
+    return str(getattr(model, "model", None) or getattr(model, "model_name", None) or type(model).__name__)
+
+
+def _hedge_delay(key: str) -> float:
+    """
+    Seconds to wait before firing a second attempt.
+
+    LLM_HEDGE_PERCENTILE of recent latencies once LLM_HEDGE_MIN_SAMPLES are
+    known, LLM_HEDGE_DELAY before that, never below LLM_HEDGE_MIN_DELAY.
+    """
+    samples = sorted(_latencies.get(key, ()))
+    if len(samples) < Config.LLM_HEDGE_MIN_SAMPLES:
+        return Config.LLM_HEDGE_DELAY
+    percentile = samples[min(len(samples) - 1, int(Config.LLM_HEDGE_PERCENTILE * len(samples)))]
+    return max(percentile, Config.LLM_HEDGE_MIN_DELAY)
+
+
+def _record_latency(key: str, seconds: float) -> None:
+    _latencies.setdefault(key, deque(maxlen=200)).append(seconds)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status behind an error or anything it was raised from, if known"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        for code in (getattr(error, "code", None), getattr(error, "status_code", None),
+                     getattr(response, "status_code", None)):
+            if isinstance(code, int) and 100 <= code < 600:
+                return code
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """
+    Whether another attempt could succeed.
+
+    Timeouts, connection failures, rate limits and 5xx responses are
+    transient; invalid requests, bad credentials, safety blocks and any
+    other error would fail again on a hedge, retry or fallback.
+    """
+    if isinstance(error, (TimeoutError, httpx.TransportError)):
+        return True
+    code = _status_code(error)
+    return code is not None and (code >= 500 or code in RETRYABLE_CLIENT_STATUSES)
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Chat model wrapper that bounds tail latency.
+
+    Each attempt is hedged: if the model has not answered (or, when
+    streaming, sent its first chunk) within the hedge delay, a second
+    identical request is fired and whichever finishes first wins; the other
+    is cancelled. Timeouts, rate limits and server errors are retried with
+    jittered exponential backoff on the fallback model, all within
+    LLM_TOTAL_BUDGET seconds. Client errors are raised straight away.
+    """
+
+    primary: BaseChatModel
+    fallback: Optional[BaseChatModel] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model": _model_name(self.primary),
+            "fallback_model": _model_name(self.fallback) if self.fallback else None,
+        }
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        # Tools are formatted by each wrapped model when it is called
+        return self.bind(hedged_tools=list(tools), hedged_tool_options=kwargs)
+
+    def _model_kwargs(self, model: BaseChatModel, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Call kwargs for one wrapped model, with any bound tools in its own format"""
+        kwargs = dict(kwargs)
+        tools = kwargs.pop("hedged_tools", None)
+        options = kwargs.pop("hedged_tool_options", None) or {}
+        if tools:
+            # Models following the usual pattern return self.bind(tools=...)
+            kwargs.update(getattr(model.bind_tools(tools, **options), "kwargs", {}))
+        return kwargs
+
+    async def _hedged(
+        self,
+        model: BaseChatModel,
+        run: Callable[[BaseChatModel], Awaitable[T]],
+        key: str,
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> T:
+        """Run one attempt on `model`, hedged with a second request after the hedge delay"""
+        started = time.monotonic()
+        tasks = [asyncio.create_task(run(model))]
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                timeout = None
+                if Config.LLM_HEDGE_ENABLED and len(tasks) == 1:
+                    timeout = max(0.0, _hedge_delay(key) - (time.monotonic() - started))
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Slower than usual: race a second request
+                    hedging_stats.add("hedges")
+                    hedge = asyncio.create_task(run(model))
+                    tasks.append(hedge)
+                    pending.add(hedge)
+                    continue
+
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is None:
+                    error = next(iter(done)).exception()
+                    if not _is_retryable(error):
+                        raise error
+                    # Wait for the other request, if one is still running
+                    continue
+
+                if winner is not tasks[0]:
+                    hedging_stats.add("hedge_wins")
+                _record_latency(key, time.monotonic() - started)
+                if discard:
+                    for task in done - {winner}:
+                        if task.exception() is None:
+                            await discard(task.result())
+                return winner.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error or RuntimeError("LLM attempt produced no result")
+
+    async def _call(
+        self,
+        run: Callable[[BaseChatModel], Awaitable[T]],
+        streaming: bool,
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> T:
+        """Run hedged attempts, retrying on the fallback model within the total budget"""
+        hedging_stats.add("calls")
+        deadline = time.monotonic() + Config.LLM_TOTAL_BUDGET
+        error: Optional[BaseException] = None
+
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            model = self.primary if attempt == 0 or self.fallback is None else self.fallback
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt > 0:
+                hedging_stats.add("retries")
+                if model is self.fallback:
+                    hedging_stats.add("fallbacks")
+
+            key = f"{_model_name(model)}{' (stream)' if streaming else ''}"
+            try:
+                return await asyncio.wait_for(self._hedged(model, run, key, discard), remaining)
+            except asyncio.TimeoutError as e:
+                error = e
+                logger.warning(f"LLM attempt {attempt + 1} on {_model_name(model)} ran out of budget")
+            except Exception as e:
+                if not _is_retryable(e):
+                    hedging_stats.add("client_errors")
+                    hedging_stats.add("failures")
+                    raise
+                error = e
+                logger.warning(f"LLM attempt {attempt + 1} on {_model_name(model)} failed: {e}")
+
+            # Full jitter exponential backoff, without overrunning the budget
+            backoff = random.uniform(0, Config.LLM_RETRY_BACKOFF * 2**attempt)
+            await asyncio.sleep(max(0.0, min(backoff, deadline - time.monotonic())))
+
+        hedging_stats.add("failures")
+        if isinstance(error, asyncio.TimeoutError) or error is None:
+            hedging_stats.add("budget_exhausted")
+            raise TimeoutError(f"LLM call did not finish within {Config.LLM_TOTAL_BUDGET}s")
+        raise error
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Hedging needs the event loop; sync callers get the primary model as is
+        return self.primary._generate(messages, stop=stop, **self._model_kwargs(self.primary, kwargs))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async def run(model: BaseChatModel) -> ChatResult:
+            return await model._agenerate(messages, stop=stop, **self._model_kwargs(model, kwargs))
+
+        return await self._call(run, streaming=False)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # Hedge and retry until the first chunk; after that the stream is committed
+        async def open_stream(model: BaseChatModel):
+            stream = model._astream(messages, stop=stop, **self._model_kwargs(model, kwargs))
+            try:
+                return await stream.__anext__(), stream
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        async def close_stream(opened) -> None:
+            await opened[1].aclose()
+
+        first, stream = await self._call(open_stream, streaming=True, discard=close_stream)
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
@@ -0,0 +1,145 @@
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from typing import List, Set, Tuple
+from datetime import datetime, timezone
+import asyncio
+import logging
+from app.config.config import Config
+from app.core.memory import SessionService, SESSION_ID_KEY
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant for a business database.
+Merge the existing summary with the new messages into one concise summary.
+Keep facts the user may refer back to: names, IDs, dates, figures and open questions.
+Reply with the summary only."""
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    """Cheap offline token estimate (about 4 characters per token)"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return len(content) // 4 + 4
+
+
+class HistoryWindow:
+    """
+    Decide which part of a session's history is replayed into the prompt.
+
+    The most recent turns are replayed verbatim, bounded by HISTORY_MAX_TURNS
+    and HISTORY_TOKEN_BUDGET. Older turns are folded into a rolling summary
+    that is persisted per session and refreshed in the background, so it is
+    not recomputed on every turn. Tool messages are never replayed.
+    """
+
+    def __init__(self, llm: BaseChatModel, session_service: SessionService):
+        self.llm = llm
+        self.session_service = session_service
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _replayable(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Drop tool results and tool-call-only AI messages"""
+        return [
+            message
+            for message in messages
+            if message.type in ("human", "ai")
+            and message.content
+            and not getattr(message, "tool_calls", None)
+        ]
+
+    def _window_start(self, messages: List[BaseMessage]) -> int:
+        """Index of the first message kept verbatim"""
+        max_messages = Config.HISTORY_MAX_TURNS * 2
+        budget = Config.HISTORY_TOKEN_BUDGET
+        start = len(messages)
+
+        for index in range(len(messages) - 1, -1, -1):
+            cost = estimate_tokens(messages[index])
+            if len(messages) - index > max_messages or cost > budget:
+                break
+            budget -= cost
+            start = index
+        return start
+
+    async def _load_summary(self, session_id: str, message_count: int) -> Tuple[str, int]:
+        """Get the stored summary and how many messages it covers"""
+        document = await self.session_service.summaries.find_one(
+            {SESSION_ID_KEY: session_id}
+        )
+        if not document or document.get("message_count", 0) > message_count:
+            # No summary yet, or the history was cleared since it was written
+            return "", 0
+        return document.get("summary", ""), document.get("message_count", 0)
+
+    async def load(
+        self, session_id: str, messages: List[BaseMessage]
+    ) -> Tuple[str, List[BaseMessage]]:
+        """Get the summary of older turns and the messages to replay verbatim"""
+        replay = self._replayable(messages)
+        start = self._window_start(replay)
+
+        if start == 0 or not Config.HISTORY_SUMMARY_ENABLED:
+            return "", replay[start:]
+
+        summary, covered = await self._load_summary(session_id, len(replay))
+
+        # Messages the summary does not cover yet stay verbatim until it catches up
+        return summary, replay[min(start, covered):]
+
+    def schedule_refresh(self, session_id: str) -> None:
+        """Refresh the session summary in the background if enough turns aged out"""
+        if not Config.HISTORY_SUMMARY_ENABLED or session_id in self._refreshing:
+            return
+
+        self._refreshing.add(session_id)
+        task = asyncio.create_task(self._refresh(session_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, session_id: str) -> None:
+        """Fold turns that left the verbatim window into the rolling summary"""
+        try:
+            chat_history = await self.session_service.get_or_create_session_history(session_id)
+            replay = self._replayable(await chat_history.aget_messages())
+            start = self._window_start(replay)
+            summary, covered = await self._load_summary(session_id, len(replay))
+
+            if start - covered < Config.HISTORY_SUMMARY_BATCH:
+                return
+
+            transcript = "\n".join(
+                f"{'User' if message.type == 'human' else 'Assistant'}: {message.content}"
+                for message in replay[covered:start]
+            )
+            result = await self.llm.ainvoke(
+                [
+                    SystemMessage(content=SUMMARY_PROMPT),
+                    HumanMessage(
+                        content=f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+                    ),
+                ]
+            )
+
+            content = result.content
+            if isinstance(content, list):
+                content = "".join(
+                    part.get("text", "") if isinstance(part, dict) else str(part)
+                    for part in content
+                )
+
+            await self.session_service.summaries.update_one(
+                {SESSION_ID_KEY: session_id},
+                {
+                    "$set": {
+                        "summary": content,
+                        "message_count": start,
+                        "updated_at": datetime.now(timezone.utc),
+                    }
+                },
+                upsert=True,
+            )
+            logger.info(f"Summarized {start - covered} messages for session {session_id}")
+        except Exception as e:
+            logger.error(f"Error refreshing history summary: {e}")
+        finally:
+            self._refreshing.discard(session_id)
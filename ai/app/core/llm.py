@@ -1,28 +1,245 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
-from app.config.config import Config
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.outputs import LLMResult
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
 import logging
+import re
+import threading
+import time
+from app.config.config import Config
+from app.core.cassette import cassette, wrap_llm
+from app.core.hedging import HedgedChatModel
 
 logger = logging.getLogger(__name__)
 
-def get_llm(model_name: str = "gemini-2.5-flash", temperature: float = 0.2):
+LIGHT = "light"
+STRONG = "strong"
+TIERS = (LIGHT, STRONG)
+
+# Builds a chat model for (model name, temperature); swapped out for fake models in tests
+LLMFactory = Callable[[str, float], BaseChatModel]
+
+GREETING_RE = re.compile(
+    r"^(hi|hello|hey|thanks|thank you|good (morning|afternoon|evening)|bye|ok(ay)?)\b"
+)
+# Questions that need several tool calls or reasoning over their results
+MULTI_STEP_RE = re.compile(
+    r"\b(and|also|then|compare|comparison|versus|vs|why|trend|growth|breakdown|"
+    r"per|each|group(ed)?|average|avg|ratio|percent(age)?|share|rank|analy[sz]e|"
+    r"forecast|predict|correlat\w*|over time|month over month|year over year)\b"
+)
+
+
+def tier_settings(tier: str) -> Tuple[str, float]:
+    """Model name and temperature configured for a tier"""
+    if tier == LIGHT:
+        return Config.LLM_MODEL_LIGHT, Config.LLM_TEMPERATURE_LIGHT
+    return Config.LLM_MODEL_STRONG, Config.LLM_TEMPERATURE_STRONG
+
+
+def _google_llm(model_name: str, temperature: float) -> BaseChatModel:
+    return ChatGoogleGenerativeAI(
+        model=model_name,
+        temperature=temperature,
+        google_api_key=Config.GOOGLE_API_KEY,
+        convert_system_message_to_human=True,
+        # A single attempt; HedgedChatModel retries within its own budget
+        max_retries=1,
+    )
+
+
+class LLMMetrics(BaseCallbackHandler):
+    """
+    Per-tier LLM call latency and token usage.
+
+    Attached to every model built by get_llm. The tier of a call comes from
+    the run's "model_tier" metadata, or from its model name when the caller
+    did not set one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # run id -> (tier, started)
+        self._running: Dict[UUID, Tuple[str, float]] = {}
+        self._tiers: Dict[str, Dict[str, Any]] = {}
+        self.turns: Dict[str, int] = {tier: 0 for tier in TIERS}
+
+    def _tier_stats(self, tier: str) -> Dict[str, Any]:
+        return self._tiers.setdefault(
+            tier,
+            {"calls": 0, "errors": 0, "latencies": [], "input_tokens": 0, "output_tokens": 0},
+        )
+
+    def _tier_of(self, metadata: Optional[Dict[str, Any]], invocation_params: Dict[str, Any]) -> str:
+        tier = (metadata or {}).get("model_tier")
+        if tier:
+            return tier
+        model = str(invocation_params.get("model") or invocation_params.get("model_name") or "")
+        for name in TIERS:
+            if model and model.removeprefix("models/") == tier_settings(name)[0]:
+                return name
+        return "default"
+
+    def count_turn(self, tier: str) -> None:
+        with self._lock:
+            self.turns[tier] = self.turns.get(tier, 0) + 1
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> None:
+        tier = self._tier_of(metadata, kwargs.get("invocation_params") or {})
+        with self._lock:
+            self._running[run_id] = (tier, time.monotonic())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started = self._running.pop(run_id, None)
+            if started is None:
+                return
+            tier, start = started
+            stats = self._tier_stats(tier)
+            stats["calls"] += 1
+            stats["latencies"].append(time.monotonic() - start)
+            # Keep a bounded window of recent latencies for the percentiles
+            del stats["latencies"][:-1000]
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    stats["input_tokens"] += usage.get("input_tokens", 0)
+                    stats["output_tokens"] += usage.get("output_tokens", 0)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started = self._running.pop(run_id, None)
+            if started is not None:
+                self._tier_stats(started[0])["errors"] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._running.clear()
+            self._tiers.clear()
+            self.turns = {tier: 0 for tier in TIERS}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier call counts, latency percentiles (seconds) and token totals"""
+        with self._lock:
+            tiers = {}
+            for tier, stats in self._tiers.items():
+                ordered = sorted(stats["latencies"])
+                tiers[tier] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "latency_p50": round(ordered[len(ordered) // 2], 3) if ordered else None,
+                    "latency_p95": round(ordered[int(0.95 * (len(ordered) - 1))], 3) if ordered else None,
+                    "input_tokens": stats["input_tokens"],
+                    "output_tokens": stats["output_tokens"],
+                }
+            return {"turns": dict(self.turns), "tiers": tiers}
+
+
+class TurnUsage(BaseCallbackHandler):
+    """LLM calls and tokens used by one turn, passed in the run config callbacks"""
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[Any], **kwargs: Any) -> None:
+        self.llm_calls += 1
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.input_tokens += usage.get("input_tokens", 0)
+                self.output_tokens += usage.get("output_tokens", 0)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "llm_calls": self.llm_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+# Application-wide LLM metrics
+llm_metrics = LLMMetrics()
+
+_factory: LLMFactory = _google_llm
+# (model name, temperature) -> instance
+_instances: Dict[Tuple[str, float], BaseChatModel] = {}
+
+
+def set_llm_factory(factory: Optional[LLMFactory] = None) -> None:
+    """Build models with `factory` from now on (None restores Gemini), dropping cached instances"""
+    global _factory
+    _factory = factory or _google_llm
+    _instances.clear()
+
+
+def get_llm(model_name: Optional[str] = None, temperature: Optional[float] = None) -> BaseChatModel:
     """
-    Get the configured LLM instance.
-    
+    Get the LLM instance for a model and temperature.
+
+    Instances are cached per (model, temperature), so every caller asking for
+    the same settings shares one client. Each is wrapped in HedgedChatModel,
+    which hedges slow calls and falls back to LLM_FALLBACK_MODEL on errors.
+    With a cassette active, calls are recorded or replayed (CASSETTE_MODE).
+
     Args:
-        model_name: Name of the model to use
-        temperature: Temperature for generation
-        
+        model_name: Name of the model to use (defaults to the strong tier model)
+        temperature: Temperature for generation (defaults to the strong tier temperature)
+
     Returns:
-        ChatGoogleGenerativeAI instance
+        Chat model instance
     """
-    try:
-        llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=temperature,
-            google_api_key=Config.GOOGLE_API_KEY,
-            convert_system_message_to_human=True
-        )
+    default_model, default_temperature = tier_settings(STRONG)
+    key = (model_name or default_model, default_temperature if temperature is None else temperature)
+    llm = _instances.get(key)
+    if llm is not None:
         return llm
+
+    def build(model_name: str, temperature: float) -> BaseChatModel:
+        # Replay serves recorded calls, so no real model is built
+        return wrap_llm(model_name, None if cassette.replaying else _factory(model_name, temperature))
+
+    try:
+        primary = build(*key)
+        fallback = None
+        if Config.LLM_FALLBACK_MODEL and Config.LLM_FALLBACK_MODEL != key[0]:
+            fallback = build(Config.LLM_FALLBACK_MODEL, key[1])
+        llm = HedgedChatModel(primary=primary, fallback=fallback)
     except Exception as e:
         logger.error(f"Failed to initialize LLM: {e}")
         raise
+    llm.callbacks = [llm_metrics]
+    _instances[key] = llm
+    return llm
+
+
+def get_tier_llm(tier: str) -> BaseChatModel:
+    """Get the LLM instance for a tier"""
+    return get_llm(*tier_settings(tier))
+
+
+def classify_tier(message: str) -> str:
+    """
+    Pick the model tier for a turn with a cheap rules-based check.
+
+    Greetings and short single lookups go to the light tier; long or
+    compound questions and analytics over several results go to the strong
+    tier. Always strong when tiering is disabled.
+    """
+    if not Config.LLM_TIERING_ENABLED:
+        return STRONG
+
+    text = " ".join(message.casefold().split())
+    if GREETING_RE.match(text) and len(text.split()) <= 6:
+        return LIGHT
+    if len(text.split()) > Config.LLM_LIGHT_MAX_WORDS or MULTI_STEP_RE.search(text):
+        return STRONG
+    return LIGHT
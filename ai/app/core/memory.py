@@ -1,75 +1,410 @@
-from langchain_mongodb.chat_message_histories import MongoDBChatMessageHistory
-from typing import List, Dict, Any, Optional
-import pymongo
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from typing import List, Dict, Any, AsyncIterator, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+import asyncio
+import base64
 import json
 import logging
 from app.config.config import Config
+from app.core.mongo import get_mongo_client
+from app.utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Same field names as langchain_mongodb's MongoDBChatMessageHistory, so the
+# stored documents stay compatible with it
+SESSION_ID_KEY = "SessionId"
+HISTORY_KEY = "History"
+
+PREVIEW_LENGTH = 50
+
+# Fields that can be requested for each message in the history endpoints
+MESSAGE_FIELDS = ("id", "type", "content", "timestamp")
+
+
+def _preview(content: Any) -> str:
+    """Build the short preview shown in the session list"""
+    return str(content)[:PREVIEW_LENGTH] + "..."
+
+
+def _as_utc(value: datetime) -> datetime:
+    """MongoDB returns naive UTC datetimes; make them timezone-aware"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _parse_message_id(value: str) -> ObjectId:
+    """Parse a message id used as a history cursor"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise ValueError(f"Invalid message id: {value}")
+
+
+def _message_fields(document: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Pick the requested fields from a stored history document"""
+    message = json.loads(document[HISTORY_KEY]) if HISTORY_KEY in document else {}
+    data = message.get("data", {})
+    values = {
+        "id": str(document["_id"]),
+        "type": message.get("type"),
+        "content": data.get("content"),
+        "timestamp": data.get("additional_kwargs", {}).get("timestamp"),
+    }
+    return {field: values[field] for field in fields}
+
+
+def _count_type(message_type: str) -> Dict[str, Any]:
+    """Aggregation expression: 1 if the stored message has this type, else 0"""
+    # History holds json.dumps(message_to_dict(...)), which always starts with the type
+    return {
+        "$cond": [
+            {
+                "$regexMatch": {
+                    "input": f"${HISTORY_KEY}",
+                    "regex": f'^\\{{"type": "{message_type}"',
+                }
+            },
+            1,
+            0,
+        ]
+    }
+
+
+def encode_session_cursor(updated_at: datetime, session_id: str) -> str:
+    """Encode the position after a session in the session list"""
+    millis = int(_as_utc(updated_at).timestamp() * 1000)
+    return base64.urlsafe_b64encode(f"{millis}|{session_id}".encode()).decode()
+
+
+def decode_session_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_session_cursor"""
+    try:
+        millis, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc), session_id
+    except Exception:
+        raise ValueError(f"Invalid session cursor: {cursor}")
+
+
+class AsyncMongoDBChatMessageHistory:
+    """
+    Awaitable chat message history stored in MongoDB (via motor).
+
+    Async only: it has no blocking `messages` / `add_messages` / `clear`, so
+    it is not a BaseChatMessageHistory and can't be handed to LangChain code
+    that would call them on the event loop.
+
+    With `max_cached_messages` > 0 and an `index_collection`, the messages
+    are also kept in memory once loaded, and new messages are written through
+    to MongoDB, so later turns don't re-read the whole history. Before the
+    cached copy is used its message count is checked against the session
+    index, so writes from other workers are picked up. Histories longer than
+    the cap are always read from MongoDB.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        session_id: str,
+        max_cached_messages: int = 0,
+        index_collection: Optional[AsyncIOMotorCollection] = None,
+    ):
+        self.collection = collection
+        self.session_id = session_id
+        self.index_collection = index_collection
+        self.max_cached_messages = max_cached_messages
+        self._messages: Optional[List[BaseMessage]] = None
+        # Session index message count the cached messages correspond to
+        self._indexed_count = 0
+
+    @property
+    def cached_message_count(self) -> int:
+        """Number of messages currently held in memory"""
+        return len(self._messages) if self._messages is not None else 0
+
+    @property
+    def _caching(self) -> bool:
+        return self.max_cached_messages > 0 and self.index_collection is not None
+
+    async def _index_count(self) -> int:
+        """Message count recorded in the session index (0 if the session has none)"""
+        document = await self.index_collection.find_one(
+            {SESSION_ID_KEY: self.session_id}, projection={"message_count": 1}
+        )
+        return document.get("message_count", 0) if document else 0
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        """Retrieve the messages from memory if still current, else from MongoDB"""
+        if self._messages is not None:
+            # Another worker may have written to the session since it was cached
+            if await self._index_count() == self._indexed_count:
+                return list(self._messages)
+            self._messages = None
+
+        # Read before the history, so a write in between shows up as a mismatch next time
+        indexed_count = await self._index_count() if self._caching else 0
+        cursor = self.collection.find(
+            {SESSION_ID_KEY: self.session_id}, sort=[("_id", 1)]
+        )
+        items = [json.loads(document[HISTORY_KEY]) async for document in cursor]
+        messages = messages_from_dict(items)
+
+        if self._caching and len(messages) <= self.max_cached_messages:
+            self._messages = list(messages)
+            self._indexed_count = indexed_count
+        return messages
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append the messages to the record in MongoDB and update the session index"""
+        if not messages:
+            return
+
+        writes = [
+            self.collection.insert_many(
+                [
+                    {
+                        SESSION_ID_KEY: self.session_id,
+                        HISTORY_KEY: json.dumps(message_to_dict(message)),
+                    }
+                    for message in messages
+                ]
+            )
+        ]
+        if self.index_collection is not None:
+            now = datetime.now(timezone.utc)
+            writes.append(
+                self.index_collection.find_one_and_update(
+                    {SESSION_ID_KEY: self.session_id},
+                    {
+                        "$setOnInsert": {"created_at": now},
+                        "$set": {
+                            "updated_at": now,
+                            "preview": _preview(messages[-1].content),
+                        },
+                        "$inc": {"message_count": len(messages)},
+                    },
+                    projection={"message_count": 1},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            )
+        results = await asyncio.gather(*writes)
+
+        if self._messages is not None:
+            # Only extend the cached copy if no other worker wrote in between
+            indexed_count = results[-1]["message_count"]
+            if (
+                indexed_count == self._indexed_count + len(messages)
+                and len(self._messages) + len(messages) <= self.max_cached_messages
+            ):
+                self._messages.extend(messages)
+                self._indexed_count = indexed_count
+            else:
+                self._messages = None
+
+    async def aclear(self) -> None:
+        """Clear session memory from MongoDB"""
+        await self.collection.delete_many({SESSION_ID_KEY: self.session_id})
+        if self.index_collection is not None:
+            await self.index_collection.delete_one({SESSION_ID_KEY: self.session_id})
+        self._messages = [] if self._caching else None
+        self._indexed_count = 0
+
+
 class SessionService:
     """Service to handle session history and statistics"""
 
-    def __init__(self):
-        self.session_histories: Dict[str, MongoDBChatMessageHistory] = {}
+    def __init__(self, client: Optional[AsyncIOMotorClient] = None):
+        # Shared process-wide client unless one is injected
+        self.client = client or get_mongo_client()
+        self.collection = self.client[Config.MONGODB_DATABASE][
+            Config.MONGODB_COLLECTION_CHAT_HISTORY
+        ]
+        # Rolling summaries of older turns, one document per session
+        self.summaries = self.client[Config.MONGODB_DATABASE][
+            Config.MONGODB_COLLECTION_SESSION_SUMMARY
+        ]
+        # One summary document per session, kept up to date on every write
+        self.session_index = self.client[Config.MONGODB_DATABASE][
+            Config.MONGODB_COLLECTION_SESSION_INDEX
+        ]
+        # Bounded LRU of session histories; idle sessions expire
+        self.session_histories = TTLCache(
+            max_entries=Config.SESSION_CACHE_MAX_ENTRIES, sliding=True
+        )
+        self._indexes_created = False
+
+    async def _ensure_indexes(self) -> None:
+        """Create the session id index once per service instead of per session"""
+        if not self._indexes_created:
+            await self.collection.create_index(SESSION_ID_KEY)
+            await self.summaries.create_index(SESSION_ID_KEY, unique=True)
+            await self.session_index.create_index(SESSION_ID_KEY, unique=True)
+            await self.session_index.create_index(
+                [("updated_at", DESCENDING), (SESSION_ID_KEY, DESCENDING)]
+            )
+            self._indexes_created = True
 
-    def get_or_create_session_history(
+    async def get_or_create_session_history(
         self, session_id: str
-    ) -> MongoDBChatMessageHistory:
+    ) -> AsyncMongoDBChatMessageHistory:
         """Get or create MongoDB chat message history for a session"""
-        if session_id not in self.session_histories:
-            self.session_histories[session_id] = MongoDBChatMessageHistory(
-                connection_string=Config.MONGODB_URL,
-                database_name=Config.MONGODB_DATABASE,
-                collection_name=Config.MONGODB_COLLECTION_CHAT_HISTORY,
+        await self._ensure_indexes()
+        history = self.session_histories.get(session_id)
+        if history is None:
+            history = AsyncMongoDBChatMessageHistory(
+                collection=self.collection,
                 session_id=session_id,
+                max_cached_messages=Config.SESSION_CACHE_MAX_MESSAGES,
+                index_collection=self.session_index,
             )
-        return self.session_histories[session_id]
+            self.session_histories.set(
+                session_id, history, ttl=Config.SESSION_CACHE_IDLE_TTL
+            )
+        return history
 
-    def get_session_history(self, session_id: str) -> List[Dict[str, Any]]:
-        """Get chat history for a session"""
-        try:
-            chat_history = self.get_or_create_session_history(session_id)
-            messages = []
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get session cache statistics"""
+        histories = self.session_histories.values()
+        return {
+            **self.session_histories.get_stats(),
+            "idle_ttl": Config.SESSION_CACHE_IDLE_TTL,
+            "cached_messages": sum(h.cached_message_count for h in histories),
+        }
 
-            for message in chat_history.messages:
-                messages.append(
-                    {
-                        "type": message.type,
-                        "content": message.content,
-                        "timestamp": getattr(message, "additional_kwargs", {}).get(
-                            "timestamp"
-                        ),
-                    }
+    async def iter_session_messages(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a session's messages in chronological order straight from MongoDB.
+
+        `before` / `after` are message ids used as cursors. With `limit` and no
+        `after`, the most recent messages (before `before`, if given) are
+        returned. `fields` selects from MESSAGE_FIELDS. Messages are read as
+        plain dicts and never turned into LangChain message objects.
+        """
+        fields = list(fields or MESSAGE_FIELDS)
+        unknown = set(fields) - set(MESSAGE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown message fields: {sorted(unknown)}")
+
+        query: Dict[str, Any] = {SESSION_ID_KEY: session_id}
+        id_range: Dict[str, ObjectId] = {}
+        if before:
+            id_range["$lt"] = _parse_message_id(before)
+        if after:
+            id_range["$gt"] = _parse_message_id(after)
+        if id_range:
+            query["_id"] = id_range
+
+        # Newest-first when paging back from the end, then restored to chronological order
+        newest_first = limit is not None and not after
+        projection = {"_id": 1}
+        if set(fields) - {"id"}:
+            projection[HISTORY_KEY] = 1
+
+        cursor = self.collection.find(
+            query,
+            projection=projection,
+            sort=[("_id", DESCENDING if newest_first else ASCENDING)],
+            limit=limit or 0,
+        )
+
+        if newest_first:
+            documents = await cursor.to_list(length=limit)
+            documents.reverse()
+            for document in documents:
+                yield _message_fields(document, fields)
+        else:
+            async for document in cursor:
+                yield _message_fields(document, fields)
+
+    async def get_session_history(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get a page of chat history for a session, with cursors for the next pages"""
+        try:
+            # Fetch one id past the page to know whether more messages exist
+            page_limit = limit + 1 if limit else None
+            requested = list(fields or MESSAGE_FIELDS)
+            messages = [
+                message
+                async for message in self.iter_session_messages(
+                    session_id,
+                    limit=page_limit,
+                    before=before,
+                    after=after,
+                    fields=list(dict.fromkeys(["id", *requested])),
                 )
+            ]
 
-            return messages
+            has_more = bool(limit) and len(messages) > limit
+            if has_more:
+                # The extra message is the oldest one when paging back, else the newest
+                messages = messages[1:] if not after else messages[:-1]
+
+            return {
+                "messages": [
+                    {key: message[key] for key in requested} for message in messages
+                ],
+                "has_more": has_more,
+                "before": messages[0]["id"] if messages else None,
+                "after": messages[-1]["id"] if messages else None,
+            }
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error getting session history: {e}")
-            return []
+            raise
 
-    def clear_session_history(self, session_id: str) -> bool:
+    async def clear_session_history(self, session_id: str) -> bool:
         """Clear chat history for a session"""
         try:
-            chat_history = self.get_or_create_session_history(session_id)
-            chat_history.clear()
+            chat_history = await self.get_or_create_session_history(session_id)
+            await chat_history.aclear()
+            await self.summaries.delete_one({SESSION_ID_KEY: session_id})
 
             # Remove from local cache
-            if session_id in self.session_histories:
-                del self.session_histories[session_id]
+            self.session_histories.pop(session_id)
 
             return True
         except Exception as e:
             logger.error(f"Error clearing session history: {e}")
             return False
 
-    def get_session_stats(self, session_id: str) -> Dict[str, Any]:
-        """Get session statistics"""
+    async def get_session_stats(self, session_id: str) -> Dict[str, Any]:
+        """Get session statistics, computed by MongoDB without loading the history"""
         try:
-            chat_history = self.get_or_create_session_history(session_id)
-            messages = chat_history.messages
+            pipeline = [
+                {"$match": {SESSION_ID_KEY: session_id}},
+                {"$sort": {"_id": ASCENDING}},
+                {
+                    "$group": {
+                        "_id": None,
+                        "message_count": {"$sum": 1},
+                        "user_messages": {"$sum": _count_type("human")},
+                        "ai_messages": {"$sum": _count_type("ai")},
+                        "first_message": {"$first": f"${HISTORY_KEY}"},
+                        "last_message": {"$last": f"${HISTORY_KEY}"},
+                    }
+                },
+            ]
+            results = await self.collection.aggregate(pipeline).to_list(length=1)
 
-            if not messages:
+            if not results or not results[0]["message_count"]:
                 return {
                     "session_id": session_id,
                     "message_count": 0,
@@ -77,73 +412,124 @@ class SessionService:
                     "ai_messages": 0,
                 }
 
-            user_messages = len([m for m in messages if m.type == "human"])
-            ai_messages = len([m for m in messages if m.type == "ai"])
-
+            stats = results[0]
             return {
                 "session_id": session_id,
-                "message_count": len(messages),
-                "user_messages": user_messages,
-                "ai_messages": ai_messages,
-                "first_message": messages[0].content if messages else None,
-                "last_message": messages[-1].content if messages else None,
+                "message_count": stats["message_count"],
+                "user_messages": stats["user_messages"],
+                "ai_messages": stats["ai_messages"],
+                "first_message": json.loads(stats["first_message"])["data"]["content"],
+                "last_message": json.loads(stats["last_message"])["data"]["content"],
             }
         except Exception as e:
             logger.error(f"Error getting session stats: {e}")
             return {"session_id": session_id, "message_count": 0}
 
-    def get_all_sessions(self) -> List[Dict[str, Any]]:
-        """Get list of all chat sessions with metadata"""
+    async def get_all_sessions(
+        self, limit: int = 50, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a page of chat sessions with metadata, most recently active first.
+
+        Reads the session index rather than the message collection. Pass the
+        returned `next_cursor` back as `cursor` to get the following page.
+        """
         try:
-            # Connect to MongoDB directly to query distinct session IDs
-            client = pymongo.MongoClient(Config.MONGODB_URL)
-            db = client[Config.MONGODB_DATABASE]
-            collection = db[Config.MONGODB_COLLECTION_CHAT_HISTORY]
-            
-            # Create a temporary instance to get the key names
-            temp_history = MongoDBChatMessageHistory(
-                connection_string=Config.MONGODB_URL,
-                database_name=Config.MONGODB_DATABASE,
-                collection_name=Config.MONGODB_COLLECTION_CHAT_HISTORY,
-                session_id="temp"
-            )
-            
-            # Get distinct session IDs
-            session_ids = collection.distinct(temp_history.session_id_key)
-            
-            # For each session, get the first and last message to show preview and timestamp
-            sessions = []
-            for session_id in session_ids:
-                # Get first message timestamp (creation time)
-                first_message = collection.find_one(
-                    {temp_history.session_id_key: session_id},
-                    sort=[("_id", 1)]
-                )
-                
-                # Get last message for preview
-                last_message = collection.find_one(
-                    {temp_history.session_id_key: session_id},
-                    sort=[("_id", -1)]
-                )
-                
-                if first_message and last_message:
-                    # Parse the message content
-                    last_message_content = json.loads(last_message[temp_history.history_key])
-                    
-                    sessions.append({
-                        "session_id": session_id,
-                        "created_at": first_message.get("_id").generation_time,
-                        "updated_at": last_message.get("_id").generation_time,
-                        "preview": last_message_content.get("data", {}).get("content", "")[:50] + "...",
-                        "message_count": collection.count_documents({
-                            temp_history.session_id_key: session_id
-                        })
-                    })
-            
-            # Sort by most recent activity
-            sessions.sort(key=lambda x: x["updated_at"], reverse=True)
-            return sessions
-            
+            await self._ensure_indexes()
+
+            query: Dict[str, Any] = {}
+            if cursor:
+                updated_at, session_id = decode_session_cursor(cursor)
+                query = {
+                    "$or": [
+                        {"updated_at": {"$lt": updated_at}},
+                        {"updated_at": updated_at, SESSION_ID_KEY: {"$lt": session_id}},
+                    ]
+                }
+
+            documents = await self.session_index.find(
+                query,
+                projection={"_id": 0},
+                sort=[("updated_at", DESCENDING), (SESSION_ID_KEY, DESCENDING)],
+                limit=limit + 1,
+            ).to_list(length=limit + 1)
+
+            sessions = [
+                {
+                    "session_id": document[SESSION_ID_KEY],
+                    "created_at": _as_utc(document["created_at"]),
+                    "updated_at": _as_utc(document["updated_at"]),
+                    "preview": document.get("preview", ""),
+                    "message_count": document.get("message_count", 0),
+                }
+                for document in documents[:limit]
+            ]
+
+            next_cursor = None
+            if len(documents) > limit:
+                last = sessions[-1]
+                next_cursor = encode_session_cursor(last["updated_at"], last["session_id"])
+
+            return {"sessions": sessions, "next_cursor": next_cursor}
+
         except Exception as e:
             logger.error(f"Error getting sessions: {e}")
             raise
+
+    async def rebuild_session_index(self, batch_size: int = 1000) -> int:
+        """
+        Rebuild the session index from the message collection.
+
+        Only needed once for histories written before the index existed.
+        Returns the number of sessions indexed.
+        """
+        await self._ensure_indexes()
+
+        pipeline = [
+            {"$sort": {"_id": ASCENDING}},
+            {
+                "$group": {
+                    "_id": f"${SESSION_ID_KEY}",
+                    "first_id": {"$first": "$_id"},
+                    "last_id": {"$last": "$_id"},
+                    "last_history": {"$last": f"${HISTORY_KEY}"},
+                    "message_count": {"$sum": 1},
+                }
+            },
+        ]
+
+        indexed = 0
+        operations = []
+        async for group in self.collection.aggregate(pipeline, allowDiskUse=True):
+            last_message = json.loads(group["last_history"])
+            operations.append(
+                UpdateOne(
+                    {SESSION_ID_KEY: group["_id"]},
+                    {
+                        "$set": {
+                            "created_at": group["first_id"].generation_time,
+                            "updated_at": group["last_id"].generation_time,
+                            "preview": _preview(last_message.get("data", {}).get("content", "")),
+                            "message_count": group["message_count"],
+                        }
+                    },
+                    upsert=True,
+                )
+            )
+            if len(operations) >= batch_size:
+                await self.session_index.bulk_write(operations, ordered=False)
+                indexed += len(operations)
+                operations = []
+
+        if operations:
+            await self.session_index.bulk_write(operations, ordered=False)
+            indexed += len(operations)
+
+        logger.info(f"Rebuilt session index for {indexed} sessions")
+        return indexed
+
+    async def init_session_index(self) -> None:
+        """Backfill the session index on first start if it is empty"""
+        await self._ensure_indexes()
+        if await self.session_index.estimated_document_count() == 0:
+            await self.rebuild_session_index()
@@ -0,0 +1,45 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from typing import Optional
+import logging
+from app.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client shared by every session history and session query
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def _build_client() -> AsyncIOMotorClient:
+    """Build the pooled MongoDB client"""
+    logger.info(
+        f"MongoDB client initialized (max_pool_size={Config.MONGODB_MAX_POOL_SIZE})"
+    )
+    return AsyncIOMotorClient(
+        Config.MONGODB_URL,
+        maxPoolSize=Config.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=Config.MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=Config.MONGODB_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=Config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    )
+
+
+def init_mongo_client() -> AsyncIOMotorClient:
+    """Create the shared MongoDB client (called from the FastAPI lifespan)"""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+def get_mongo_client() -> AsyncIOMotorClient:
+    """Get the shared MongoDB client, creating it lazily outside the app lifespan"""
+    return init_mongo_client()
+
+
+def close_mongo_client() -> None:
+    """Close the shared MongoDB client and its connection pool"""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+        logger.info("MongoDB client closed")
@@ -0,0 +1,174 @@
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import logging
+import re
+from app.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Planner reply meaning the question needs the step-by-step agent
+REACT_MARKER = "NEEDS_STEPS"
+# Synthesis reply meaning the planned results cannot answer the question
+INCOMPLETE_MARKER = "INCOMPLETE"
+
+PLAN_INSTRUCTIONS = f"""
+PLANNING MODE:
+Call every tool needed to answer the question now, all in this single reply; they run in parallel.
+Only plan calls whose arguments you already know. If a call needs a value from another call's
+result (for example an ID you do not have yet), reply with exactly {REACT_MARKER} and no tool calls.
+If no tool is needed, answer directly."""
+
+SYNTHESIS_INSTRUCTIONS = f"""
+Answer the user's question using the tool results below.
+If they are not enough to answer it, reply with exactly {INCOMPLETE_MARKER}."""
+
+# Argument values the model uses when it guesses at results it has not seen
+PLACEHOLDER_RE = re.compile(r"<[^>]*>|\{\{|\bplaceholder\b|\bfrom (?:the )?previous\b|\bresult of\b", re.IGNORECASE)
+
+
+def _text(content: Any) -> str:
+    """Text content of a model reply, which may come as a list of parts"""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+class PlanExecutor:
+    """
+    Plan-then-execute alternative to the ReAct loop.
+
+    One LLM call plans every tool call the question needs, the calls run
+    concurrently, and one more LLM call writes the answer from their
+    results: two LLM calls instead of one per step. Returns None whenever
+    the plan cannot answer the question on its own (dependent calls,
+    placeholder arguments, unknown tools, too many calls, or a synthesis
+    that reports missing data), so the caller can fall back to ReAct.
+    """
+
+    def __init__(self, tools: List[BaseTool], models: Dict[str, BaseChatModel]):
+        self.tools = {tool.name: tool for tool in tools}
+        self.planners = {tier: llm.bind_tools(tools) for tier, llm in models.items()}
+        self.models = models
+
+    def _messages(
+        self, system_prompt: str, chat_history: List[BaseMessage], message: str, instructions: str
+    ) -> List[BaseMessage]:
+        return [SystemMessage(content=system_prompt + instructions), *chat_history, HumanMessage(content=message)]
+
+    async def plan(
+        self,
+        message: str,
+        system_prompt: str,
+        chat_history: List[BaseMessage],
+        model_tier: str,
+        config: Optional[RunnableConfig] = None,
+    ) -> Optional[AIMessage]:
+        """Get the planned tool calls (or a direct answer), or None to use ReAct"""
+        reply = await self.planners[model_tier].ainvoke(
+            self._messages(system_prompt, chat_history, message, PLAN_INSTRUCTIONS), config=config
+        )
+        text = _text(reply.content)
+        calls = reply.tool_calls
+
+        if REACT_MARKER in text:
+            reason = "dependent calls"
+        elif not calls and not text.strip():
+            reason = "empty plan"
+        elif len(calls) > Config.PLAN_MAX_TOOL_CALLS:
+            reason = f"{len(calls)} tool calls"
+        elif any(call["name"] not in self.tools for call in calls):
+            reason = "unknown tool"
+        elif any(PLACEHOLDER_RE.search(json.dumps(call["args"], default=str)) for call in calls):
+            reason = "placeholder arguments"
+        else:
+            return reply
+
+        logger.info(f"Plan not usable ({reason}), falling back to ReAct")
+        return None
+
+    async def execute(
+        self, plan: AIMessage, config: Optional[RunnableConfig] = None
+    ) -> List[Dict[str, Any]]:
+        """Run every planned tool call concurrently"""
+        outputs = await asyncio.gather(
+            *(self.tools[call["name"]].ainvoke(call["args"], config=config) for call in plan.tool_calls)
+        )
+        return [
+            {"tool": call["name"], "args": call["args"], "output": output}
+            for call, output in zip(plan.tool_calls, outputs)
+        ]
+
+    def synthesis_messages(
+        self,
+        message: str,
+        system_prompt: str,
+        chat_history: List[BaseMessage],
+        results: List[Dict[str, Any]],
+    ) -> List[BaseMessage]:
+        """Prompt for the single call that writes the answer from the tool results"""
+        rendered = "\n\n".join(
+            f"{result['tool']}({json.dumps(result['args'], default=str)}):\n"
+            f"{json.dumps(result['output'], default=str)}"
+            for result in results
+        )
+        return self._messages(
+            system_prompt, chat_history, message, f"{SYNTHESIS_INSTRUCTIONS}\n\nTool results:\n{rendered}"
+        )
+
+    async def run(
+        self,
+        message: str,
+        system_prompt: str,
+        chat_history: List[BaseMessage],
+        model_tier: str,
+        config: Optional[RunnableConfig] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Plan, execute and synthesize; None means fall back to ReAct"""
+        plan = await self.plan(message, system_prompt, chat_history, model_tier, config)
+        if plan is None:
+            return None
+        if not plan.tool_calls:
+            return {"output": _text(plan.content), "tool_calls": []}
+
+        results = await self.execute(plan, config)
+        reply = await self.models[model_tier].ainvoke(
+            self.synthesis_messages(message, system_prompt, chat_history, results), config=config
+        )
+        output = _text(reply.content)
+        if output.strip().startswith(INCOMPLETE_MARKER):
+            logger.info("Planned results were not enough, falling back to ReAct")
+            return None
+        return {"output": output, "tool_calls": [result["tool"] for result in results]}
+
+    async def stream_synthesis(
+        self, messages: List[BaseMessage], model_tier: str, config: Optional[RunnableConfig] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the synthesis reply as text.
+
+        Holds back the start of the reply until it cannot be the INCOMPLETE
+        marker; if it is, nothing is yielded and the stream ends with
+        LookupError so the caller can fall back to ReAct.
+        """
+        held: Optional[str] = ""
+        async for chunk in self.models[model_tier].astream(messages, config=config):
+            text = _text(chunk.content)
+            if held is None:
+                if text:
+                    yield text
+                continue
+            held += text
+            if len(held.lstrip()) >= len(INCOMPLETE_MARKER):
+                if held.lstrip().startswith(INCOMPLETE_MARKER):
+                    raise LookupError("Planned results were not enough")
+                yield held
+                held = None
+        if held is not None:
+            if held.strip().startswith(INCOMPLETE_MARKER) or not held.strip():
+                raise LookupError("Planned results were not enough")
+            yield held
@@ -0,0 +1,402 @@
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.tools import BaseTool
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+import re
+from app.config.config import Config
+from app.tools.analytics import resolve_period
+
+logger = logging.getLogger(__name__)
+
+GREETINGS = {"hello", "hi", "hey", "good morning", "good afternoon", "good evening"}
+GREETING_RESPONSE = "Hello! How can I help you today?"
+
+ISO_DATE = r"\d{4}-\d{2}-\d{2}"
+DATE_RANGE_RE = re.compile(rf"(?:between|from)\s+({ISO_DATE})\s+(?:and|to|-)\s+({ISO_DATE})")
+DATE_RE = re.compile(ISO_DATE)
+# A single date with an open-ended bound: "since 2025-01-01", "before 2025-02-01"
+START_BOUND_RE = re.compile(rf"\b(since|after|from|starting(?:\s+from)?)\s+({ISO_DATE})")
+END_BOUND_RE = re.compile(rf"\b(before|until|till|up\s+to|through)\s+({ISO_DATE})")
+# Other range words around a single date are left to the agent
+RANGE_WORD_RE = re.compile(
+    r"\b(between|to|thru|within|during|around|prior|later|earlier|past|week|month|year|days)\b"
+)
+# Start of the open-ended range for "before"/"until", as in resolve_period("all_time")
+EARLIEST_DATE = "2000-01-01"
+
+# Named periods understood by resolve_period, most specific first
+PERIOD_PATTERNS = [
+    (re.compile(r"\ball[\s-]*time\b|\bever\b"), "all_time"),
+    (re.compile(r"\btoday\b"), "today"),
+    (re.compile(r"\bthis week\b"), "this_week"),
+    (re.compile(r"\bthis month\b"), "this_month"),
+    (re.compile(r"\b(?:last|previous)\s+month\b"), "last_month"),
+    (re.compile(r"\b(?:last|past)\s+30\s+days\b"), "last_30_days"),
+]
+
+# Words that usually mean the question asks for more than one lookup
+MULTI_INTENT_RE = re.compile(r"\b(and|also|then|compare|versus|vs|why|but|except|each|per)\b")
+
+# Entities that narrow a question down; the templates below can't filter by them
+QUALIFIER_NOUN_RE = re.compile(
+    r"\b(customers?|clients?|products?|items?|categor(?:y|ies)|warehouses?|branch(?:es)?|"
+    r"cit(?:y|ies)|provinces?|employees?|staff|suppliers?|brands?|inventory|transactions?|"
+    r"invoices?|orders?)\b"
+)
+# Record codes such as CUS-00012 or PRD-3
+QUALIFIER_CODE_RE = re.compile(r"\b[a-z]{2,4}-\d+\b")
+# "for Bangkok", "in electronics", "by revenue"; time phrases and numbers are fine
+QUALIFIER_PHRASE_RE = re.compile(
+    r"\b(?:for|in|at|by|from|with)\s+"
+    r"(?!(?:the|this|last|past|previous|today|all|a|an|each|every|our|my|total|stock|units?|quantity|"
+    r"fewer|less|more|most|least|no|zero|pending|unpaid|outstanding|overdue)\b)"
+    r"(?!\d)[a-z]"
+)
+
+PENDING_RE = re.compile(
+    r"\b(pending|unpaid|outstanding|overdue)\b.*\bpayments?\b"
+    r"|\bpayments?\b.*\b(pending|unpaid|outstanding|overdue)\b"
+    r"|\bunpaid\s+(transactions|invoices|orders)\b"
+)
+LOW_STOCK_RE = re.compile(r"\blow[\s-]*stock\b|\brunning low\b|\bout of stock\b")
+THRESHOLD_RE = re.compile(
+    r"(below|under|less than|fewer than|at most|<=?|threshold(?:\s+of)?)\s*(\d+)"
+)
+# Comparators that exclude N itself; the backend's threshold is inclusive
+STRICT_THRESHOLDS = {"below", "under", "less than", "fewer than", "<"}
+# "top N" only counts when products or items follow it; "top 10 customers" goes to the agent
+TOP_PRODUCTS_RE = re.compile(
+    r"\btop\s+(?:\d+\s+)?(?:selling\s+)?(?:products?|items?)\b"
+    r"|\b(best[\s-]*selling|best[\s-]*sellers?|most\s+(?:sold|popular))\b.*\b(?:products?|items?)\b"
+)
+TOP_LIMIT_RE = re.compile(r"\btop\s+(\d+)\b|\b(\d+)\s+(?:top|best)")
+SALES_RE = re.compile(r"\b(sales|revenue|income)\b")
+
+# Qualifier nouns each template already answers for ("which customers have pending payments")
+INTENT_NOUNS = {
+    "pending_payments": {"customer", "customers", "transaction", "transactions", "invoice", "invoices", "order", "orders"},
+    "low_stock": {"item", "items", "product", "products", "inventory"},
+    "top_products": {"product", "products", "item", "items"},
+    "sales_summary": {"transaction", "transactions"},
+}
+
+MAX_TABLE_ROWS = 20
+
+
+@dataclass
+class RouteMatch:
+    """A question mapped to a single tool call"""
+
+    intent: str
+    confidence: float
+    tool: Optional[str] = None
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+def _payload(result: Dict[str, Any]) -> Any:
+    """Unwrap the backend's response envelope from a fetch() result"""
+    data = result.get("data")
+    if isinstance(data, dict) and "data" in data:
+        return data["data"]
+    return data
+
+
+def _money(value: Any) -> str:
+    try:
+        return f"{float(value):,.2f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _table(headers: List[str], rows: List[List[Any]]) -> str:
+    """Render rows as a markdown table, capped at MAX_TABLE_ROWS"""
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "| " + " | ".join("---" for _ in headers) + " |",
+    ]
+    for row in rows[:MAX_TABLE_ROWS]:
+        lines.append("| " + " | ".join("" if v is None else str(v) for v in row) + " |")
+    if len(rows) > MAX_TABLE_ROWS:
+        lines.append(f"\n_…and {len(rows) - MAX_TABLE_ROWS} more._")
+    return "\n".join(lines)
+
+
+def _render_low_stock(match: RouteMatch, items: List[Dict[str, Any]]) -> str:
+    threshold = match.args["threshold"]
+    level = "out of stock" if threshold == 0 else f"at or below {threshold} units"
+    if not items:
+        return f"No active inventory items are {level}."
+    rows = [
+        [i.get("product_name"), i.get("product_code"), i.get("warehouse_name"), i.get("quantity")]
+        for i in items
+    ]
+    return (
+        f"Found **{len(items)}** inventory items {level}:\n\n"
+        + _table(["Product", "Code", "Warehouse", "Quantity"], rows)
+    )
+
+
+def _render_pending_payments(match: RouteMatch, transactions: List[Dict[str, Any]]) -> str:
+    if not transactions:
+        return "There are no transactions with pending payments."
+    total = sum(float(t.get("total_amount") or 0) for t in transactions)
+    rows = [
+        [
+            t.get("customer_name"),
+            t.get("customer_code"),
+            str(t.get("due_date") or "")[:10],
+            _money(t.get("total_amount")),
+            t.get("payment_method"),
+        ]
+        for t in transactions
+    ]
+    return (
+        f"There are **{len(transactions)}** transactions with pending payments, "
+        f"totalling **{_money(total)}**:\n\n"
+        + _table(["Customer", "Code", "Due date", "Amount", "Method"], rows)
+    )
+
+
+def _render_sales_summary(match: RouteMatch, summary: Dict[str, Any]) -> str:
+    return (
+        f"From {match.args['start_date']} to {match.args['end_date']}, total revenue was "
+        f"**{_money(summary.get('total_revenue', 0))}** from "
+        f"**{summary.get('transaction_count', 0)}** completed, paid transactions."
+    )
+
+
+def _render_top_products(match: RouteMatch, products: List[Dict[str, Any]]) -> str:
+    period = match.args["period"].replace("_", " ")
+    if not products:
+        return f"No products were sold in the selected period ({period})."
+    rows = [
+        [
+            rank,
+            p.get("product_name"),
+            p.get("product_code"),
+            p.get("category"),
+            p.get("total_quantity"),
+            _money(p.get("total_revenue")),
+        ]
+        for rank, p in enumerate(products, start=1)
+    ]
+    return (
+        f"Top {len(products)} selling products ({period}):\n\n"
+        + _table(["#", "Product", "Code", "Category", "Quantity", "Revenue"], rows)
+    )
+
+
+RENDERERS: Dict[str, Callable[[RouteMatch, Any], str]] = {
+    "low_stock": _render_low_stock,
+    "pending_payments": _render_pending_payments,
+    "sales_summary": _render_sales_summary,
+    "top_products": _render_top_products,
+}
+
+
+class IntentRouter:
+    """
+    Fast path for frequent, well-formed questions.
+
+    A rules-based classifier maps the question to one tool call with extracted
+    arguments. When its confidence clears ROUTER_CONFIDENCE_THRESHOLD the tool
+    runs directly and the answer is rendered from a template (or with one LLM
+    formatting call if ROUTER_LLM_FORMAT is set), skipping the agent's
+    planning round trips. Anything else returns None so the caller can fall
+    back to the full AgentExecutor.
+    """
+
+    def __init__(self, tools: List[BaseTool], llm: Optional[BaseChatModel] = None):
+        self.tools = {tool.name: tool for tool in tools}
+        self.llm = llm
+
+    def _confidence(self, text: str, base: float, intent: str) -> float:
+        """Lower the base confidence for long or compound questions, or ones the template can't narrow down"""
+        # Date ranges contain "and" without being a second question
+        text = DATE_RANGE_RE.sub("", text)
+        score = base
+        if MULTI_INTENT_RE.search(text):
+            score -= 0.4
+        if len(text.split()) > 15:
+            score -= 0.2
+        nouns = {noun for noun in QUALIFIER_NOUN_RE.findall(text)} - INTENT_NOUNS[intent]
+        if nouns or QUALIFIER_CODE_RE.search(text) or QUALIFIER_PHRASE_RE.search(text):
+            # e.g. "sales for customer X": a global answer would be wrong, not just less certain
+            score -= 0.5
+        return max(score, 0.0)
+
+    def _period(self, text: str) -> Optional[str]:
+        for pattern, period in PERIOD_PATTERNS:
+            if pattern.search(text):
+                return period
+        return None
+
+    def _date_bounds(self, text: str, dates: List[str]) -> Optional[Dict[str, str]]:
+        """Date range for a question with one explicit date, or None if it is unclear"""
+        if len(dates) != 1:
+            return None
+        start_match = START_BOUND_RE.search(text)
+        if start_match:
+            start = date.fromisoformat(start_match.group(2))
+            if start_match.group(1) == "after":
+                start += timedelta(days=1)
+            return {"start_date": start.isoformat(), "end_date": date.today().isoformat()}
+        end_match = END_BOUND_RE.search(text)
+        if end_match:
+            end = date.fromisoformat(end_match.group(2))
+            if end_match.group(1) == "before":
+                end -= timedelta(days=1)
+            return {"start_date": EARLIEST_DATE, "end_date": end.isoformat()}
+        if RANGE_WORD_RE.search(text):
+            return None
+        # A plain date ("sales on 2025-01-31") means that one day
+        return {"start_date": dates[0], "end_date": dates[0]}
+
+    def classify(self, message: str) -> Optional[RouteMatch]:
+        """Map a message to a single intent, or None if it is unclear"""
+        text = " ".join(message.casefold().split())
+        if not text:
+            return None
+
+        if text.rstrip("!.? ") in GREETINGS:
+            return RouteMatch(intent="greeting", confidence=1.0)
+
+        matches: List[RouteMatch] = []
+
+        if PENDING_RE.search(text):
+            matches.append(
+                RouteMatch(
+                    intent="pending_payments",
+                    confidence=self._confidence(text, 0.9, "pending_payments"),
+                    tool="get_pending_payments",
+                )
+            )
+
+        if LOW_STOCK_RE.search(text):
+            threshold_match = THRESHOLD_RE.search(text)
+            if threshold_match:
+                # The backend reads the threshold as "quantity <= threshold"
+                threshold = int(threshold_match.group(2))
+                if threshold_match.group(1) in STRICT_THRESHOLDS:
+                    threshold = max(threshold - 1, 0)
+            elif "out of stock" in text:
+                threshold = 0
+            else:
+                threshold = 10
+            matches.append(
+                RouteMatch(
+                    intent="low_stock",
+                    confidence=self._confidence(text, 0.9, "low_stock"),
+                    tool="get_low_stock_inventory",
+                    args={"threshold": threshold},
+                )
+            )
+
+        if TOP_PRODUCTS_RE.search(text):
+            limit_match = TOP_LIMIT_RE.search(text)
+            limit = int(next(g for g in limit_match.groups() if g)) if limit_match else 5
+            matches.append(
+                RouteMatch(
+                    intent="top_products",
+                    confidence=self._confidence(text, 0.85, "top_products"),
+                    tool="get_top_selling_products",
+                    args={"limit": limit, "period": self._period(text) or "last_30_days"},
+                )
+            )
+        elif SALES_RE.search(text):
+            range_match = DATE_RANGE_RE.search(text)
+            dates = DATE_RE.findall(text)
+            period = self._period(text)
+            args = None
+            if range_match:
+                args = {"start_date": range_match.group(1), "end_date": range_match.group(2)}
+                base = 0.9
+            elif dates:
+                # A single date with an unclear range word is left to the agent
+                args = self._date_bounds(text, dates)
+                base = 0.85
+            elif period:
+                start_date, end_date = resolve_period(period)
+                args = {"start_date": start_date, "end_date": end_date}
+                base = 0.85
+            if args:
+                matches.append(
+                    RouteMatch(
+                        intent="sales_summary",
+                        confidence=self._confidence(text, base, "sales_summary"),
+                        tool="get_sales_summary",
+                        args=args,
+                    )
+                )
+
+        # Several intents in one question need the agent to plan
+        if len(matches) != 1:
+            return None
+        return matches[0]
+
+    async def handle(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer the message on the fast path.
+
+        Returns a dict with "response", "tool_used", "args", "intent" and
+        "confidence", or None when the caller should fall back to the agent.
+        """
+        match = self.classify(message)
+        if not match or match.confidence < Config.ROUTER_CONFIDENCE_THRESHOLD:
+            return None
+
+        if match.intent == "greeting":
+            return {
+                "response": GREETING_RESPONSE,
+                "tool_used": None,
+                "args": {},
+                "intent": match.intent,
+                "confidence": match.confidence,
+            }
+
+        tool = self.tools.get(match.tool)
+        if tool is None:
+            return None
+
+        try:
+            result = await tool.ainvoke(match.args)
+            if not isinstance(result, dict) or not result.get("success"):
+                # Let the agent explain the failure and suggest alternatives
+                return None
+
+            payload = _payload(result)
+            if Config.ROUTER_LLM_FORMAT and self.llm is not None:
+                response = await self._format_with_llm(message, payload)
+            else:
+                response = RENDERERS[match.intent](match, payload)
+        except Exception as e:
+            logger.warning(f"Fast path failed for intent '{match.intent}', falling back: {e}")
+            return None
+
+        logger.info(f"Routed '{message}' to {match.tool} (confidence={match.confidence:.2f})")
+        return {
+            "response": response,
+            "tool_used": match.tool,
+            "args": match.args,
+            "intent": match.intent,
+            "confidence": match.confidence,
+        }
+
+    async def _format_with_llm(self, message: str, payload: Any) -> str:
+        """Phrase the answer with a single LLM call over the tool result"""
+        result = await self.llm.ainvoke(
+            [
+                SystemMessage(
+                    content="Answer the user's question using only the data provided. "
+                    "Be concise and use markdown tables for lists."
+                ),
+                HumanMessage(
+                    content=f"Question: {message}\n\nData:\n{json.dumps(payload, default=str)}"
+                ),
+            ]
+        )
+        return result.content if isinstance(result.content, str) else str(result.content)
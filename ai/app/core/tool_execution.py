@@ -0,0 +1,143 @@
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.tools import BaseTool, StructuredTool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import logging
+import time
+from app.config.config import Config
+from app.core.compaction import compact_tool_output
+
+logger = logging.getLogger(__name__)
+
+
+class TurnStats:
+    """Timing of the tool calls made during one agent turn"""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        # (tool name, start, end, outcome)
+        self.calls: List[Tuple[str, float, float, str]] = []
+        # Full tool results, before compaction
+        self.outputs: List[Dict[str, Any]] = []
+
+    def remaining(self) -> float:
+        """Seconds left before the turn deadline"""
+        return self.deadline - time.monotonic()
+
+    def record(self, name: str, start: float, end: float, outcome: str) -> None:
+        self.calls.append((name, start, end, outcome))
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Compare the sum of tool times with the wall time spent in tools.
+
+        Wall time is the union of the call intervals, so when calls from one
+        LLM step overlap it is lower than the sum.
+        """
+        total = sum((end - start for _, start, end, _ in self.calls), 0.0)
+
+        wall = 0.0
+        current_start, current_end = None, None
+        for _, start, end, _ in sorted(self.calls, key=lambda call: call[1]):
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    wall += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            wall += current_end - current_start
+
+        return {
+            "tool_calls": len(self.calls),
+            "tool_time_sum": round(total, 3),
+            "tool_time_wall": round(wall, 3),
+            "timeouts": sum(1 for call in self.calls if call[3] == "timeout"),
+            "errors": sum(1 for call in self.calls if call[3] == "error"),
+        }
+
+
+_current_turn: ContextVar[Optional[TurnStats]] = ContextVar("current_turn", default=None)
+
+
+@contextmanager
+def tool_turn(deadline: Optional[float] = None) -> Iterator[TurnStats]:
+    """Start a turn: tools called inside share its deadline and timing stats"""
+    stats = TurnStats(time.monotonic() + (deadline or Config.AGENT_TURN_DEADLINE))
+    token = _current_turn.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_turn.reset(token)
+
+
+def _tool_timeouts() -> Dict[str, float]:
+    """Parse TOOL_TIMEOUT_OVERRIDES ("tool_a=30,tool_b=5")"""
+    timeouts = {}
+    for item in Config.TOOL_TIMEOUT_OVERRIDES.split(","):
+        if "=" in item:
+            name, seconds = item.split("=", 1)
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+def as_agent_tool(tool: BaseTool, timeout: Optional[float] = None) -> BaseTool:
+    """
+    Wrap a tool for the agent so it never fails the run or floods the prompt.
+
+    The call is bounded by its own timeout and by what is left of the turn
+    deadline. Timeouts and exceptions come back to the model as an error
+    result, so the other calls from the same step still count. Successful
+    results are compacted before the model sees them; the full result is
+    kept on the turn and sent to traces as a "tool_output" event.
+    """
+    timeout = timeout or _tool_timeouts().get(tool.name, Config.TOOL_TIMEOUT)
+    # Call the tool's function directly so callbacks see a single tool run
+    call = getattr(tool, "coroutine", None) or (lambda **kwargs: tool.ainvoke(kwargs))
+
+    async def run(**kwargs: Any) -> Any:
+        turn = _current_turn.get()
+        limit = min(timeout, turn.remaining()) if turn else timeout
+        start = time.monotonic()
+        outcome = "ok"
+
+        try:
+            if limit <= 0:
+                outcome = "timeout"
+                return {
+                    "success": False,
+                    "error": "The time budget for this question ran out before this tool could run. "
+                    "Answer with the results you already have.",
+                }
+            output = await asyncio.wait_for(call(**kwargs), timeout=limit)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            logger.warning(f"Tool {tool.name} timed out after {limit:.1f}s")
+            return {"success": False, "error": f"Tool {tool.name} timed out after {limit:.1f}s"}
+        except Exception as e:
+            outcome = "error"
+            logger.error(f"Tool {tool.name} failed: {e}")
+            return {"success": False, "error": f"Tool {tool.name} failed: {str(e)}"}
+        finally:
+            if turn:
+                turn.record(tool.name, start, time.monotonic(), outcome)
+
+        if turn:
+            turn.outputs.append({"tool": tool.name, "args": kwargs, "output": output})
+        try:
+            await adispatch_custom_event("tool_output", {"tool": tool.name, "output": output})
+        except RuntimeError:
+            # Called outside of a traced run
+            pass
+        return compact_tool_output(tool.name, output)
+
+    return StructuredTool.from_function(
+        coroutine=run,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        # Bad arguments go back to the model instead of ending the run
+        handle_validation_error=True,
+    )
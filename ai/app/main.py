@@ -1,13 +1,29 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import uvicorn
 from contextlib import asynccontextmanager
 from app.schema.request import ChatRequest
 from app.schema.response import ChatResponse
 from app.core.agent import AIAgent
 from app.core.memory import SessionService
+from app.core.mongo import init_mongo_client, close_mongo_client
+from app.core.analytics_engine import analytics_engine
+from app.core.entity_store import entity_store
+from app.core.entity_index import entity_index
+from app.core.llm import llm_metrics, tier_settings, TIERS
+from app.core.hedging import hedging_stats
+from app.core.cassette import cassette
 from app.config.config import Config
+from app.utils.api import (
+    init_http_client,
+    close_http_client,
+    get_cache_stats,
+    invalidate_cache,
+)
+import json
 import logging
+from typing import Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,8 +39,23 @@ async def lifespan(app: FastAPI):
     global agent_instance, session_service
     try:
         logger.info("Initializing AI Agent with LangSmith tracing...")
-        session_service = SessionService()
-        agent_instance = AIAgent()
+        # Before any client or model is built, so they record or replay
+        cassette.start()
+        await init_http_client()
+        mongo_client = init_mongo_client()
+        session_service = SessionService(client=mongo_client)
+        agent_instance = AIAgent(session_service=session_service)
+        try:
+            await session_service.init_session_index()
+        except Exception as e:
+            logger.warning(f"Failed to initialize session index: {e}")
+        if Config.ANALYTICS_ENGINE_ENABLED:
+            analytics_engine.start()
+        if Config.ENTITY_STORE_ENABLED:
+            entity_store.start()
+        if Config.ENTITY_INDEX_ENABLED:
+            # Built in the background; resolve_entity reports it is warming up until then
+            entity_index.start()
 
         logger.info("AI Agent initialized successfully")
         logger.info(f"Loaded {len(agent_instance.tools)} tools:")
@@ -40,6 +71,14 @@ async def lifespan(app: FastAPI):
         raise
 
     yield
+
+    # Shutdown
+    await analytics_engine.stop()
+    await entity_store.stop()
+    await entity_index.stop()
+    await close_http_client()
+    close_mongo_client()
+    cassette.stop()
     logger.info("Application shutdown complete")
 
 
@@ -87,6 +126,14 @@ async def chat(request: ChatRequest):
                 "success": result["success"],
                 "error": result.get("error"),
                 "trace_url": result.get("trace_url"),
+                "routed_intent": result.get("routed_intent"),
+                "model_tier": result.get("model_tier"),
+                "agent_mode": result.get("agent_mode"),
+                "llm_usage": result.get("llm_usage"),
+                "cached": result.get("cached", False),
+                "cache_match": result.get("cache_match"),
+                "tool_timing": result.get("tool_timing"),
+                "tool_outputs": result.get("tool_outputs") if request.include_tool_outputs else None,
                 "langsmith_project": Config.LANGSMITH_PROJECT,
             },
         )
@@ -96,7 +143,32 @@ async def chat(request: ChatRequest):
         raise HTTPException(
             status_code=500, detail=f"Error processing message: {str(e)}"
         )
-        
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming chat endpoint (Server-Sent Events)"""
+    if not agent_instance:
+        raise HTTPException(status_code=500, detail="AI Agent not initialized")
+
+    async def event_stream():
+        async for event in agent_instance.stream_message(
+            message=request.message,
+            session_id=request.session_id,
+        ):
+            data = event["data"]
+            if event["event"] in ("end", "error"):
+                data = {**data, "langsmith_project": Config.LANGSMITH_PROJECT}
+            payload = json.dumps(data, default=str)
+            yield f"event: {event['event']}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/tools")
 async def list_tools():
     """List available tools"""
@@ -125,17 +197,23 @@ async def list_tools():
 # ---------------------------------------------------------------------------#
 
 @app.get("/sessions")
-async def list_sessions():
-    """Get list of all chat sessions"""
+async def list_sessions(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """Get a page of chat sessions, most recently active first"""
     if not session_service:
         raise HTTPException(status_code=500, detail="Session Service not initialized")
 
     try:
-        sessions = session_service.get_all_sessions()
+        page = await session_service.get_all_sessions(limit=limit, cursor=cursor)
         return {
-            "sessions": sessions,
-            "count": len(sessions)
+            "sessions": page["sessions"],
+            "count": len(page["sessions"]),
+            "next_cursor": page["next_cursor"],
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing sessions: {e}")
         raise HTTPException(
@@ -143,20 +221,57 @@ async def list_sessions():
         )
 
 @app.get("/sessions/{session_id}/history")
-async def get_session_history(session_id: str):
-    """Get conversation history for a session"""
+async def get_session_history(
+    session_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """
+    Get conversation history for a session.
+
+    `limit` with `before` / `after` (message ids) pages through the history,
+    `fields` is a comma-separated projection (id, type, content, timestamp),
+    and `format=ndjson` streams one message per line.
+    """
     if not session_service:
         raise HTTPException(status_code=500, detail="Session Service not initialized")
 
+    field_list = [field.strip() for field in fields.split(",")] if fields else None
+
     try:
-        history = session_service.get_session_history(session_id)
+        if format == "ndjson":
+            messages = session_service.iter_session_messages(
+                session_id, limit=limit, before=before, after=after, fields=field_list
+            )
+            # Surface bad cursors or fields as a 400 before the stream starts
+            first = await anext(messages, None)
+
+            async def ndjson_stream():
+                if first is not None:
+                    yield json.dumps(first, default=str) + "\n"
+                async for message in messages:
+                    yield json.dumps(message, default=str) + "\n"
+
+            return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+        history = await session_service.get_session_history(
+            session_id, limit=limit, before=before, after=after, fields=field_list
+        )
         return {
             "session_id": session_id,
-            "messages": history,
-            "message_count": len(history),
+            "messages": history["messages"],
+            "message_count": len(history["messages"]),
+            "has_more": history["has_more"],
+            "before": history["before"],
+            "after": history["after"],
             "storage_type": "langchain_mongodb",
         }
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting session history: {e}")
         raise HTTPException(
@@ -171,7 +286,7 @@ async def clear_session(session_id: str):
         raise HTTPException(status_code=500, detail="Session Service not initialized")
 
     try:
-        success = session_service.clear_session_history(session_id)
+        success = await session_service.clear_session_history(session_id)
         if success:
             return {"message": f"Session {session_id} cleared successfully"}
         else:
@@ -189,7 +304,7 @@ async def get_session_stats(session_id: str):
         raise HTTPException(status_code=500, detail="Session Service not initialized")
 
     try:
-        stats = session_service.get_session_stats(session_id)
+        stats = await session_service.get_session_stats(session_id)
         return stats
 
     except Exception as e:
@@ -224,5 +339,139 @@ async def get_project_url():
         raise HTTPException(status_code=404, detail="LangSmith project not configured")
 
 
+# ---------------------------------------------------------------------------#
+#                               Cache Endpoints                              #
+# ---------------------------------------------------------------------------#
+
+@app.get("/cache")
+async def get_cache_info():
+    """Get backend response cache, answer cache and session cache statistics"""
+    return {
+        "backend": get_cache_stats(),
+        "answers": agent_instance.answer_cache.get_stats() if agent_instance else None,
+        "sessions": session_service.get_cache_stats() if session_service else None,
+    }
+
+
+@app.delete("/cache")
+async def clear_cache(prefix: str = ""):
+    """
+    Invalidate cached backend responses by endpoint prefix.
+
+    Cached answers built from those endpoints go stale with them; with no
+    prefix every cached answer is dropped.
+    """
+    removed = invalidate_cache(prefix)
+    answers = agent_instance.answer_cache.clear() if agent_instance and not prefix else 0
+    return {
+        "message": f"Invalidated {removed} cached responses and {answers} cached answers",
+        "prefix": prefix,
+    }
+
+
+# ---------------------------------------------------------------------------#
+#                               Model Endpoints                              #
+# ---------------------------------------------------------------------------#
+
+@app.get("/llm")
+async def get_llm_info():
+    """Get the model tiers, their call latency and token statistics, hedging counters and cassette state"""
+    return {
+        "tiering_enabled": Config.LLM_TIERING_ENABLED,
+        "tiers": {
+            tier: dict(zip(("model", "temperature"), tier_settings(tier))) for tier in TIERS
+        },
+        "fallback_model": Config.LLM_FALLBACK_MODEL or None,
+        **llm_metrics.get_stats(),
+        "hedging": hedging_stats.get_stats(),
+        "cassette": cassette.get_stats(),
+    }
+
+
+# ---------------------------------------------------------------------------#
+#                           Analytics Engine Endpoints                       #
+# ---------------------------------------------------------------------------#
+
+@app.get("/analytics-engine")
+async def get_analytics_engine_info():
+    """Get local analytics snapshot statistics"""
+    return analytics_engine.get_stats()
+
+
+@app.post("/analytics-engine/refresh")
+async def refresh_analytics_engine():
+    """Refresh the local analytics snapshot now"""
+    if not Config.ANALYTICS_ENGINE_ENABLED:
+        raise HTTPException(status_code=400, detail="Analytics engine is not enabled")
+
+    try:
+        changed = await analytics_engine.refresh()
+        return {"changed": changed, **analytics_engine.get_stats()}
+    except Exception as e:
+        logger.error(f"Error refreshing analytics snapshot: {e}")
+        raise HTTPException(status_code=500, detail=f"Error refreshing snapshot: {str(e)}")
+
+
+@app.get("/analytics-engine/check")
+async def check_analytics_engine(
+    start_date: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end_date: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    limit: int = Query(5, ge=1, le=100),
+):
+    """Compare local analytics results with the backend for a date range"""
+    try:
+        return await analytics_engine.check_consistency(start_date, end_date, limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error checking analytics snapshot: {e}")
+        raise HTTPException(status_code=500, detail=f"Error checking snapshot: {str(e)}")
+
+
+# ---------------------------------------------------------------------------#
+#                             Entity Store Endpoints                         #
+# ---------------------------------------------------------------------------#
+
+@app.get("/entity-store")
+async def get_entity_store_info():
+    """Get local entity store sync statistics"""
+    return entity_store.get_stats()
+
+
+@app.post("/entity-store/sync")
+async def sync_entity_store():
+    """Sync the local entity store now"""
+    if not Config.ENTITY_STORE_ENABLED:
+        raise HTTPException(status_code=400, detail="Entity store is not enabled")
+
+    try:
+        changed = await entity_store.sync()
+        return {"changed": changed, **entity_store.get_stats()}
+    except Exception as e:
+        logger.error(f"Error syncing entity store: {e}")
+        raise HTTPException(status_code=500, detail=f"Error syncing entity store: {str(e)}")
+
+
+# ---------------------------------------------------------------------------#
+#                             Entity Index Endpoints                         #
+# ---------------------------------------------------------------------------#
+
+@app.get("/entity-index")
+async def get_entity_index_info():
+    """Get entity name index statistics"""
+    return entity_index.get_stats()
+
+
+@app.post("/entity-index/refresh")
+async def refresh_entity_index():
+    """Rebuild the entity name index now"""
+    try:
+        count = await entity_index.refresh()
+        return {"indexed": count, **entity_index.get_stats()}
+    except Exception as e:
+        logger.error(f"Error refreshing entity index: {e}")
+        raise HTTPException(status_code=500, detail=f"Error refreshing entity index: {str(e)}")
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=Config.PORT, reload=True)
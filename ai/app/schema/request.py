@@ -4,3 +4,5 @@ from typing import Optional
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
+    # Return the full (uncompacted) tool results in the response metadata
+    include_tool_outputs: bool = False
@@ -1,24 +1,40 @@
-from .customers import get_customer_list, get_customer_details
-from .products import get_product_list, get_product_details
+from app.config.config import Config
+from .customers import get_customer_list, get_customer_details, get_customer_details_batch
+from .products import get_product_list, get_product_details, get_product_details_batch
 from .inventory import get_inventory_list, get_inventory_details
-from .transactions import get_transaction_list, get_transaction_details
-from .analytics import get_sales_summary, get_top_selling_products, get_low_stock_inventory, get_pending_payments
+from .transactions import get_transaction_list, get_transaction_details, get_transaction_details_batch
+from .analytics import get_sales_summary, get_top_selling_products, get_low_stock_inventory, get_pending_payments, get_sales_breakdown
+from .reports import count_records, filter_records, group_records, query_records
+from .entities import resolve_entity
 
 def get_all_tools():
     """Get all available tools"""
-    return [
+    tools = [
         get_customer_list, 
         get_customer_details,
+        get_customer_details_batch,
         get_product_list, 
         get_product_details,
+        get_product_details_batch,
         get_inventory_list, 
         get_inventory_details,
         get_transaction_list, 
         get_transaction_details,
+        get_transaction_details_batch,
         get_sales_summary,
         get_top_selling_products,
         get_low_stock_inventory,
-        get_pending_payments
+        get_pending_payments,
+        count_records,
+        filter_records,
+        group_records
     ]
+    if Config.ENTITY_INDEX_ENABLED:
+        tools.insert(0, resolve_entity)
+    if Config.ANALYTICS_ENGINE_ENABLED:
+        tools.append(get_sales_breakdown)
+    if Config.ENTITY_STORE_ENABLED:
+        tools.append(query_records)
+    return tools
 
 __all__ = ["get_all_tools"]
@@ -1,8 +1,47 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from langchain_core.tools import tool
 from app.utils.api import fetch
+from app.core.analytics_engine import analytics_engine
 from datetime import datetime, timedelta
 
+def resolve_period(period: str) -> Tuple[str, str]:
+    """
+    Resolve a named period to a (start_date, end_date) pair in YYYY-MM-DD format.
+
+    Args:
+        period: One of 'today', 'this_week', 'this_month', 'last_month', 'last_30_days', 'all_time'.
+            'last_month' is the previous calendar month. Unknown periods default to the last 30 days.
+    """
+    today = datetime.now()
+    end_date = today.strftime("%Y-%m-%d")
+    start_date = ""
+
+    if period == "today":
+        start_date = end_date
+    elif period == "this_week":
+        # Start of the current week (Monday)
+        start = today - timedelta(days=today.weekday())
+        start_date = start.strftime("%Y-%m-%d")
+    elif period == "this_month":
+        start_date = today.replace(day=1).strftime("%Y-%m-%d")
+    elif period == "last_month":
+        # The whole previous calendar month, not the last 30 days
+        month_end = today.replace(day=1) - timedelta(days=1)
+        start_date = month_end.replace(day=1).strftime("%Y-%m-%d")
+        end_date = month_end.strftime("%Y-%m-%d")
+    elif period == "last_30_days":
+        start = today - timedelta(days=30)
+        start_date = start.strftime("%Y-%m-%d")
+    elif period == "all_time":
+         # Just use a very old date
+        start_date = "2000-01-01"
+    else:
+        # Default to last 30 days if unknown
+        start = today - timedelta(days=30)
+        start_date = start.strftime("%Y-%m-%d")
+
+    return start_date, end_date
+
 @tool
 async def get_sales_summary(
     start_date: str, 
@@ -15,6 +54,9 @@ async def get_sales_summary(
         start_date: The start date in YYYY-MM-DD format.
         end_date: The end date in YYYY-MM-DD format.
     """
+    if analytics_engine.ready:
+        return analytics_engine.sales_summary(start_date, end_date)
+
     params = {
         "start_date": start_date,
         "end_date": end_date
@@ -32,31 +74,13 @@ async def get_top_selling_products(
     
     Args:
         limit: The number of top products to retrieve (default: 5).
-        period: The time period to analyze. Options: 'today', 'this_week', 'this_month', 'last_30_days', 'all_time'.
+        period: The time period to analyze. Options: 'today', 'this_week', 'this_month', 'last_month', 'last_30_days', 'all_time'.
     """
     
-    today = datetime.now()
-    end_date = today.strftime("%Y-%m-%d")
-    start_date = ""
-    
-    if period == "today":
-        start_date = end_date
-    elif period == "this_week":
-        # Start of the current week (Monday)
-        start = today - timedelta(days=today.weekday())
-        start_date = start.strftime("%Y-%m-%d")
-    elif period == "this_month":
-        start_date = today.replace(day=1).strftime("%Y-%m-%d")
-    elif period == "last_30_days":
-        start = today - timedelta(days=30)
-        start_date = start.strftime("%Y-%m-%d")
-    elif period == "all_time":
-         # Just use a very old date
-        start_date = "2000-01-01"
-    else:
-        # Default to last 30 days if unknown
-        start = today - timedelta(days=30)
-        start_date = start.strftime("%Y-%m-%d")
+    start_date, end_date = resolve_period(period)
+
+    if analytics_engine.ready:
+        return analytics_engine.top_products(limit, start_date, end_date)
 
     params = {
         "limit": limit,
@@ -90,3 +114,37 @@ async def get_pending_payments() -> Dict[str, Any]:
     """
     response = await fetch("GET", "/analytics/pending-payments")
     return response
+
+@tool
+async def get_sales_breakdown(
+    group_by: str,
+    start_date: str,
+    end_date: str,
+    only_paid: bool = True
+) -> Dict[str, Any]:
+    """
+    Get revenue and counts grouped by day, week, month, status, payment_status, product or category for a date range.
+    
+    Args:
+        group_by: One of 'day', 'week', 'month', 'status', 'payment_status', 'product', 'category'.
+        start_date: The start date in YYYY-MM-DD format.
+        end_date: The end date in YYYY-MM-DD format.
+        only_paid: Only count completed, paid transactions like the sales summary (default: True).
+            Set to False when grouping by status or payment_status.
+    """
+    if not analytics_engine.ready:
+        return {
+            "success": False,
+            "error": "Sales breakdowns are not available yet, the analytics snapshot is still loading",
+            "endpoint_used": "/analytics/sales-breakdown",
+            "method": "GET",
+        }
+    try:
+        return analytics_engine.sales_breakdown(group_by, start_date, end_date, only_paid)
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "endpoint_used": "/analytics/sales-breakdown",
+            "method": "GET",
+        }
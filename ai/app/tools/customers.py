@@ -1,6 +1,6 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from langchain_core.tools import tool
-from app.utils.api import fetch
+from app.utils.api import fetch, fetch_by_ids
 
 @tool
 async def get_customer_list(
@@ -32,3 +32,15 @@ async def get_customer_details(id: str) -> Dict[str, Any]:
     """
     response = await fetch("GET", f"/customers/{id}")
     return response
+
+@tool
+async def get_customer_details_batch(ids: List[str]) -> Dict[str, Any]:
+    """
+    Get detailed information about several customers at once by their IDs (UUIDs).
+    Use this instead of calling get_customer_details repeatedly.
+    
+    Args:
+        ids: The list of customer UUIDs to retrieve. Duplicates are ignored.
+    """
+    response = await fetch_by_ids("/customers", ids)
+    return response
@@ -0,0 +1,43 @@
+from typing import Dict, Any, Optional, Literal
+from langchain_core.tools import tool
+from app.core.entity_index import entity_index
+import time
+
+@tool
+async def resolve_entity(
+    query: str,
+    entity_type: Optional[Literal["customer", "product"]] = None,
+    limit: int = 5
+) -> Dict[str, Any]:
+    """
+    Find the UUID of a customer or product from a name, partial name or code (typos are tolerated).
+    Use this before the detail tools when the user names a customer or product instead of giving its ID.
+    
+    Args:
+        query: The name or code to look up, e.g. 'John Smith', 'blue widget' or 'C-0012'.
+        entity_type: Optional 'customer' or 'product' to search only one kind of entity.
+        limit: The maximum number of candidates to return, best match first (default: 5).
+    """
+    if not entity_index.ready:
+        # Built and refreshed in the background, never inside a user's turn
+        return {
+            "success": False,
+            "error": "The name index is warming up. Use the list tools or filter_records to find the record instead.",
+            "endpoint_used": "entity_index",
+            "method": "LOCAL",
+        }
+    # Rebuild in the background if customers or products were written since the last build
+    entity_index.refresh_if_stale()
+
+    started = time.perf_counter()
+    candidates = entity_index.resolve(query, entity_type, limit)
+    return {
+        "success": True,
+        "data": {
+            "query": query,
+            "candidates": candidates,
+            "lookup_ms": round((time.perf_counter() - started) * 1000, 3),
+        },
+        "endpoint_used": "entity_index",
+        "method": "LOCAL",
+    }
@@ -0,0 +1,318 @@
+from typing import Dict, Any, Optional, List, Callable, Literal
+from langchain_core.tools import tool
+from app.utils.api import iter_pages, FetchError
+from app.core.entity_store import entity_store, TABLES
+import re
+
+Resource = Literal["customers", "products", "inventory", "transactions"]
+
+RESOURCE_ENDPOINTS = {
+    "customers": "/customers/list",
+    "products": "/products/list/page",
+    "inventory": "/inventories/list/page",
+    "transactions": "/transactions/list",
+}
+
+FILTER_RE = re.compile(r"^\s*([\w.]+)\s*(>=|<=|!=|=|>|<|\bcontains\b)\s*(.*?)\s*$", re.IGNORECASE)
+# Plain numbers only; a leading zero means a code or phone number, which compares as text
+NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?")
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ].*)?")
+
+COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+def _field(row: Dict[str, Any], path: str) -> Any:
+    """Get a field by dotted path (e.g. 'customer.city')"""
+    value: Any = row
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+def _number(value: Any) -> Optional[float]:
+    """The value as a number, or None if it is text (including codes like '0812')"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and NUMBER_RE.fullmatch(value.strip()):
+        return float(value)
+    return None
+
+def _compare(op: str, value: Any, raw: str) -> bool:
+    """
+    Compare a row value against a filter value, typed by the row value.
+
+    Numbers compare numerically, timestamps against a date-only value compare
+    by day (so '<= 2025-01-31' and '= 2025-01-31' include that whole day) and
+    everything else compares as case-insensitive text.
+    """
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        if raw.lower() not in ("true", "false"):
+            return False
+        return COMPARISONS[op](value, raw.lower() == "true")
+
+    actual, expected = _number(value), _number(raw)
+    if actual is not None and expected is not None:
+        return COMPARISONS[op](actual, expected)
+
+    text = str(value)
+    if DATE_RE.fullmatch(raw) and TIMESTAMP_RE.fullmatch(text):
+        # Compare the row's day with the filter's day
+        return COMPARISONS[op](text[:10], raw)
+    if op in ("=", "!="):
+        return COMPARISONS[op](text.casefold(), raw.casefold())
+    if actual is not None or expected is not None:
+        # A number against text has no order
+        return False
+    return COMPARISONS[op](text.casefold(), raw.casefold())
+
+def _parse_filter(expression: str) -> Callable[[Dict[str, Any]], bool]:
+    """Turn 'field op value' into a row predicate"""
+    match = FILTER_RE.match(expression)
+    if not match:
+        raise ValueError(f"Invalid filter: {expression!r} (expected 'field op value')")
+
+    path, op, raw = match.group(1), match.group(2).lower(), match.group(3).strip("'\"")
+
+    def predicate(row: Dict[str, Any]) -> bool:
+        value = _field(row, path)
+        if raw.lower() in ("null", "none"):
+            return (value is None) == (op == "=") if op in ("=", "!=") else False
+        if op == "contains":
+            return value is not None and raw.casefold() in str(value).casefold()
+        return _compare(op, value, raw)
+
+    return predicate
+
+async def _scan(
+    resource: str,
+    filters: Optional[List[str]],
+    visit: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Stream every row of a resource through the filters into `visit`.
+
+    Returns the number of rows matched and scanned, the total count reported
+    by the backend, and whether every row was scanned. Rows are counted once
+    by uuid, since concurrently fetched pages can overlap when the backend
+    list changes during the scan.
+    """
+    predicates = [_parse_filter(expression) for expression in filters or []]
+    matched, total = 0, 0
+    seen = set()
+    async for page in iter_pages(RESOURCE_ENDPOINTS[resource]):
+        total = page["count"]
+        for row in page["rows"]:
+            uuid = row.get("uuid")
+            if uuid in seen:
+                continue
+            seen.add(uuid)
+            if all(predicate(row) for predicate in predicates):
+                matched += 1
+                if visit:
+                    visit(row)
+    return {"matched": matched, "scanned": len(seen), "total": total, "complete": len(seen) == total}
+
+def _result(resource: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "data": data,
+        "endpoint_used": RESOURCE_ENDPOINTS[resource],
+        "method": "GET",
+    }
+
+def _error(resource: str, error: Exception) -> Dict[str, Any]:
+    message = str(error) if isinstance(error, (ValueError, FetchError)) else f"An error occurred: {error}"
+    return {
+        "success": False,
+        "error": message,
+        "endpoint_used": RESOURCE_ENDPOINTS.get(resource),
+        "method": "GET",
+    }
+
+@tool
+async def count_records(
+    resource: Resource,
+    filters: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Count ALL customers, products, inventory items or transactions matching the filters.
+    Pages through the whole list, so use this instead of paging with the list tools.
+
+    Args:
+        resource: Which records to count: 'customers', 'products', 'inventory' or 'transactions'.
+        filters: Optional list of conditions, all of which must match. Each is
+            'field op value' with op one of =, !=, >, >=, <, <=, contains.
+            Nested fields use dots. Examples: 'city = Bangkok', 'total_amount >= 1000',
+            'customer.customer_code = C001', 'payment_status != paid', 'sale_date >= 2025-01-01'.
+    """
+    try:
+        scan = await _scan(resource, filters)
+    except Exception as e:
+        return _error(resource, e)
+    return _result(resource, {"count": scan["matched"], **scan})
+
+@tool
+async def filter_records(
+    resource: Resource,
+    filters: List[str],
+    fields: Optional[List[str]] = None,
+    limit: int = 50
+) -> Dict[str, Any]:
+    """
+    Find ALL customers, products, inventory items or transactions matching the filters.
+    Pages through the whole list, so use this instead of paging with the list tools.
+
+    Args:
+        resource: Which records to search: 'customers', 'products', 'inventory' or 'transactions'.
+        filters: List of conditions, all of which must match. Each is
+            'field op value' with op one of =, !=, >, >=, <, <=, contains.
+            Nested fields use dots. Examples: 'city = Bangkok', 'total_amount >= 1000',
+            'customer.customer_code = C001', 'payment_status != paid', 'sale_date >= 2025-01-01'.
+        fields: Optional list of fields to return for each match (dotted paths allowed).
+            Returns every field when omitted.
+        limit: Maximum number of matching records to return (default: 50).
+    """
+    rows: List[Dict[str, Any]] = []
+
+    def keep(row: Dict[str, Any]) -> None:
+        if len(rows) < limit:
+            rows.append({path: _field(row, path) for path in fields} if fields else row)
+
+    try:
+        scan = await _scan(resource, filters, keep)
+    except Exception as e:
+        return _error(resource, e)
+    return _result(resource, {"rows": rows, **scan})
+
+@tool
+async def group_records(
+    resource: Resource,
+    group_by: str,
+    metric: Literal["count", "sum", "avg", "min", "max"] = "count",
+    value_field: Optional[str] = None,
+    filters: Optional[List[str]] = None,
+    limit: int = 20
+) -> Dict[str, Any]:
+    """
+    Group ALL customers, products, inventory items or transactions by a field and aggregate each group.
+    Pages through the whole list, so use this instead of paging with the list tools.
+    Examples: customers per city, revenue per payment method, stock per warehouse.
+
+    Args:
+        resource: Which records to group: 'customers', 'products', 'inventory' or 'transactions'.
+        group_by: The field to group by (dotted paths allowed, e.g. 'customer.city').
+        metric: 'count' (default), or 'sum', 'avg', 'min', 'max' of value_field.
+        value_field: The numeric field to aggregate; required unless metric is 'count'.
+        filters: Optional list of conditions, all of which must match. Each is
+            'field op value' with op one of =, !=, >, >=, <, <=, contains.
+            Examples: 'status = completed', 'sale_date >= 2025-01-01'.
+        limit: Maximum number of groups to return, largest first (default: 20).
+    """
+    if metric != "count" and not value_field:
+        return _error(resource, ValueError(f"value_field is required for metric '{metric}'"))
+
+    # group -> [count, sum, min, max]
+    groups: Dict[str, List[Any]] = {}
+
+    def add(row: Dict[str, Any]) -> None:
+        key = str(_field(row, group_by))
+        group = groups.setdefault(key, [0, 0.0, None, None])
+        group[0] += 1
+        if value_field:
+            try:
+                value = float(_field(row, value_field))
+            except (TypeError, ValueError):
+                return
+            group[1] += value
+            group[2] = value if group[2] is None else min(group[2], value)
+            group[3] = value if group[3] is None else max(group[3], value)
+
+    try:
+        scan = await _scan(resource, filters, add)
+    except Exception as e:
+        return _error(resource, e)
+
+    def aggregate(group: List[Any]) -> float:
+        count, total_value, minimum, maximum = group
+        if metric == "count":
+            return count
+        if metric == "sum":
+            return round(total_value, 2)
+        if metric == "avg":
+            return round(total_value / count, 2) if count else 0
+        return (minimum if metric == "min" else maximum) or 0
+
+    rows = sorted(
+        ({"group": key, metric: aggregate(group), "count": group[0]} for key, group in groups.items()),
+        key=lambda row: row[metric],
+        reverse=True,
+    )
+    return _result(
+        resource,
+        {
+            "group_by": group_by,
+            "metric": metric if metric == "count" else f"{metric}({value_field})",
+            "rows": rows[:limit],
+            "groups": len(rows),
+            **scan,
+        },
+    )
+
+@tool
+async def query_records(
+    resource: Resource,
+    filters: Optional[List[str]] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    limit: int = 20
+) -> Dict[str, Any]:
+    """
+    Query customers, products, inventory items or transactions with filters, sorting and a limit in one call.
+    Prefer this for selective questions like "customers in Bangkok", "products in category X under 100"
+    or "the 5 largest transactions for customer C-0012".
+
+    Columns:
+        customers: uuid, customer_code, first_name, last_name, full_name, phone, email, address,
+            city, postal_code, customer_type, is_active
+        products: uuid, product_code, product_name, category, cost_price, selling_price, is_active
+        inventory: uuid, product_uuid, product_code, product_name, category, warehouse_name,
+            quantity, is_active
+        transactions: uuid, sale_date, customer_uuid, customer_code, customer_name, employee_uuid,
+            employee_code, employee_name, subtotal, tax_amount, discount_amount, total_amount,
+            payment_method, payment_status, due_date, status, updated_at
+
+    Args:
+        resource: Which records to query: 'customers', 'products', 'inventory' or 'transactions'.
+        filters: Optional list of conditions, all of which must match. Each is
+            'column op value' with op one of =, !=, >, >=, <, <=, contains.
+            Text comparisons ignore case, and a date on sale_date, due_date or updated_at
+            means the whole day. Examples: 'city = Bangkok', 'selling_price < 100',
+            'customer_code = C-0012', 'sale_date >= 2025-01-01'.
+        sort_by: Optional column to sort by.
+        descending: Sort from largest to smallest (default: False).
+        limit: Maximum number of records to return (default: 20).
+    """
+    if not entity_store.ready:
+        return {
+            "success": False,
+            "error": "The local store is still syncing. Use count_records or filter_records instead.",
+            "endpoint_used": TABLES[resource].endpoint if resource in TABLES else None,
+            "method": "GET",
+        }
+    try:
+        data = await entity_store.query(resource, filters, sort_by, descending, limit)
+    except Exception as e:
+        return _error(resource, e)
+    return {**_result(resource, data), "source": "local"}
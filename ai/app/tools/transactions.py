@@ -1,6 +1,6 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 from langchain_core.tools import tool
-from app.utils.api import fetch
+from app.utils.api import fetch, fetch_by_ids
 
 @tool
 async def get_transaction_list(
@@ -31,3 +31,15 @@ async def get_transaction_details(id: str) -> Dict[str, Any]:
     """
     response = await fetch("GET", f"/transactions/{id}")
     return response
+
+@tool
+async def get_transaction_details_batch(ids: List[str]) -> Dict[str, Any]:
+    """
+    Get detailed information about several transactions at once by their IDs (UUIDs).
+    Use this instead of calling get_transaction_details repeatedly.
+    
+    Args:
+        ids: The list of transaction UUIDs to retrieve. Duplicates are ignored.
+    """
+    response = await fetch_by_ids("/transactions", ids)
+    return response
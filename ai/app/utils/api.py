@@ -1,6 +1,159 @@
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from collections import deque
+import asyncio
+import math
+import logging
 import httpx
 from app.config.config import Config
+from app.core.cassette import cassette, wrap_transport
+from app.utils.cache import TTLCache
+from app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+# Application-scoped client shared by every tool call
+_client: Optional[httpx.AsyncClient] = None
+
+# Cache of successful GET responses, keyed by endpoint and params
+response_cache = TTLCache(max_entries=Config.CACHE_MAX_ENTRIES)
+
+# Identical GETs already in flight share a single upstream request
+request_group = SingleFlight()
+
+# Bumped whenever cached data under an endpoint prefix goes stale ("" = everything)
+_data_versions: Dict[str, int] = {}
+
+# Endpoints whose data changes often enough to need a short TTL
+VOLATILE_ENDPOINTS = ("/analytics/low-stock", "/analytics/pending-payments")
+
+
+class FetchError(Exception):
+    """A backend request failed while iterating over pages"""
+
+    def __init__(self, response: Dict[str, Any]):
+        super().__init__(response.get("error"))
+        self.response = response
+
+
+def _build_client() -> httpx.AsyncClient:
+    """Build the pooled HTTP client used for backend calls"""
+    limits = httpx.Limits(
+        max_connections=Config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+    )
+
+    http2 = Config.HTTP2_ENABLED
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP2_ENABLED is set but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+
+    logger.info(
+        f"Backend HTTP client initialized (max_connections={Config.HTTP_MAX_CONNECTIONS}, http2={http2})"
+    )
+    # Record or replay backend calls when a cassette is active
+    transport = None
+    if cassette.mode:
+        transport = wrap_transport(httpx.AsyncHTTPTransport(limits=limits, http2=http2))
+
+    return httpx.AsyncClient(
+        headers={"Content-Type": "application/json"},
+        transport=transport,
+        limits=limits,
+        timeout=httpx.Timeout(
+            Config.HTTP_TIMEOUT_GET, connect=Config.HTTP_CONNECT_TIMEOUT
+        ),
+        http2=http2,
+    )
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """Create the shared HTTP client (called from the FastAPI lifespan)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Backend HTTP client closed")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it lazily outside the app lifespan"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+def _timeout_for(method: str) -> httpx.Timeout:
+    """Get the configured timeout for an HTTP method"""
+    timeouts = {
+        "GET": Config.HTTP_TIMEOUT_GET,
+        "POST": Config.HTTP_TIMEOUT_POST,
+        "PUT": Config.HTTP_TIMEOUT_PUT,
+        "DELETE": Config.HTTP_TIMEOUT_DELETE,
+    }
+    return httpx.Timeout(timeouts[method], connect=Config.HTTP_CONNECT_TIMEOUT)
+
+
+def cache_ttl_for(endpoint: str) -> float:
+    """Get the cache TTL (seconds) for a GET endpoint"""
+    if endpoint.startswith(VOLATILE_ENDPOINTS):
+        return Config.CACHE_TTL_VOLATILE
+    if endpoint.startswith("/analytics/"):
+        return Config.CACHE_TTL_ANALYTICS
+    if "/list" in endpoint:
+        return Config.CACHE_TTL_LIST
+    return Config.CACHE_TTL_DETAIL
+
+
+def _request_key(method: str, endpoint: str, params: Optional[Dict]) -> tuple:
+    """Build a hashable key from a method, endpoint and its query params"""
+    return (method, endpoint, tuple(sorted((params or {}).items())))
+
+
+def _mark_stale(prefix: str) -> int:
+    """Invalidate cached responses under `prefix` and bump its data version"""
+    _data_versions[prefix] = _data_versions.get(prefix, 0) + 1
+    return response_cache.invalidate_prefix(prefix)
+
+
+def data_version(endpoint: str) -> int:
+    """
+    Version of the data behind an endpoint.
+
+    Changes whenever the endpoint or any prefix of it is invalidated, so
+    anything derived from its responses can tell it has gone stale.
+    """
+    return sum(count for prefix, count in _data_versions.items() if endpoint.startswith(prefix))
+
+
+def invalidate_cache(prefix: str = "") -> int:
+    """Invalidate cached responses whose endpoint starts with `prefix`"""
+    removed = _mark_stale(prefix)
+    logger.info(f"Invalidated {removed} cached responses for prefix '{prefix}'")
+    return removed
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Get response cache and request coalescing statistics"""
+    return {
+        "enabled": Config.CACHE_ENABLED,
+        **response_cache.get_stats(),
+        "single_flight": request_group.get_stats(),
+    }
 
 
 async def fetch(
@@ -8,60 +161,205 @@ async def fetch(
     endpoint: str,
     data: Optional[Dict] = None,
     params: Optional[Dict] = None,
+    cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Make HTTP request to API endpoint.
+
+    GETs are served from the response cache when possible, and identical GETs
+    already in flight are coalesced into one upstream request. Background
+    scans pass cache=False so their bulk reads neither see stale entries nor
+    evict the ones interactive requests use.
+    """
+    method = method.upper()
+
+    if method != "GET":
+        response = await _request(method, endpoint, data=data, params=params)
+        if response["success"]:
+            # Writes make cached reads of the resource and analytics stale
+            resource = "/" + endpoint.strip("/").split("/")[0]
+            _mark_stale(resource)
+            _mark_stale("/analytics")
+        return response
+
+    if not cache:
+        return await _request(method, endpoint, params=params)
+
+    key = _request_key(method, endpoint, params)
+    if Config.CACHE_ENABLED:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+    # A GET issued after a write must not join, or be cached from, a call that started before it
+    version = data_version(endpoint)
+    response = await request_group.do(
+        (*key, version), lambda: _get_and_cache(key, endpoint, params, version)
+    )
+    return dict(response)
+
+
+async def fetch_by_ids(resource: str, ids: List[str], cache: bool = True) -> Dict[str, Any]:
+    """
+    Fetch `GET {resource}/{id}` for many IDs concurrently.
+
+    Repeated IDs are fetched once and at most BATCH_MAX_CONCURRENCY requests
+    run at a time. Each ID gets its own success or error entry, so one failed
+    lookup does not fail the whole batch.
+    """
+    unique_ids = list(dict.fromkeys(str(id).strip() for id in ids if str(id).strip()))
+    if len(unique_ids) > Config.BATCH_MAX_IDS:
+        return {
+            "success": False,
+            "error": f"Too many IDs: {len(unique_ids)} (maximum is {Config.BATCH_MAX_IDS})",
+            "endpoint_used": f"{resource}/{{id}}",
+            "method": "GET",
+        }
+
+    semaphore = asyncio.Semaphore(Config.BATCH_MAX_CONCURRENCY)
+
+    async def fetch_one(id: str) -> Dict[str, Any]:
+        async with semaphore:
+            response = await fetch("GET", f"{resource}/{id}", cache=cache)
+        if response["success"]:
+            return {"id": id, "success": True, "data": response["data"]}
+        return {"id": id, "success": False, "error": response["error"]}
+
+    results = await asyncio.gather(*(fetch_one(id) for id in unique_ids))
+    succeeded = sum(1 for result in results if result["success"])
+
+    return {
+        "success": succeeded > 0 or not results,
+        "data": {
+            "results": results,
+            "requested": len(unique_ids),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+        },
+        "endpoint_used": f"{resource}/{{id}}",
+        "method": "GET",
+    }
+
+
+def _page_rows(response: Dict[str, Any]) -> Tuple[List[Any], int]:
+    """Get the rows and total count from a list endpoint response"""
+    payload = response["data"]
+    if isinstance(payload, dict) and "data" in payload:
+        payload = payload["data"]
+    if isinstance(payload, dict):
+        return payload.get("rows") or [], int(payload.get("count") or 0)
+    if isinstance(payload, list):
+        return payload, len(payload)
+    return [], 0
+
+
+async def iter_pages(
+    endpoint: str,
+    page_size: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    cache: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream every page of a paginated list endpoint.
+
+    The first page gives the total count; the remaining pages are prefetched
+    concurrently, at most FETCH_ALL_CONCURRENCY at a time, and yielded in page
+    order. Each page is a dict with "page", "rows" and "count". Iteration
+    stops after `max_rows` rows (FETCH_ALL_MAX_ROWS by default). With
+    cache=False pages bypass the response cache.
+
+    Raises FetchError if a page request fails.
+    """
+    page_size = page_size or Config.FETCH_ALL_PAGE_SIZE
+    max_rows = max_rows or Config.FETCH_ALL_MAX_ROWS
+
+    async def get_page(page: int) -> Tuple[List[Any], int]:
+        response = await fetch("GET", endpoint, params={"page": page, "limit": page_size}, cache=cache)
+        if not response["success"]:
+            raise FetchError(response)
+        return _page_rows(response)
+
+    rows, count = await get_page(1)
+    yield {"page": 1, "rows": rows, "count": count}
+
+    last_page = math.ceil(min(count, max_rows) / page_size)
+    next_page = 2
+    pending: "deque[Tuple[int, asyncio.Task]]" = deque()
+
+    try:
+        while next_page <= last_page or pending:
+            while next_page <= last_page and len(pending) < Config.FETCH_ALL_CONCURRENCY:
+                pending.append((next_page, asyncio.create_task(get_page(next_page))))
+                next_page += 1
+
+            page, task = pending.popleft()
+            rows, _ = await task
+            yield {"page": page, "rows": rows, "count": count}
+    finally:
+        # The consumer stopped early or a page failed: stop the prefetches and
+        # collect their results so no task or exception is left behind
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+
+async def _get_and_cache(
+    key: tuple, endpoint: str, params: Optional[Dict], version: int
+) -> Dict[str, Any]:
+    """
+    Send a GET upstream and cache the response if it succeeded.
+
+    `version` is the endpoint's data version when the GET started; if a write
+    made the data stale while it was in flight, the response is not cached.
+    """
+    response = await _request("GET", endpoint, params=params)
+    if response["success"] and Config.CACHE_ENABLED and data_version(endpoint) == version:
+        response_cache.set(key, response, ttl=cache_ttl_for(endpoint), prefix=endpoint)
+    return response
+
+
+async def _request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict] = None,
+    params: Optional[Dict] = None,
 ) -> Dict[str, Any]:
-    """Make HTTP request to API endpoint"""
+    """Send a request to the backend and wrap the result in a response envelope"""
     base_url = Config.BACKEND_API_BASE_URL
-    headers = {"Content-Type": "application/json"}
-    
+
     try:
-        async with httpx.AsyncClient() as client:
-            url = f"{base_url}{endpoint}"
-
-            if method.upper() == "GET":
-                response = await client.get(
-                    url, params=params, headers=headers, timeout=30
-                )
-            elif method.upper() == "POST":
-                response = await client.post(
-                    url,
-                    json=data,
-                    headers=headers,
-                    timeout=30,
-                )
-            elif method.upper() == "PUT":
-                response = await client.put(
-                    url,
-                    json=data,
-                    headers=headers,
-                    timeout=30,
-                )
-            elif method.upper() == "DELETE":
-                response = await client.delete(
-                    url,
-                    headers=headers,
-                    timeout=30,
-                )
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            response.raise_for_status()
-            return {
-                "success": True,
-                "data": response.json(),
-                "endpoint_used": endpoint,
-                "method": method.upper(),
-            }
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        client = get_http_client()
+        url = f"{base_url}{endpoint}"
+
+        response = await client.request(
+            method,
+            url,
+            params=params if method == "GET" else None,
+            json=data if method in ("POST", "PUT") else None,
+            timeout=_timeout_for(method),
+        )
+
+        response.raise_for_status()
+        return {
+            "success": True,
+            "data": response.json(),
+            "endpoint_used": endpoint,
+            "method": method,
+        }
     except httpx.HTTPStatusError as e:
         return {
             "success": False,
             "error": f"API request failed with status {e.response.status_code}: {e.response.text}",
             "endpoint_used": endpoint,
-            "method": method.upper(),
+            "method": method,
         }
     except Exception as e:
         return {
             "success": False,
             "error": f"An error occurred: {str(e)}",
             "endpoint_used": endpoint,
-            "method": method.upper(),
+            "method": method,
         }
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import time
+
+
+class TTLCache:
+    """
+    In-memory LRU cache with a per-entry time-to-live.
+
+    With `sliding=True` the TTL acts as an idle timeout: every hit pushes the
+    entry's expiry back by its TTL.
+    """
+
+    def __init__(self, max_entries: int = 1000, sliding: bool = False):
+        self.max_entries = max_entries
+        self.sliding = sliding
+        # key -> (expires_at, ttl, prefix, value), ordered from least to most recently used
+        self._entries: "OrderedDict[Hashable, Tuple[float, float, str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value, or None if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, ttl, prefix, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        if self.sliding:
+            self._entries[key] = (now + ttl, ttl, prefix, value)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float, prefix: str = "") -> None:
+        """Store a value for `ttl` seconds, evicting the least recently used entries"""
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, ttl, prefix, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Remove every entry whose prefix starts with `prefix`, return the count removed"""
+        keys = [key for key, (_, _, p, _) in self._entries.items() if p.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove an entry and return its value, or None if it is missing"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.invalidations += 1
+        return entry[3]
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def values(self) -> List[Any]:
+        """Get every stored value, including expired ones not yet purged"""
+        return [entry[3] for entry in self._entries.values()]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
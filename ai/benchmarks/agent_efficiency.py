@@ -0,0 +1,263 @@
+"""
+Agent-efficiency regression benchmark.
+
+Replays a golden set of business questions through AIAgent.process_message
+against scripted model replies and the stub backend, fully offline. For
+each question it records LLM calls, tool calls, prompt and completion
+tokens, the largest scratchpad sent to the model and wall time, then diffs
+them against a stored baseline. Prompt edits in _create_agent or longer
+tool docstrings show up as more prompt tokens; a changed tool flow shows
+up as more LLM or tool calls. Exits with status 1 when a counted metric
+grows beyond the tolerance.
+
+Response and answer caches are off, so every question does the full work.
+Tokens are estimated from text length (about 4 characters per token),
+which is enough to compare runs.
+
+Usage (from the ai/ directory):
+    python -m benchmarks.agent_efficiency
+    python -m benchmarks.agent_efficiency --set AGENT_MODE=plan
+    python -m benchmarks.agent_efficiency --update-baseline
+"""
+from benchmarks.offline import apply_settings, offline_app, quiet_logging, warm_up
+from benchmarks.fakes import ScriptRule, scripted_model_factory, seed_id
+from benchmarks.stub_backend import StubData, create_app
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import time
+import app.main as app_main
+
+GOLDEN_PATH = Path(__file__).parent / "golden_questions.json"
+BASELINE_PATH = Path(__file__).parent / "baselines" / "agent_efficiency.json"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Metrics that must not grow; wall time is reported but too noisy to gate on
+COUNTED_METRICS = ("llm_calls", "tool_calls", "input_tokens", "output_tokens", "scratchpad_chars")
+
+# "$id:<kind>:<n>" in golden arguments stands for the UUID of the nth seeded record
+ID_RE = re.compile(r"\$id:(\w+):(\d+)")
+
+# Caches would let repeated runs skip the work being measured
+DEFAULT_SETTINGS = ["CACHE_ENABLED=false", "ANSWER_CACHE_ENABLED=false"]
+
+
+def _resolve_ids(value: Any) -> Any:
+    if isinstance(value, str):
+        return ID_RE.sub(lambda match: seed_id(match.group(1), int(match.group(2))), value)
+    if isinstance(value, list):
+        return [_resolve_ids(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _resolve_ids(item) for key, item in value.items()}
+    return value
+
+
+def load_golden(path: Path) -> List[Dict[str, Any]]:
+    """Load the golden questions, with seeded record IDs filled in"""
+    questions = _resolve_ids(json.loads(path.read_text()))
+    ids = [question["id"] for question in questions]
+    if len(ids) != len(set(ids)):
+        raise ValueError(f"Duplicate question ids in {path}")
+    return questions
+
+
+def golden_script(questions: List[Dict[str, Any]]) -> List[ScriptRule]:
+    """Scripted model rules that answer each golden question as written"""
+    return [
+        ScriptRule(rf"^{re.escape(question['question'])}$", question.get("steps", []), question["answer"])
+        for question in questions
+    ]
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+class ScratchpadProbe(BaseCallbackHandler):
+    """
+    Size of the largest scratchpad sent to the model in a turn.
+
+    The scratchpad is everything after the user's question: tool-calling
+    replies and tool results in ReAct, and the rendered tool results in the
+    plan mode synthesis prompt.
+    """
+
+    def __init__(self):
+        self.chars = 0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], **kwargs: Any) -> None:
+        for prompt in messages:
+            last_human = max((i for i, m in enumerate(prompt) if isinstance(m, HumanMessage)), default=-1)
+            size = 0
+            for message in prompt[last_human + 1 :]:
+                size += len(_text(message.content))
+                if isinstance(message, AIMessage) and message.tool_calls:
+                    size += len(json.dumps(message.tool_calls, default=str))
+            for message in prompt:
+                _, marker, results = _text(message.content).partition("Tool results:")
+                if marker:
+                    size += len(results)
+            self.chars = max(self.chars, size)
+
+
+async def _measure(question: Dict[str, Any], probe: ScratchpadProbe, repeat: int) -> Dict[str, Any]:
+    """Run one golden question `repeat` times in fresh sessions; counts come from the first run"""
+    runs: List[Tuple[Dict[str, Any], int, float]] = []
+    for _ in range(repeat):
+        probe.chars = 0
+        started = time.perf_counter()
+        result = await app_main.agent_instance.process_message(question["question"])
+        runs.append((result, probe.chars, time.perf_counter() - started))
+
+    result, scratchpad_chars, _ = runs[0]
+    usage = result.get("llm_usage") or {}
+    if result.get("routed_intent"):
+        path = "router"
+    elif result.get("cached"):
+        path = "cache"
+    else:
+        path = result.get("agent_mode") or "error"
+    return {
+        "path": path,
+        "success": bool(result.get("success")),
+        "llm_calls": usage.get("llm_calls", 0),
+        "tool_calls": (result.get("tool_timing") or {}).get("tool_calls", 0),
+        "tools": [call["tool"] for call in result.get("tool_outputs") or []],
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "scratchpad_chars": scratchpad_chars,
+        "wall_ms": round(statistics.median(seconds for _, _, seconds in runs) * 1000, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    started_at = datetime.now(timezone.utc).isoformat()
+    overrides = apply_settings([*DEFAULT_SETTINGS, *args.set])
+    questions = load_golden(Path(args.golden))
+    if args.only:
+        questions = [question for question in questions if question["id"] in args.only]
+
+    backend = create_app(StubData(seed=args.seed))
+    factory = scripted_model_factory(args.llm_latency, args.seed, rules=golden_script(questions))
+    probe = ScratchpadProbe()
+
+    async with offline_app(factory, backend_app=backend):
+        await warm_up()
+        for llm in app_main.agent_instance.models.values():
+            llm.callbacks = [*(llm.callbacks or []), probe]
+        results = {question["id"]: await _measure(question, probe, args.repeat) for question in questions}
+
+    totals = {metric: sum(result[metric] for result in results.values()) for metric in COUNTED_METRICS}
+    totals["wall_ms"] = round(sum(result["wall_ms"] for result in results.values()), 1)
+    return {
+        "started_at": started_at,
+        "settings": {"overrides": overrides, "llm_latency": args.llm_latency, "repeat": args.repeat, "seed": args.seed},
+        "questions": results,
+        "totals": totals,
+    }
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> Tuple[List[str], int]:
+    """Lines describing changes against the baseline, and the number of regressions"""
+    lines: List[str] = []
+    regressions = 0
+    rows = [(question_id, result, baseline["questions"].get(question_id)) for question_id, result in report["questions"].items()]
+    rows.append(("TOTAL", report["totals"], baseline.get("totals")))
+
+    for question_id, current, previous in rows:
+        if previous is None:
+            lines.append(f"  {question_id}: new question, no baseline")
+            continue
+        if current.get("path") != previous.get("path") or current.get("tools") != previous.get("tools"):
+            lines.append(
+                f"  {question_id}: path {previous.get('path')} -> {current.get('path')}, "
+                f"tools {previous.get('tools')} -> {current.get('tools')}"
+            )
+        for metric in COUNTED_METRICS:
+            now, before = current[metric], previous.get(metric, 0)
+            if now == before:
+                continue
+            change = (now - before) / before if before else float("inf")
+            if abs(change) <= tolerance:
+                continue
+            if change > 0:
+                regressions += 1
+            verdict = "REGRESSION" if change > 0 else "improved"
+            lines.append(f"  {question_id} {metric}: {before} -> {now} ({change:+.1%}) {verdict}")
+
+    missing = sorted(set(baseline["questions"]) - set(report["questions"]))
+    if missing:
+        lines.append(f"  not run: {', '.join(missing)}")
+    return lines, regressions
+
+
+def _table(report: Dict[str, Any]) -> str:
+    headers = ["question", "path", "llm", "tools", "in_tok", "out_tok", "scratch", "wall_ms"]
+    rows = [
+        [question_id, r["path"], r["llm_calls"], r["tool_calls"], r["input_tokens"], r["output_tokens"], r["scratchpad_chars"], r["wall_ms"]]
+        for question_id, r in report["questions"].items()
+    ]
+    totals = report["totals"]
+    rows.append(["TOTAL", "", *(totals[metric] for metric in COUNTED_METRICS), totals["wall_ms"]])
+    widths = [max(len(str(row[i])) for row in [headers, *rows]) for i in range(len(headers))]
+    return "\n".join(
+        "  ".join(str(value).ljust(width) if i < 2 else str(value).rjust(width) for i, (value, width) in enumerate(zip(row, widths)))
+        for row in [headers, *rows]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--golden", default=str(GOLDEN_PATH), help="Golden questions file")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline results file")
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Allowed relative growth of counted metrics")
+    parser.add_argument("--only", action="append", default=[], metavar="ID", help="Run only these question ids")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per question for the median wall time")
+    parser.add_argument("--llm-latency", default="none", help="Model reply latency spec")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the stub data")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Override a Config setting")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/agent-efficiency-<time>.json)")
+    args = parser.parse_args()
+
+    quiet_logging()
+    report = asyncio.run(run(args))
+    print(_table(report))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / datetime.now().strftime("agent-efficiency-%Y%m%d-%H%M%S.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved results to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Updated baseline {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+        return
+
+    lines, regressions = compare(report, json.loads(baseline_path.read_text()), args.tolerance)
+    print(f"\nCompared with baseline {baseline_path}:")
+    print("\n".join(lines) if lines else "  no changes")
+    if regressions:
+        print(f"\n{regressions} metric(s) grew more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
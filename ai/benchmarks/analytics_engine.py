@@ -0,0 +1,93 @@
+"""
+Benchmark the local analytics engine against the backend's /analytics endpoints.
+
+Loads the snapshot, checks it against the backend, then times sales summaries
+and top products both ways. The response cache is disabled so every HTTP call
+reaches the backend.
+
+Usage (from the ai/ directory, with the backend running):
+    python -m benchmarks.analytics_engine --start 2025-01-01 --end 2025-12-31 --runs 50
+"""
+from typing import Any, Awaitable, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from app.config.config import Config
+from app.utils.api import init_http_client, close_http_client, fetch
+from app.core.analytics_engine import analytics_engine
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def _time(call: Callable[[], Awaitable[Any]], runs: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - started)
+    return _percentiles(samples)
+
+
+async def run(start_date: str, end_date: str, runs: int, limit: int) -> Dict[str, Any]:
+    Config.ANALYTICS_ENGINE_ENABLED = True
+    Config.CACHE_ENABLED = False
+    await init_http_client()
+
+    try:
+        started = time.perf_counter()
+        await analytics_engine.refresh()
+        load_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await analytics_engine.refresh()
+        incremental_seconds = time.perf_counter() - started
+
+        params = {"start_date": start_date, "end_date": end_date}
+
+        async def local_summary():
+            return analytics_engine.sales_summary(start_date, end_date)
+
+        async def local_top():
+            return analytics_engine.top_products(limit, start_date, end_date)
+
+        async def http_summary():
+            return await fetch("GET", "/analytics/sales-summary", params=params)
+
+        async def http_top():
+            return await fetch("GET", "/analytics/top-products", params={**params, "limit": limit})
+
+        return {
+            "snapshot": analytics_engine.get_stats(),
+            "full_load_seconds": round(load_seconds, 3),
+            "incremental_refresh_seconds": round(incremental_seconds, 3),
+            "consistency": await analytics_engine.check_consistency(start_date, end_date, limit),
+            "sales_summary": {"local": await _time(local_summary, runs), "http": await _time(http_summary, runs)},
+            "top_products": {"local": await _time(local_top, runs), "http": await _time(http_top, runs)},
+        }
+    finally:
+        await close_http_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", required=True, help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, help="End date (YYYY-MM-DD)")
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs per query")
+    parser.add_argument("--limit", type=int, default=5, help="Top products limit")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.start, args.end, args.runs, args.limit))
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
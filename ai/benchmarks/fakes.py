@@ -0,0 +1,312 @@
+"""
+Scripted stand-ins for the external services, so benchmarks run offline.
+
+ScriptedChatModel replays tool calls and answers from a script of rules
+with a configurable latency distribution, in place of Gemini.
+"""
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+
+# Answer when the script has nothing better to say
+DEFAULT_ANSWER = "Here is what I found in the store data."
+
+# Plan mode prompt, and the reply it expects when later calls depend on earlier
+# results (app.core.planner, not imported so the stub backend runs without app settings)
+PLANNING_PROMPT = "PLANNING MODE:"
+PLANNER_REACT_MARKER = "NEEDS_STEPS"
+
+
+def seed_id(kind: str, number: int) -> str:
+    """Stable UUID of the `number`th seeded record of a kind, shared with the stub backend"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"benchmark/{kind}/{number}"))
+
+
+class Latency:
+    """
+    A latency distribution parsed from a spec string.
+
+    Specs: "none", "fixed:SECONDS", "uniform:LOW:HIGH" and
+    "lognormal:MEDIAN:SIGMA" (heavy tailed, like real model calls).
+    """
+
+    def __init__(self, spec: str = "none", seed: Optional[int] = None):
+        self.spec = spec
+        name, *values = spec.split(":")
+        try:
+            params = [float(value) for value in values]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        arity = {"none": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+        if arity.get(name) != len(params):
+            raise ValueError(f"Invalid latency spec: {spec}")
+        self.name = name
+        self.params = params
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """Draw one latency in seconds"""
+        with self._lock:
+            if self.name == "fixed":
+                return self.params[0]
+            if self.name == "uniform":
+                return self._random.uniform(*self.params)
+            if self.name == "lognormal":
+                median, sigma = self.params
+                return self._random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+            return 0.0
+
+    async def wait(self) -> float:
+        seconds = self.sample()
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+        return seconds
+
+
+@dataclass
+class ScriptRule:
+    """
+    Replies for questions matching `pattern`.
+
+    Each step is the list of tool calls ({"name", "args"}) made after the
+    previous step's results came back; `answer` is the final reply.
+    """
+
+    pattern: str
+    steps: List[List[Dict[str, Any]]] = field(default_factory=list)
+    answer: str = DEFAULT_ANSWER
+
+    def __post_init__(self):
+        self.regex = re.compile(self.pattern, re.IGNORECASE)
+
+
+# A mix of direct answers, single lookups, parallel and dependent calls.
+# Pending payments, low stock and top products questions are usually answered
+# by the router without the model.
+DEFAULT_SCRIPT = [
+    ScriptRule(r"^(hi|hello|hey|thanks)\b", answer="Hello! How can I help you today?"),
+    ScriptRule(
+        r"\bcustomers?\b.*\blist\b|\blist\b.*\bcustomers?\b",
+        [[{"name": "get_customer_list", "args": {"page": 1, "limit": 10}}]],
+        "Here are the first 10 customers.",
+    ),
+    ScriptRule(
+        r"\bsales\b.*\bproducts?\b",
+        [[
+            {"name": "get_sales_summary", "args": {"start_date": "2025-01-01", "end_date": "2025-12-31"}},
+            {"name": "get_product_list", "args": {"page": 1, "limit": 20}},
+        ]],
+        "Sales for 2025 and the current product catalogue are summarised above.",
+    ),
+    ScriptRule(
+        r"\bsales\b|\brevenue\b",
+        [[{"name": "get_sales_summary", "args": {"start_date": "2025-01-01", "end_date": "2025-12-31"}}]],
+        "Total revenue for 2025 is shown above.",
+    ),
+    ScriptRule(
+        r"\bproduct\b.*\bdetails?\b|\bdetails?\b.*\bproduct\b",
+        [
+            [{"name": "get_product_list", "args": {"page": 1, "limit": 5}}],
+            [{"name": "get_product_details", "args": {"id": seed_id("products", 1)}}],
+        ],
+        "Here are the details of the first product.",
+    ),
+    ScriptRule(
+        r"\btransactions?\b",
+        [[{"name": "get_transaction_list", "args": {"page": 1, "limit": 10}}]],
+        "Here are the most recent transactions.",
+    ),
+    ScriptRule(
+        r"\binventory\b|\bstock\b",
+        [[{"name": "get_inventory_list", "args": {"page": 1, "limit": 10}}]],
+        "Here is the current inventory.",
+    ),
+]
+
+# Questions the load test cycles through, matching DEFAULT_SCRIPT
+DEFAULT_QUESTIONS = [
+    "hello",
+    "List the customers",
+    "What was our revenue in 2025?",
+    "Show sales and products for 2025",
+    "Give me the details of a product",
+    "Show the latest transactions",
+    "How much inventory do we have in stock?",
+    "Which payments are still pending?",
+    "Show the top 5 products this month",
+    "Which items are low stock?",
+]
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Fake chat model that follows a script instead of calling an API.
+
+    The last human message picks the rule; the number of tool-calling replies
+    since that message picks the step. Once the steps run out, or when the
+    prompt already carries tool results (plan mode synthesis), it answers.
+    Asked to plan a rule with dependent steps, it asks for the ReAct loop.
+    Every reply waits for a latency drawn from `latency` and reports token
+    usage estimated from the text length, tool schemas included, so prompt
+    and docstring changes show up in the counts.
+    """
+
+    model: str = "scripted"
+    rules: List[Any] = []
+    # A Latency, or None for instant replies
+    latency: Any = None
+    # Seconds between streamed answer words
+    token_delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        # Tool schemas are sent with every request, as real providers do
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _reply(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> AIMessage:
+        """The scripted reply to a conversation"""
+        tool_names = {tool["function"]["name"] for tool in tools or []}
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        question = _text(messages[last_human].content) if last_human >= 0 else ""
+        rule = next((rule for rule in self.rules if rule.regex.search(question)), None)
+        step = sum(
+            1 for message in messages[last_human + 1 :] if isinstance(message, AIMessage) and message.tool_calls
+        )
+        prompt = [_text(message.content) for message in messages]
+        # Plan mode synthesis carries the results in the prompt instead of tool messages
+        synthesis = any("Tool results:" in text for text in prompt)
+        if rule and len(rule.steps) > 1 and any(PLANNING_PROMPT in text for text in prompt):
+            return AIMessage(content=PLANNER_REACT_MARKER)
+
+        if rule and tool_names and step < len(rule.steps) and not synthesis:
+            calls = [
+                {"name": call["name"], "args": call["args"], "id": f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"}
+                for call in rule.steps[step]
+                if call["name"] in tool_names
+            ]
+            if calls:
+                return AIMessage(content="", tool_calls=calls)
+        return AIMessage(content=rule.answer if rule else DEFAULT_ANSWER)
+
+    def _usage(
+        self, messages: List[BaseMessage], reply: AIMessage, tools: Optional[List[Dict[str, Any]]]
+    ) -> Dict[str, int]:
+        """Token usage estimated from the prompt (messages, tool calls and tool schemas) and the reply"""
+        prompt = [_text(message.content) for message in messages]
+        prompt += [json.dumps(getattr(message, "tool_calls", None) or [], default=str) for message in messages]
+        input_tokens = _estimate_tokens("".join(prompt) + json.dumps(tools or []))
+        output_tokens = _estimate_tokens(_text(reply.content) or json.dumps(reply.tool_calls, default=str))
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency is not None:
+            time.sleep(self.latency.sample())
+        reply = self._reply(messages, kwargs.get("tools"))
+        reply.usage_metadata = self._usage(messages, reply, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency is not None:
+            await self.latency.wait()
+        reply = self._reply(messages, kwargs.get("tools"))
+        reply.usage_metadata = self._usage(messages, reply, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # The latency is the time to the first chunk
+        if self.latency is not None:
+            await self.latency.wait()
+        reply = self._reply(messages, kwargs.get("tools"))
+        usage = self._usage(messages, reply, kwargs.get("tools"))
+
+        if reply.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+                        for index, call in enumerate(reply.tool_calls)
+                    ],
+                    usage_metadata=usage,
+                )
+            )
+            return
+
+        words = _text(reply.content).split(" ")
+        for index, word in enumerate(words):
+            if index and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            text = word if index == len(words) - 1 else word + " "
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content=text, usage_metadata=usage if index == 0 else None)
+            )
+
+
+def scripted_model_factory(
+    latency: str = "none", seed: Optional[int] = None, rules: Optional[List[ScriptRule]] = None, token_delay: float = 0.0
+):
+    """
+    LLM factory for app.core.llm.set_llm_factory that builds scripted models.
+
+    Every model shares one latency distribution, so a fixed seed gives the
+    same sequence of latencies across runs.
+    """
+    distribution = Latency(latency, seed)
+
+    def factory(model_name: str, temperature: float) -> BaseChatModel:
+        return ScriptedChatModel(
+            model=model_name,
+            rules=rules if rules is not None else DEFAULT_SCRIPT,
+            latency=distribution,
+            token_delay=token_delay,
+        )
+
+    return factory
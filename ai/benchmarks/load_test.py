@@ -0,0 +1,258 @@
+"""
+Load test the AI server fully offline.
+
+Runs the app in-process against a scripted chat model, the stub backend and
+an in-process MongoDB, then drives POST /chat, GET /sessions and
+GET /sessions/{id}/history from concurrent simulated users. Reports
+throughput, p50/p95/p99 latency per endpoint and event-loop lag, and saves
+the results as JSON so runs can be compared.
+
+Usage (from the ai/ directory):
+    python -m benchmarks.load_test --concurrency 16 --requests 500 --llm-latency lognormal:0.8:0.6
+    python -m benchmarks.load_test --duration 60 --set ANSWER_CACHE_ENABLED=false --compare benchmarks/results/baseline.json
+"""
+from benchmarks.offline import apply_settings, offline_app, quiet_logging
+from benchmarks.fakes import DEFAULT_QUESTIONS, scripted_model_factory
+from benchmarks.stub_backend import StubData, create_app
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from app.core.llm import llm_metrics
+from app.core.hedging import hedging_stats
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Metrics shown when comparing against a baseline, and whether higher is better
+COMPARED_METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+}
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+
+    def rank(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {"p50_ms": rank(0.5), "p95_ms": rank(0.95), "p99_ms": rank(0.99), "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+class LoadRecorder:
+    """Latencies, errors and chat metadata collected during a run"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Counter = Counter()
+        self.chat: Counter = Counter()
+        self.loop_lag: List[float] = []
+
+    async def timed(self, name: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            response = None
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+        if response is None or response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+
+async def _monitor_loop_lag(recorder: LoadRecorder, interval: float, stop: asyncio.Event) -> None:
+    """Sample how late the event loop wakes a sleeping task"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        recorder.loop_lag.append(max(0.0, loop.time() - started - interval))
+
+
+async def _user(
+    client: httpx.AsyncClient,
+    recorder: LoadRecorder,
+    questions: List[str],
+    next_turn,
+    args: argparse.Namespace,
+) -> None:
+    """One simulated user: chats in a session, sometimes checks the session list and history"""
+    session_id: Optional[str] = None
+    turns = 0
+    while True:
+        turn = next_turn()
+        if turn is None:
+            return
+
+        response = await recorder.timed(
+            "POST /chat",
+            client.post("/chat", json={"message": questions[turn % len(questions)], "session_id": session_id}),
+        )
+        turns += 1
+        if response is not None:
+            body = response.json()
+            session_id = body["session_id"]
+            metadata = body.get("metadata") or {}
+            recorder.chat["cached"] += bool(metadata.get("cached"))
+            for key in ("model_tier", "agent_mode"):
+                if metadata.get(key):
+                    recorder.chat[f"{key}:{metadata[key]}"] += 1
+
+        if session_id and turns % args.history_every == 0:
+            await recorder.timed("GET /sessions", client.get("/sessions", params={"limit": 20}))
+            await recorder.timed(
+                "GET /sessions/{id}/history",
+                client.get(f"/sessions/{session_id}/history", params={"limit": 50}),
+            )
+        if turns >= args.turns_per_session:
+            session_id, turns = None, 0
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    started_at = datetime.now(timezone.utc).isoformat()
+    overrides = apply_settings(args.set)
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        questions = [line.strip() for line in Path(args.questions).read_text().splitlines() if line.strip()]
+
+    backend = None
+    if not args.backend_url:
+        backend = create_app(
+            StubData(args.customers, args.products, args.transactions, args.seed), args.backend_latency, args.seed
+        )
+    factory = scripted_model_factory(args.llm_latency, args.seed, token_delay=args.token_delay)
+
+    recorder = LoadRecorder()
+    llm_metrics.reset()
+    hedging_stats.reset()
+
+    async with offline_app(factory, backend_app=backend, backend_url=args.backend_url, mongo_url=args.mongo_url) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration if args.duration else None
+        issued = 0
+
+        def next_turn() -> Optional[int]:
+            nonlocal issued
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            if deadline is None and issued >= args.requests:
+                return None
+            issued += 1
+            return issued - 1
+
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(_monitor_loop_lag(recorder, args.lag_interval, stop))
+        try:
+            await asyncio.gather(
+                *(_user(client, recorder, questions, next_turn, args) for _ in range(args.concurrency))
+            )
+        finally:
+            stop.set()
+            await monitor
+        elapsed = time.perf_counter() - started
+
+    endpoints = {
+        name: {
+            "count": len(samples),
+            "errors": recorder.errors[name],
+            "throughput_rps": round(len(samples) / elapsed, 3),
+            **_percentiles(samples),
+        }
+        for name, samples in recorder.latencies.items()
+    }
+    return {
+        "name": args.name,
+        "started_at": started_at,
+        "settings": {
+            "concurrency": args.concurrency,
+            "requests": None if args.duration else args.requests,
+            "duration": args.duration,
+            "llm_latency": args.llm_latency,
+            "backend_latency": None if args.backend_url else args.backend_latency,
+            "backend": args.backend_url or "stub",
+            "mongo": "mongod" if args.mongo_url else "mongomock",
+            "seed": args.seed,
+            "overrides": overrides,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "endpoints": endpoints,
+        "chat": dict(recorder.chat),
+        "event_loop_lag": _percentiles(recorder.loop_lag),
+        "backend_requests": backend.state.requests if backend else None,
+        "llm": llm_metrics.get_stats(),
+        "hedging": hedging_stats.get_stats(),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Lines comparing a run's key metrics against a baseline run"""
+    lines = [f"Compared with {baseline.get('name')} ({baseline.get('started_at')}):"]
+    sections = [(name, report["endpoints"][name], baseline["endpoints"].get(name)) for name in report["endpoints"]]
+    sections.append(("event loop lag", report["event_loop_lag"], baseline.get("event_loop_lag")))
+
+    for name, current, previous in sections:
+        if not previous:
+            lines.append(f"  {name}: no baseline")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            now, before = current.get(metric), previous.get(metric)
+            if now is None or before is None:
+                continue
+            change = (now - before) / before * 100 if before else 0.0
+            better = (change > 0) == higher_is_better
+            verdict = "" if abs(change) < 5 else (" better" if better else " WORSE")
+            lines.append(f"  {name} {metric}: {before} -> {now} ({change:+.1f}%){verdict}")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8, help="Simulated users running at once")
+    parser.add_argument("--requests", type=int, default=200, help="Total chat turns (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="Run for this many seconds instead")
+    parser.add_argument("--llm-latency", default="lognormal:0.5:0.5", help="Model reply latency spec")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed answer words")
+    parser.add_argument("--backend-latency", default="lognormal:0.02:0.5", help="Stub backend latency spec")
+    parser.add_argument("--backend-url", default=None, help="Use a running backend (or stub) instead of the in-process stub")
+    parser.add_argument("--mongo-url", default=None, help="Use a local mongod instead of mongomock-motor")
+    parser.add_argument("--customers", type=int, default=200, help="Seeded customers")
+    parser.add_argument("--products", type=int, default=100, help="Seeded products")
+    parser.add_argument("--transactions", type=int, default=1000, help="Seeded transactions")
+    parser.add_argument("--questions", default=None, help="File with one question per line")
+    parser.add_argument("--turns-per-session", type=int, default=5, help="Chat turns before a user starts a new session")
+    parser.add_argument("--history-every", type=int, default=3, help="Read sessions and history every N turns")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="Event-loop lag sampling interval (seconds)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and latencies")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Override a Config setting")
+    parser.add_argument("--name", default=None, help="Run name (default: a timestamp)")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<name>.json)")
+    parser.add_argument("--compare", default=None, help="Baseline results file to compare against")
+    args = parser.parse_args()
+    args.name = args.name or datetime.now().strftime("load-%Y%m%d-%H%M%S")
+
+    quiet_logging()
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, default=str))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{args.name}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, default=str))
+    print(f"Saved results to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print("\n".join(compare(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
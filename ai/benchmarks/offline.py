@@ -0,0 +1,170 @@
+"""
+Run the AI server in-process with every external service replaced.
+
+The backend REST API is served by the stub backend through an ASGI
+transport, MongoDB by mongomock-motor (or a local mongod), Gemini by a
+scripted model factory, and LangSmith tracing is turned off. Importing this
+module fills in the environment variables Config requires, so it has to be
+imported before anything from `app`.
+"""
+import os
+
+# Placeholders for the settings Config.validate requires; a local .env still wins
+OFFLINE_ENV = {
+    "PORT": "8000",
+    "GOOGLE_API_KEY": "offline",
+    "LANGSMITH_API_KEY": "offline",
+    "LANGSMITH_TRACING": "false",
+    "BACKEND_API_BASE_URL": "http://stub-backend/v1",
+    "MONGO_INITDB_ROOT_USERNAME": "offline",
+    "MONGO_INITDB_ROOT_PASSWORD": "offline",
+    "MONGO_INITDB_DATABASE": "benchmark",
+    "MONGODB_COLLECTION_CHAT_HISTORY": "history_store",
+}
+for _name, _value in OFFLINE_ENV.items():
+    os.environ.setdefault(_name, _value)
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+import httpx
+import logging
+from app.config.config import Config
+from app.core.analytics_engine import analytics_engine
+from app.core.cassette import wrap_transport
+from app.core.entity_index import entity_index
+from app.core.entity_store import entity_store
+from app.core.llm import LLMFactory, set_llm_factory
+from app.core.tracing import TracingService
+import app.core.agent as agent
+import app.core.mongo as mongo
+import app.main as main
+import app.utils.api as api
+
+STUB_BACKEND_URL = "http://stub-backend/v1"
+
+
+class OfflineTracing(TracingService):
+    """Tracing service without a LangSmith client, so no traces leave the machine"""
+
+    def __init__(self):
+        self.langsmith_client = None
+
+    def get_callbacks(self):
+        return []
+
+
+def apply_settings(overrides: Iterable[str]) -> Dict[str, Any]:
+    """
+    Override Config values from KEY=VALUE strings.
+
+    Values are converted to the type of the current setting. Raises
+    ValueError for unknown keys or malformed values.
+    """
+    applied: Dict[str, Any] = {}
+    for override in overrides:
+        key, sep, raw = override.partition("=")
+        key = key.strip()
+        if not sep or not hasattr(Config, key):
+            raise ValueError(f"Unknown setting: {override}")
+        current = getattr(Config, key)
+        if isinstance(current, bool):
+            value: Any = raw.strip().lower() == "true"
+        elif isinstance(current, (int, float)):
+            value = type(current)(raw)
+        else:
+            value = raw
+        setattr(Config, key, value)
+        applied[key] = value
+    return applied
+
+
+def _mongomock_client():
+    try:
+        import mongomock_motor
+    except ImportError:
+        raise RuntimeError(
+            "The in-process MongoDB needs mongomock-motor (pip install mongomock-motor); "
+            "or pass a local mongod URL instead"
+        )
+    return mongomock_motor.AsyncMongoMockClient()
+
+
+@asynccontextmanager
+async def offline_app(
+    llm_factory: Optional[LLMFactory] = None,
+    backend_app: Optional[FastAPI] = None,
+    backend_url: Optional[str] = None,
+    mongo_url: Optional[str] = None,
+    backend_transport: Optional[httpx.AsyncBaseTransport] = None,
+    verbose: bool = False,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Start the AI server in-process and yield an HTTP client for it.
+
+    The backend is `backend_url` if given, otherwise `backend_app` (or
+    `backend_transport`) mounted in-process; with none of them the app's own
+    client is used, as when replaying a cassette. Models come from
+    `llm_factory` (Gemini when None). MongoDB is `mongo_url` if given,
+    otherwise mongomock-motor. The app lifespan runs around the block, so
+    startup and shutdown follow the real server. The agent's step-by-step
+    console output is off unless `verbose` is set.
+    """
+    build_http_client = api._build_client
+    build_mongo_client = mongo._build_client
+    settings = {
+        "BACKEND_API_BASE_URL": Config.BACKEND_API_BASE_URL,
+        "MONGODB_URL": Config.MONGODB_URL,
+    }
+    agent.TracingService = OfflineTracing
+
+    if backend_url:
+        Config.BACKEND_API_BASE_URL = backend_url
+    elif backend_app is not None or backend_transport is not None:
+        transport = backend_transport or httpx.ASGITransport(app=backend_app)
+        Config.BACKEND_API_BASE_URL = STUB_BACKEND_URL
+        # Still recorded when a cassette is recording
+        api._build_client = lambda: httpx.AsyncClient(
+            transport=wrap_transport(transport) or transport,
+            headers={"Content-Type": "application/json"},
+            timeout=httpx.Timeout(Config.HTTP_TIMEOUT_GET, connect=Config.HTTP_CONNECT_TIMEOUT),
+        )
+
+    if mongo_url:
+        Config.MONGODB_URL = mongo_url
+    else:
+        mongo._build_client = _mongomock_client
+
+    set_llm_factory(llm_factory)
+    try:
+        async with main.app.router.lifespan_context(main.app):
+            for executor in main.agent_instance.agents.values():
+                executor.verbose = verbose
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=main.app), base_url="http://ai-server", timeout=None
+            ) as client:
+                yield client
+    finally:
+        set_llm_factory(None)
+        agent.TracingService = TracingService
+        api._build_client = build_http_client
+        mongo._build_client = build_mongo_client
+        for key, value in settings.items():
+            setattr(Config, key, value)
+
+
+async def warm_up() -> None:
+    """Finish loading the enabled local stores, so the first measured turn does not pay for it"""
+    if Config.ENTITY_INDEX_ENABLED:
+        await entity_index.refresh()
+    if Config.ENTITY_STORE_ENABLED:
+        await entity_store.sync()
+    if Config.ANALYTICS_ENGINE_ENABLED:
+        await analytics_engine.refresh()
+
+
+def quiet_logging(level: int = logging.WARNING) -> None:
+    """Keep the app's per-request INFO logs out of benchmark timings and output"""
+    logging.getLogger().setLevel(level)
+    for name in ("httpx", "app"):
+        logging.getLogger(name).setLevel(level)
@@ -0,0 +1,164 @@
+"""
+Replay a recorded cassette against the AI server, fully offline.
+
+Record real traffic by running the server with CASSETTE_MODE=record (model
+calls, backend calls and chat turns go to CASSETTE_DIR). This replays it:
+model and backend calls are served from the cassette with their recorded
+timings (scaled by --time-scale), and the recorded chat turns are sent
+again, each session in order from its recorded arrival time (scaled by
+--arrival-scale). Reports latency like the load test, plus how many calls
+matched the recording, so the effect of caching or concurrency changes can
+be measured on the same traffic. Model calls must match exactly unless
+CASSETTE_LOOSE_MATCH is set; loose hits are listed under cassette warnings.
+
+Usage (from the ai/ directory):
+    python -m benchmarks.replay cassettes
+    python -m benchmarks.replay cassettes --set ANSWER_CACHE_ENABLED=false --compare benchmarks/results/before.json
+    python -m benchmarks.replay cassettes --time-scale 0 --arrival-scale 0 --concurrency 32
+    python -m benchmarks.replay cassettes --set CASSETTE_LOOSE_MATCH=true
+"""
+from benchmarks.offline import apply_settings, offline_app, quiet_logging
+from benchmarks.load_test import LoadRecorder, RESULTS_DIR, _monitor_loop_lag, _percentiles, compare
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import httpx
+from app.core.cassette import cassette
+from app.core.llm import llm_metrics
+from app.core.hedging import hedging_stats
+
+
+async def _replay_session(
+    client: httpx.AsyncClient,
+    recorder: LoadRecorder,
+    turns: List[Dict[str, Any]],
+    started: float,
+    args: argparse.Namespace,
+) -> None:
+    """Send one recorded session's turns in order, each no earlier than its scaled arrival time"""
+    # A fresh id, so the replay does not see history left by an earlier run
+    session_id = str(uuid.uuid4())
+    for turn in turns:
+        delay = turn["offset"] * args.arrival_scale - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        body = {"message": turn["message"], "session_id": session_id}
+        if turn.get("stream"):
+            await recorder.timed("POST /chat/stream", client.post("/chat/stream", json=body))
+        else:
+            await recorder.timed("POST /chat", client.post("/chat", json=body))
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    started_at = datetime.now(timezone.utc).isoformat()
+    overrides = apply_settings(
+        [
+            "CASSETTE_MODE=replay",
+            f"CASSETTE_DIR={args.cassette}",
+            f"CASSETTE_TIME_SCALE={args.time_scale}",
+            *args.set,
+        ]
+    )
+
+    turns = cassette.turns()
+    if not turns:
+        raise SystemExit(f"No recorded chat turns in {args.cassette}")
+    sessions: Dict[str, List[Dict[str, Any]]] = {}
+    for turn in turns:
+        sessions.setdefault(turn["session_id"], []).append(turn)
+
+    recorder = LoadRecorder()
+    llm_metrics.reset()
+    hedging_stats.reset()
+    limit = asyncio.Semaphore(args.concurrency) if args.concurrency else None
+
+    async with offline_app(mongo_url=args.mongo_url) as client:
+        started = time.perf_counter()
+
+        async def replay(session_turns: List[Dict[str, Any]]) -> None:
+            if limit is None:
+                return await _replay_session(client, recorder, session_turns, started, args)
+            async with limit:
+                await _replay_session(client, recorder, session_turns, started, args)
+
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(_monitor_loop_lag(recorder, args.lag_interval, stop))
+        try:
+            await asyncio.gather(*(replay(session_turns) for session_turns in sessions.values()))
+        finally:
+            stop.set()
+            await monitor
+        elapsed = time.perf_counter() - started
+        cassette_stats = cassette.get_stats()
+
+    return {
+        "name": args.name,
+        "started_at": started_at,
+        "settings": {
+            "cassette": args.cassette,
+            "time_scale": args.time_scale,
+            "arrival_scale": args.arrival_scale,
+            "concurrency": args.concurrency or None,
+            "mongo": "mongod" if args.mongo_url else "mongomock",
+            "overrides": overrides,
+        },
+        "recorded": {
+            "turns": len(turns),
+            "sessions": len(sessions),
+            "duration_seconds": turns[-1]["offset"],
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "endpoints": {
+            name: {
+                "count": len(samples),
+                "errors": recorder.errors[name],
+                "throughput_rps": round(len(samples) / elapsed, 3),
+                **_percentiles(samples),
+            }
+            for name, samples in recorder.latencies.items()
+        },
+        "event_loop_lag": _percentiles(recorder.loop_lag),
+        "cassette": cassette_stats,
+        "llm": llm_metrics.get_stats(),
+        "hedging": hedging_stats.get_stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cassette", help="Cassette directory (CASSETTE_DIR of the recording)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplier for recorded call times (0 = instant)")
+    parser.add_argument("--arrival-scale", type=float, default=1.0, help="Multiplier for recorded arrival times (0 = all at once)")
+    parser.add_argument("--concurrency", type=int, default=0, help="Sessions replayed at once (0 = as recorded)")
+    parser.add_argument("--mongo-url", default=None, help="Use a local mongod instead of mongomock-motor")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="Event-loop lag sampling interval (seconds)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Override a Config setting")
+    parser.add_argument("--name", default=None, help="Run name (default: a timestamp)")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<name>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+    args.name = args.name or datetime.now().strftime("replay-%Y%m%d-%H%M%S")
+
+    quiet_logging()
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, default=str))
+    for warning in report["cassette"]["warnings"]:
+        print(f"Warning: {warning}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{args.name}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, default=str))
+    print(f"Saved results to {output}")
+
+    if args.compare:
+        print("\n".join(compare(report, json.loads(Path(args.compare).read_text()))))
+
+
+if __name__ == "__main__":
+    main()
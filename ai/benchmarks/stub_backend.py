@@ -0,0 +1,289 @@
+"""
+Local stub of the backend REST API with seeded customers, products,
+inventory and transactions.
+
+Serves the /v1 endpoints the agent tools call, with the backend's
+{statusCode, title, message, data, error} envelope and {rows, count} list
+pages. The load test mounts it in-process; it can also run on its own.
+
+Usage (from the ai/ directory):
+    python -m benchmarks.stub_backend --port 8080 --customers 200 --latency lognormal:0.02:0.5
+"""
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import argparse
+import random
+from benchmarks.fakes import Latency, seed_id
+
+CATEGORIES = ("ELECTRONICS", "CLOTHING", "HOME", "BEAUTY", "SPORTS", "OTHERS")
+CITIES = ("Bangkok", "Chiang Mai", "Chiang Rai", "Phuket", "Khon Kaen", "Hat Yai", "Udon Thani")
+WAREHOUSES = ("Central", "North", "South", "East")
+FIRST_NAMES = ("Anan", "Somchai", "Malee", "Nok", "Preecha", "Suda", "Wichai", "Kanya", "Arthit", "Ploy")
+LAST_NAMES = ("Srisuk", "Chaiyaporn", "Wongsawat", "Thongdee", "Kaewmanee", "Boonmee", "Rattanakul")
+
+
+class StubData:
+    """Deterministic store data generated from a seed"""
+
+    def __init__(
+        self,
+        customers: int = 200,
+        products: int = 100,
+        transactions: int = 1000,
+        seed: int = 42,
+    ):
+        rng = random.Random(seed)
+        now = datetime(2025, 12, 31, 12, tzinfo=timezone.utc)
+
+        self.customers: List[Dict[str, Any]] = []
+        for n in range(1, customers + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            self.customers.append({
+                "uuid": seed_id("customers", n),
+                "customer_code": f"CUS-{n:05d}",
+                "first_name": first,
+                "last_name": last,
+                "phone": f"08{rng.randint(10000000, 99999999)}",
+                "email": f"{first.lower()}.{last.lower()}{n}@example.com",
+                "address": f"{rng.randint(1, 999)} Moo {rng.randint(1, 12)}",
+                "city": rng.choice(CITIES),
+                "postal_code": str(rng.randint(10000, 99999)),
+                "customer_type": rng.choice(("INDIVIDUAL", "BUSINESS")),
+                "is_active": rng.random() > 0.1,
+            })
+
+        self.products: List[Dict[str, Any]] = []
+        for n in range(1, products + 1):
+            category = rng.choice(CATEGORIES)
+            cost = round(rng.uniform(20, 5000), 2)
+            self.products.append({
+                "uuid": seed_id("products", n),
+                "product_code": f"PRD-{n:05d}",
+                "product_name": f"{category.title()} Item {n}",
+                "category": category,
+                "cost_price": cost,
+                "selling_price": round(cost * rng.uniform(1.1, 1.8), 2),
+                "is_active": rng.random() > 0.05,
+            })
+
+        self.inventories: List[Dict[str, Any]] = []
+        for product in self.products:
+            for warehouse in rng.sample(WAREHOUSES, 2):
+                self.inventories.append({
+                    "uuid": seed_id("inventories", len(self.inventories) + 1),
+                    "product_uuid": product["uuid"],
+                    "warehouse_name": warehouse,
+                    "quantity": rng.randint(0, 200),
+                    "is_active": True,
+                })
+
+        self.transactions: List[Dict[str, Any]] = []
+        for n in range(1, transactions + 1):
+            customer = rng.choice(self.customers)
+            sale_date = now - timedelta(days=rng.uniform(0, 365))
+            items = []
+            for product in rng.sample(self.products, min(len(self.products), rng.randint(1, 4))):
+                quantity = rng.randint(1, 5)
+                items.append({
+                    "product_uuid": product["uuid"],
+                    "quantity": quantity,
+                    "unit_price": product["selling_price"],
+                    "subtotal": round(quantity * product["selling_price"], 2),
+                })
+            subtotal = round(sum(item["subtotal"] for item in items), 2)
+            tax = round(subtotal * 0.07, 2)
+            payment_status = rng.choices(("PAID", "PENDING", "FAILED"), (0.8, 0.15, 0.05))[0]
+            self.transactions.append({
+                "uuid": seed_id("transactions", n),
+                "sale_date": sale_date.isoformat(),
+                "customer_uuid": customer["uuid"],
+                "customer": {key: customer[key] for key in ("uuid", "customer_code", "first_name", "last_name")},
+                "subtotal": subtotal,
+                "tax_amount": tax,
+                "discount_amount": 0,
+                "total_amount": round(subtotal + tax, 2),
+                "payment_method": rng.choice(("CASH", "CREDIT_CARD", "QR_CODE")),
+                "payment_status": payment_status,
+                "due_date": (sale_date + timedelta(days=30)).isoformat(),
+                "status": "PENDING" if payment_status == "PENDING" else "COMPLETED",
+                "updated_at": sale_date.isoformat(),
+                "items": items,
+            })
+
+        self.by_id = {
+            kind: {row["uuid"]: row for row in rows}
+            for kind, rows in (
+                ("customers", self.customers),
+                ("products", self.products),
+                ("inventories", self.inventories),
+                ("transactions", self.transactions),
+            )
+        }
+
+
+def _envelope(data: Any, status_code: int = 200) -> JSONResponse:
+    title = "Success" if status_code == 200 else "Not Found Error"
+    message = (
+        "Operation completed successfully."
+        if status_code == 200
+        else "The provided id is not found, Please check your input id."
+    )
+    return JSONResponse(
+        {"statusCode": status_code, "title": title, "message": message, "data": data, "error": None},
+        status_code=status_code,
+    )
+
+
+def _page(rows: List[Dict[str, Any]], page: int, limit: int) -> JSONResponse:
+    start = (max(page, 1) - 1) * limit
+    return _envelope({"rows": rows[start : start + limit], "count": len(rows)})
+
+
+def _in_range(row: Dict[str, Any], start_date: str, end_date: str) -> bool:
+    return start_date <= row["sale_date"][:10] <= end_date
+
+
+def create_app(data: Optional[StubData] = None, latency: str = "none", seed: Optional[int] = None) -> FastAPI:
+    """Build the stub backend app; every request waits for a latency drawn from `latency`"""
+    data = data or StubData()
+    delay = Latency(latency, seed)
+    app = FastAPI(title="Stub Backend")
+    app.state.data = data
+    app.state.requests = 0
+
+    @app.middleware("http")
+    async def simulate_latency(request: Request, call_next):
+        app.state.requests += 1
+        await delay.wait()
+        return await call_next(request)
+
+    def detail(kind: str, id: str) -> JSONResponse:
+        row = data.by_id[kind].get(id)
+        return _envelope(row) if row else _envelope(None, 404)
+
+    @app.get("/v1/customers/list")
+    async def customer_list(page: int = 1, limit: int = 10):
+        return _page(data.customers, page, limit)
+
+    @app.get("/v1/customers/{id}")
+    async def customer_details(id: str):
+        return detail("customers", id)
+
+    @app.get("/v1/products/list/page")
+    async def product_list(page: int = 1, limit: int = 10):
+        return _page(data.products, page, limit)
+
+    @app.get("/v1/products/{id}")
+    async def product_details(id: str):
+        return detail("products", id)
+
+    @app.get("/v1/inventories/list/page")
+    async def inventory_list(page: int = 1, limit: int = 10):
+        return _page(data.inventories, page, limit)
+
+    @app.get("/v1/inventories/{id}")
+    async def inventory_details(id: str):
+        return detail("inventories", id)
+
+    @app.get("/v1/transactions/list")
+    async def transaction_list(page: int = 1, limit: int = 10):
+        rows = [{key: value for key, value in row.items() if key != "items"} for row in data.transactions]
+        return _page(rows, page, limit)
+
+    @app.get("/v1/transactions")
+    async def transaction_all():
+        return _envelope(data.transactions)
+
+    @app.get("/v1/transactions/{id}")
+    async def transaction_details(id: str):
+        return detail("transactions", id)
+
+    @app.get("/v1/analytics/sales-summary")
+    async def sales_summary(start_date: str = Query(...), end_date: str = Query(...)):
+        rows = [row for row in data.transactions if row["status"] != "CANCELLED" and _in_range(row, start_date, end_date)]
+        return _envelope({
+            "total_revenue": round(sum(row["total_amount"] for row in rows), 2),
+            "transaction_count": len(rows),
+            "period": {"start": start_date, "end": end_date},
+        })
+
+    @app.get("/v1/analytics/top-products")
+    async def top_products(start_date: str = Query(...), end_date: str = Query(...), limit: int = 5):
+        totals: Dict[str, List[float]] = {}
+        for row in data.transactions:
+            if _in_range(row, start_date, end_date):
+                for item in row["items"]:
+                    total = totals.setdefault(item["product_uuid"], [0, 0.0])
+                    total[0] += item["quantity"]
+                    total[1] += item["subtotal"]
+        ranked = sorted(totals.items(), key=lambda entry: entry[1][0], reverse=True)[:limit]
+        return _envelope([
+            {
+                "product_uuid": uuid,
+                "product_name": data.by_id["products"][uuid]["product_name"],
+                "product_code": data.by_id["products"][uuid]["product_code"],
+                "category": data.by_id["products"][uuid]["category"],
+                "total_quantity": quantity,
+                "total_revenue": round(revenue, 2),
+            }
+            for uuid, (quantity, revenue) in ranked
+        ])
+
+    @app.get("/v1/analytics/low-stock")
+    async def low_stock(threshold: int = 10):
+        return _envelope([
+            {
+                "inventory_uuid": row["uuid"],
+                "warehouse_name": row["warehouse_name"],
+                "quantity": row["quantity"],
+                "product_uuid": row["product_uuid"],
+                "product_name": data.by_id["products"][row["product_uuid"]]["product_name"],
+                "product_code": data.by_id["products"][row["product_uuid"]]["product_code"],
+                "category": data.by_id["products"][row["product_uuid"]]["category"],
+            }
+            for row in data.inventories
+            if row["is_active"] and row["quantity"] <= threshold
+        ])
+
+    @app.get("/v1/analytics/pending-payments")
+    async def pending_payments():
+        return _envelope([
+            {
+                "transaction_uuid": row["uuid"],
+                "sale_date": row["sale_date"],
+                "due_date": row["due_date"],
+                "total_amount": row["total_amount"],
+                "payment_method": row["payment_method"],
+                "payment_status": row["payment_status"],
+                "status": row["status"],
+                "customer_uuid": row["customer_uuid"],
+                "customer_code": row["customer"]["customer_code"],
+                "customer_name": f"{row['customer']['first_name']} {row['customer']['last_name']}",
+            }
+            for row in data.transactions
+            if row["payment_status"] == "PENDING"
+        ])
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--customers", type=int, default=200, help="Seeded customers")
+    parser.add_argument("--products", type=int, default=100, help="Seeded products")
+    parser.add_argument("--transactions", type=int, default=1000, help="Seeded transactions")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the data and latencies")
+    parser.add_argument("--latency", default="none", help="Per-request latency, e.g. fixed:0.01 or lognormal:0.02:0.5")
+    args = parser.parse_args()
+
+    data = StubData(args.customers, args.products, args.transactions, args.seed)
+    uvicorn.run(create_app(data, args.latency, args.seed), port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
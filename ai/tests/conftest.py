@@ -0,0 +1,54 @@
+import os
+
+# Config reads and validates these at import time; tests never reach the real services
+TEST_ENV = {
+    "PORT": "8000",
+    "GOOGLE_API_KEY": "test",
+    "LANGSMITH_API_KEY": "test",
+    "LANGSMITH_TRACING": "false",
+    "BACKEND_API_BASE_URL": "http://backend.test/v1",
+    "MONGO_INITDB_ROOT_USERNAME": "test",
+    "MONGO_INITDB_ROOT_PASSWORD": "test",
+    "MONGO_INITDB_DATABASE": "test",
+    "MONGODB_COLLECTION_CHAT_HISTORY": "history_store",
+}
+for name, value in TEST_ENV.items():
+    os.environ.setdefault(name, value)
+
+import asyncio
+import pytest
+from benchmarks.fakes import scripted_model_factory
+from benchmarks.offline import offline_app
+from benchmarks.stub_backend import StubData, create_app
+from app.config.config import Config
+
+# Background loops and caches that would make in-process runs depend on timing
+OFFLINE_SETTINGS = {
+    "CACHE_ENABLED": False,
+    "ANSWER_CACHE_ENABLED": False,
+    "ENTITY_INDEX_ENABLED": False,
+    "ANALYTICS_ENGINE_ENABLED": False,
+    "ENTITY_STORE_ENABLED": False,
+}
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """
+    Run `scenario(client)` against the app in-process.
+
+    The backend is a small stub store, MongoDB is mongomock-motor and models
+    follow the scripted `rules` (the benchmark script by default).
+    """
+    for name, value in OFFLINE_SETTINGS.items():
+        monkeypatch.setattr(Config, name, value)
+
+    def run(scenario, rules=None):
+        async def main():
+            backend = create_app(StubData(customers=20, products=10, transactions=50))
+            async with offline_app(scripted_model_factory(rules=rules), backend_app=backend) as client:
+                return await scenario(client)
+
+        return asyncio.run(main())
+
+    return run
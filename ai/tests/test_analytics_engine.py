@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from app.core import analytics_engine as module
+from app.core.analytics_engine import AnalyticsEngine
+
+pytest.importorskip("numpy")
+
+
+def _transaction(uuid, updated_at="2025-01-01T00:00:00.000Z"):
+    return {
+        "uuid": uuid,
+        "sale_date": "2025-01-15T10:00:00.000Z",
+        "status": "COMPLETED",
+        "payment_status": "PAID",
+        "total_amount": "100.00",
+        "updated_at": updated_at,
+    }
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Serve transaction pages from `state["pages"]` and record cache invalidations"""
+    state = {"pages": [], "count": 0, "invalidated": []}
+
+    async def iter_pages(endpoint, *args, **kwargs):
+        for number, rows in enumerate(state["pages"], start=1):
+            yield {"page": number, "rows": rows, "count": state["count"]}
+
+    async def load_items(self, uuids):
+        return {uuid: [("product-1", 1.0, 100.0)] for uuid in uuids}
+
+    async def load_products(self):
+        return None
+
+    monkeypatch.setattr(module, "iter_pages", iter_pages)
+    monkeypatch.setattr(module, "invalidate_cache", state["invalidated"].append)
+    monkeypatch.setattr(AnalyticsEngine, "_load_items", load_items)
+    monkeypatch.setattr(AnalyticsEngine, "_load_products", load_products)
+    return state
+
+
+def test_overlapping_pages_do_not_drop_transactions(backend):
+    engine = AnalyticsEngine()
+    backend["pages"], backend["count"] = [[_transaction("a"), _transaction("b")], [_transaction("c")]], 3
+    asyncio.run(engine.refresh())
+
+    # Page 2 repeats "b" instead of returning "c": as many rows as the total, but not every uuid
+    backend["pages"] = [[_transaction("a"), _transaction("b")], [_transaction("b")]]
+    asyncio.run(engine.refresh())
+
+    assert set(engine._transactions) == {"a", "b", "c"}
+
+
+def test_complete_scan_drops_deleted_transactions(backend):
+    engine = AnalyticsEngine()
+    backend["pages"], backend["count"] = [[_transaction("a"), _transaction("b")]], 2
+    asyncio.run(engine.refresh())
+
+    backend["pages"], backend["count"] = [[_transaction("a")]], 1
+    assert asyncio.run(engine.refresh()) == 1
+    assert set(engine._transactions) == {"a"}
+
+
+def test_refresh_invalidates_only_on_change(backend):
+    engine = AnalyticsEngine()
+    backend["pages"], backend["count"] = [[_transaction("a")]], 1
+    asyncio.run(engine.refresh())
+    backend["invalidated"].clear()
+
+    asyncio.run(engine.refresh())
+    assert backend["invalidated"] == []
+
+    backend["pages"] = [[_transaction("a", updated_at="2025-02-01T00:00:00.000Z")]]
+    asyncio.run(engine.refresh())
+    assert backend["invalidated"] == ["/transactions", "/analytics"]
@@ -0,0 +1,68 @@
+import pytest
+from app.config.config import Config
+from app.core.answer_cache import AnswerCache
+
+OUTPUTS = [
+    {
+        "tool": "filter_records",
+        "args": {},
+        "output": {"success": True, "endpoint_used": "/customers/list", "method": "GET"},
+    }
+]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(Config, "ANSWER_CACHE_ENABLED", True)
+    return AnswerCache(["filter_records"])
+
+
+def test_paraphrase_reuses_the_answer(cache):
+    assert cache.store("How many customers do we have in Bangkok?", "42", "filter_records", OUTPUTS)
+
+    hit = cache.lookup("Please tell me how many customers we have in bangkok")
+
+    assert hit is not None and hit["response"] == "42"
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "How many customers do we have in Bangkok Noi?",
+        "How many customers do we have in Chiang Mai?",
+        "How many customers do we have in Bangkok in 2024?",
+        "How many inactive customers do we have in Bangkok?",
+    ],
+)
+def test_different_names_numbers_or_polarity_miss(cache, question):
+    cache.store("How many customers do we have in Bangkok?", "42", "filter_records", OUTPUTS)
+
+    assert cache.lookup(question) is None
+
+
+@pytest.mark.parametrize("question", ["what about chiang mai", "And in Phuket?", "How many of them are active?"])
+def test_follow_ups_are_never_cached(cache, question):
+    assert not cache.store(question, "7", "filter_records", OUTPUTS, scope="session-a")
+    assert cache.lookup(question, "session-a") is None
+
+
+def test_mid_conversation_answers_stay_in_their_session(cache):
+    cache.store("Customers in Chiang Mai", "7", "filter_records", OUTPUTS, scope="session-a")
+
+    assert cache.lookup("Customers in Chiang Mai", "session-b") is None
+    assert cache.lookup("Customers in Chiang Mai") is None
+    assert cache.lookup("Customers in Chiang Mai", "session-a")["response"] == "7"
+
+
+def test_fresh_session_answers_are_not_used_mid_conversation(cache):
+    cache.store("Customers in Chiang Mai", "7", "filter_records", OUTPUTS)
+
+    assert cache.lookup("Customers in Chiang Mai", "session-a") is None
+
+
+def test_exact_hit_reads_the_entry_once(cache):
+    cache.store("Customers in Chiang Mai", "7", "filter_records", OUTPUTS)
+    hits, misses = cache._answers.hits, cache._answers.misses
+
+    assert cache.lookup("customers in chiang mai?")["similarity"] == 1.0
+    assert (cache._answers.hits - hits, cache._answers.misses - misses) == (1, 0)
@@ -0,0 +1,82 @@
+import asyncio
+import httpx
+import pytest
+from app.config.config import Config
+from app.utils import api
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """A mock backend behind the app's client builder; counts clients and concurrent requests"""
+    state = {"clients": [], "in_flight": 0, "max_in_flight": 0, "requests": []}
+
+    async def handler(request):
+        state["requests"].append(request.url.path.removeprefix(httpx.URL(Config.BACKEND_API_BASE_URL).path))
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(404, json={"message": "Not found"})
+        return httpx.Response(200, json={"data": {"uuid": request.url.path.rsplit("/", 1)[-1]}})
+
+    def build():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        state["clients"].append(client)
+        return client
+
+    monkeypatch.setattr(Config, "CACHE_ENABLED", False)
+    monkeypatch.setattr(api, "_build_client", build)
+    monkeypatch.setattr(api, "_client", None)
+    return state
+
+
+def test_requests_share_one_pooled_client(backend):
+    async def scenario():
+        await api.init_http_client()
+        await asyncio.gather(*(api.fetch("GET", f"/customers/{n}") for n in range(5)))
+        await api.fetch("PUT", "/customers/1", data={})
+        shared = api.get_http_client()
+        await api.close_http_client()
+        return shared
+
+    shared = asyncio.run(scenario())
+
+    assert backend["clients"] == [shared]
+    assert shared.is_closed
+    assert len(backend["requests"]) == 6
+
+
+def test_client_is_rebuilt_after_close(backend):
+    async def scenario():
+        await api.fetch("GET", "/customers/1")
+        await api.close_http_client()
+        await api.fetch("GET", "/customers/2")
+        await api.close_http_client()
+
+    asyncio.run(scenario())
+
+    assert len(backend["clients"]) == 2
+
+
+def test_batch_fetches_each_id_once_within_the_concurrency_limit(backend, monkeypatch):
+    monkeypatch.setattr(Config, "BATCH_MAX_CONCURRENCY", 2)
+    ids = ["a", "b", "a", " c ", "missing", "d", ""]
+
+    result = asyncio.run(api.fetch_by_ids("/customers", ids))
+
+    assert result["success"] is True
+    assert [entry["id"] for entry in result["data"]["results"]] == ["a", "b", "c", "missing", "d"]
+    assert (result["data"]["succeeded"], result["data"]["failed"]) == (4, 1)
+    assert result["data"]["results"][3]["success"] is False
+    assert sorted(backend["requests"]) == ["/customers/a", "/customers/b", "/customers/c", "/customers/d", "/customers/missing"]
+    assert backend["max_in_flight"] == 2
+
+
+def test_batch_rejects_too_many_ids(backend, monkeypatch):
+    monkeypatch.setattr(Config, "BATCH_MAX_IDS", 3)
+
+    result = asyncio.run(api.fetch_by_ids("/customers", ["a", "b", "c", "d"]))
+
+    assert result["success"] is False and "maximum is 3" in result["error"]
+    assert backend["requests"] == []
@@ -0,0 +1,182 @@
+import asyncio
+import gc
+import pytest
+from app.config.config import Config
+from app.utils import api
+from app.utils.singleflight import SingleFlight
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """A backend whose GETs set `started`, wait for `release` and return the `value` read on arrival"""
+    state = {"value": "before", "gets": 0, "started": None, "release": None}
+
+    async def request(method, endpoint, data=None, params=None):
+        if method != "GET":
+            state["value"] = "after"
+            return {"success": True, "data": None, "endpoint_used": endpoint, "method": method}
+        state["gets"] += 1
+        value = state["value"]
+        state["started"].set()
+        await state["release"].wait()
+        return {"success": True, "data": value, "endpoint_used": endpoint, "method": method}
+
+    monkeypatch.setattr(Config, "CACHE_ENABLED", True)
+    monkeypatch.setattr(api, "_request", request)
+    api.response_cache.clear()
+    return state
+
+
+def test_get_in_flight_during_a_write_is_not_cached_or_joined(backend):
+    async def scenario():
+        backend["started"], backend["release"] = asyncio.Event(), asyncio.Event()
+        before = asyncio.create_task(api.fetch("GET", "/customers/list"))
+        await backend["started"].wait()
+
+        await api.fetch("PUT", "/customers/1", data={})
+        after = asyncio.create_task(api.fetch("GET", "/customers/list"))
+        await asyncio.sleep(0)
+
+        backend["release"].set()
+        return await before, await after, await api.fetch("GET", "/customers/list")
+
+    before, after, cached = asyncio.run(scenario())
+
+    assert before["data"] == "before"
+    assert after["data"] == "after"
+    assert cached["data"] == "after"
+    assert backend["gets"] == 2
+
+
+def test_identical_gets_share_one_request(backend):
+    async def scenario():
+        backend["started"], backend["release"] = asyncio.Event(), asyncio.Event()
+        calls = [asyncio.create_task(api.fetch("GET", "/products/list/page")) for _ in range(3)]
+        await asyncio.sleep(0)
+        backend["release"].set()
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(scenario())
+
+    assert [result["data"] for result in results] == ["before"] * 3
+    assert backend["gets"] == 1
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    """Ten pages of one row; page 3 fails, pages after it take a while"""
+    state = {"finished": []}
+
+    async def request(method, endpoint, data=None, params=None):
+        page = params["page"]
+        if page == 3:
+            return {"success": False, "error": "boom", "endpoint_used": endpoint, "method": method}
+        if page > 3:
+            await asyncio.sleep(1)
+        state["finished"].append(page)
+        return {
+            "success": True,
+            "data": {"data": {"rows": [{"uuid": str(page)}], "count": 10}},
+            "endpoint_used": endpoint,
+            "method": method,
+        }
+
+    monkeypatch.setattr(Config, "FETCH_ALL_CONCURRENCY", 4)
+    monkeypatch.setattr(api, "_request", request)
+    return state
+
+
+def _other_tasks():
+    return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+
+def test_failed_page_stops_the_prefetches(pages):
+    async def scenario():
+        seen = []
+        with pytest.raises(api.FetchError):
+            async for page in api.iter_pages("/customers/list", page_size=1, cache=False):
+                seen.append(page["page"])
+        return seen, _other_tasks()
+
+    seen, left = asyncio.run(scenario())
+
+    assert seen == [1, 2]
+    assert left == []
+    assert pages["finished"] == [1, 2]
+
+
+def test_stopping_early_stops_the_prefetches(pages):
+    async def scenario():
+        iterator = api.iter_pages("/customers/list", page_size=1, cache=False)
+        async for page in iterator:
+            if page["page"] == 2:
+                break
+        await iterator.aclose()
+        return _other_tasks()
+
+    assert asyncio.run(scenario()) == []
+
+
+def _shared_call(outcome):
+    """A call that waits for `release`, then returns or raises `outcome`"""
+    state = {"runs": 0, "finished": False, "release": None}
+
+    async def call():
+        state["runs"] += 1
+        await state["release"].wait()
+        state["finished"] = True
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return state, call
+
+
+@pytest.mark.parametrize("outcome", ["rows", RuntimeError("backend down")])
+def test_cancelled_waiter_leaves_the_shared_call_running(outcome):
+    group = SingleFlight()
+    state, call = _shared_call(outcome)
+
+    async def scenario():
+        state["release"] = asyncio.Event()
+        waiters = [asyncio.create_task(group.do("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        state["release"].set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        return results, group.get_stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == [outcome, outcome]
+    assert state["runs"] == 1 and state["finished"]
+    assert stats == {"in_flight": 0, "executions": 1, "coalesced": 2}
+
+
+def test_call_finishes_after_every_waiter_gave_up():
+    group = SingleFlight()
+    state, call = _shared_call(RuntimeError("backend down"))
+    errors = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        state["release"] = asyncio.Event()
+        waiters = [asyncio.create_task(group.do("key", call)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+        state["release"].set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        gc.collect()
+        return group.get_stats()
+
+    stats = asyncio.run(scenario())
+
+    assert state["finished"]
+    assert stats["in_flight"] == 0
+    assert errors == []
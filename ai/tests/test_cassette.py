@@ -0,0 +1,43 @@
+import json
+import pytest
+from app.config.config import Config
+from app.core.cassette import LLM_FILE, Cassette
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    entry = {"key": "exact-1", "loose_key": "loose-1", "seconds": 0, "message": {"content": "hi", "tool_calls": []}}
+    (tmp_path / LLM_FILE).write_text(json.dumps(entry) + "\n")
+    cassette = Cassette()
+    cassette.start("replay", str(tmp_path))
+    yield cassette
+    cassette.stop()
+
+
+def test_loose_matching_is_off_by_default(cassette, monkeypatch):
+    monkeypatch.setattr(Config, "CASSETTE_LOOSE_MATCH", False)
+
+    assert cassette.lookup(LLM_FILE, "exact-1", "loose-1") is not None
+    assert cassette.lookup(LLM_FILE, "exact-2", "loose-1") is None
+    assert cassette.get_stats()["warnings"] == []
+
+
+def test_loose_hits_are_reported_as_warnings(cassette, monkeypatch):
+    monkeypatch.setattr(Config, "CASSETTE_LOOSE_MATCH", True)
+
+    assert cassette.lookup(LLM_FILE, "exact-2", "loose-1") is not None
+    stats = cassette.get_stats()
+    assert stats["llm_loose_hits"] == 1
+    assert len(stats["warnings"]) == 1
+
+
+def test_replay_needs_no_model_or_tracing_keys(monkeypatch):
+    monkeypatch.setattr(Config, "GOOGLE_API_KEY", None)
+    monkeypatch.setattr(Config, "LANGSMITH_API_KEY", None)
+
+    monkeypatch.setattr(Config, "CASSETTE_MODE", "replay")
+    Config.validate()
+
+    monkeypatch.setattr(Config, "CASSETTE_MODE", "off")
+    with pytest.raises(ValueError):
+        Config.validate()
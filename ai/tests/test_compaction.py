@@ -0,0 +1,100 @@
+import pytest
+from app.config.config import Config
+from app.core.compaction import compact_tool_output, estimate_tokens
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_OUTPUT_COMPACTION", True)
+    monkeypatch.setattr(Config, "TOOL_OUTPUT_MAX_ROWS", 20)
+    monkeypatch.setattr(Config, "TOOL_OUTPUT_TOKEN_BUDGET", 2000)
+
+
+def _transaction(n):
+    return {
+        "uuid": f"t-{n}",
+        "sale_date": "2025-01-15T00:00:00.000Z",
+        "total_amount": "1250.50",
+        "discount_amount": "0.00",
+        "payment_status": "pending",
+        "due_date": None,
+        "created_at": "2025-01-15T09:30:12.000Z",
+        "notes": "internal",
+        "customer": {"customer_code": "CUS-00012", "first_name": "Ann", "last_name": "Lee", "address": "1 Road"},
+        "items": [{"product_uuid": "p-1", "quantity": 2, "unit_price": "625.25", "subtotal": "1250.50", "id": 9}],
+    }
+
+
+def _listed(rows, **extra):
+    """A list result as fetch() returns it"""
+    return {"success": True, "data": {"success": True, "data": {"rows": rows, **extra}}}
+
+
+def test_rows_keep_only_the_fields_the_model_needs():
+    output = compact_tool_output("get_transaction_list", _listed([_transaction(1)], count=1))
+
+    assert output == {
+        "success": True,
+        "data": {
+            "count": 1,
+            "rows": [
+                {
+                    "uuid": "t-1",
+                    "sale_date": "2025-01-15",
+                    "total_amount": 1250.5,
+                    "discount_amount": 0,
+                    "payment_status": "pending",
+                    "customer": {"customer_code": "CUS-00012", "first_name": "Ann", "last_name": "Lee"},
+                    "items": [{"product_uuid": "p-1", "quantity": 2, "unit_price": 625.25, "subtotal": 1250.5}],
+                }
+            ],
+        },
+    }
+
+
+def test_long_lists_are_capped_with_a_marker(monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_OUTPUT_MAX_ROWS", 3)
+
+    data = compact_tool_output("get_transaction_list", _listed([_transaction(n) for n in range(10)]))["data"]
+
+    assert [row["uuid"] for row in data["rows"]] == ["t-0", "t-1", "t-2"]
+    assert data["more_rows"] == "7 more rows not shown"
+
+
+def test_rows_are_dropped_until_the_result_fits_the_budget(monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_OUTPUT_TOKEN_BUDGET", 300)
+
+    output = compact_tool_output("get_transaction_list", _listed([_transaction(n) for n in range(20)]))
+
+    assert estimate_tokens(output["data"]) <= 300
+    assert 0 < len(output["data"]["rows"]) < 20
+    assert output["data"]["more_rows"] == f"{20 - len(output['data']['rows'])} more rows not shown"
+
+
+def test_batch_results_are_unwrapped_and_failures_kept_short():
+    output = compact_tool_output(
+        "get_customer_details_batch",
+        {
+            "success": True,
+            "data": {
+                "results": [
+                    {"id": "c-1", "success": True, "data": {"success": True, "data": {"uuid": "c-1", "city": "Bangkok", "updated_at": "x"}}},
+                    {"id": "c-2", "success": False, "error": "Not found"},
+                ]
+            },
+        },
+    )
+
+    assert output["data"]["rows"] == [{"uuid": "c-1", "city": "Bangkok"}, {"id": "c-2", "error": "Not found"}]
+
+
+def test_errors_and_unlisted_tools_pass_through(monkeypatch):
+    assert compact_tool_output("get_sales_summary", {"success": False, "error": "boom", "status": 500}) == {
+        "success": False,
+        "error": "boom",
+    }
+    summary = {"success": True, "data": {"success": True, "data": {"total_sales": "10.50", "code": "007"}}}
+    assert compact_tool_output("get_sales_summary", summary)["data"] == {"total_sales": 10.5, "code": "007"}
+
+    monkeypatch.setattr(Config, "TOOL_OUTPUT_COMPACTION", False)
+    assert compact_tool_output("get_transaction_list", _listed([_transaction(1)])) == _listed([_transaction(1)])
@@ -0,0 +1,61 @@
+import asyncio
+from app.config.config import Config
+from app.core import agent
+from app.core.entity_index import EntityIndex
+from app.tools import entities, get_all_tools
+
+
+def test_resolve_entity_is_registered_only_when_enabled(monkeypatch):
+    monkeypatch.setattr(Config, "ENTITY_INDEX_ENABLED", False)
+    assert "resolve_entity" not in [tool.name for tool in get_all_tools()]
+    assert "resolve_entity" not in agent.build_system_prompt()
+
+    monkeypatch.setattr(Config, "ENTITY_INDEX_ENABLED", True)
+    assert "resolve_entity" in [tool.name for tool in get_all_tools()]
+    assert "resolve_entity" in agent.build_system_prompt()
+
+
+def test_lookup_before_the_index_is_built_does_not_build_it(monkeypatch):
+    index = EntityIndex()
+    refreshed = []
+
+    async def refresh():
+        refreshed.append(True)
+        return 0
+
+    monkeypatch.setattr(index, "refresh", refresh)
+    monkeypatch.setattr(entities, "entity_index", index)
+
+    result = asyncio.run(entities.resolve_entity.ainvoke({"query": "John Smith"}))
+
+    assert result["success"] is False
+    assert refreshed == []
+
+
+def test_start_builds_the_index_in_the_background(monkeypatch):
+    index = EntityIndex()
+    release = None
+
+    async def refresh():
+        await release.wait()
+        index.last_refresh = 1.0
+        return 0
+
+    monkeypatch.setattr(index, "refresh", refresh)
+    monkeypatch.setattr(entities, "entity_index", index)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        index.start()
+        warming = await entities.resolve_entity.ainvoke({"query": "John Smith"})
+        release.set()
+        await asyncio.sleep(0)
+        ready = index.ready
+        await index.stop()
+        return warming, ready
+
+    warming, ready = asyncio.run(scenario())
+
+    assert warming["success"] is False and "warming up" in warming["error"]
+    assert ready
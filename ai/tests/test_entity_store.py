@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+from app.core import entity_store as module
+from app.core.entity_store import EntityStore
+
+CUSTOMERS = [
+    {"uuid": "c1", "customer_code": "CUS-00001", "first_name": "Somchai", "last_name": "Dee",
+     "phone": "0812345678", "postal_code": "10110", "city": "Bangkok", "is_active": True},
+    {"uuid": "c2", "customer_code": "CUS-00002", "first_name": "Malee", "last_name": "Suk",
+     "phone": "0899999999", "postal_code": "50000", "city": "Chiang Mai", "is_active": False},
+]
+TRANSACTIONS = [
+    {"uuid": "t1", "sale_date": "2025-01-31T10:15:00.000Z", "total_amount": "150.00", "updated_at": "1"},
+    {"uuid": "t2", "sale_date": "2025-01-31T23:59:00.000Z", "total_amount": "80.00", "updated_at": "1"},
+    {"uuid": "t3", "sale_date": "2025-02-01T00:00:00.000Z", "total_amount": "95.50", "updated_at": "1"},
+]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Serve each endpoint's pages from `state["pages"]` and record cache invalidations"""
+    state = {
+        "pages": {"/customers/list": [CUSTOMERS], "/transactions/list": [TRANSACTIONS]},
+        "counts": {},
+        "invalidated": [],
+    }
+
+    async def iter_pages(endpoint, *args, **kwargs):
+        pages = state["pages"].get(endpoint, [])
+        count = state["counts"].get(endpoint, sum(len(rows) for rows in pages))
+        for number, rows in enumerate(pages, start=1):
+            yield {"page": number, "rows": rows, "count": count}
+
+    monkeypatch.setattr(module, "iter_pages", iter_pages)
+    monkeypatch.setattr(module, "invalidate_cache", state["invalidated"].append)
+    return state
+
+
+@pytest.fixture
+def store(tmp_path, backend):
+    store = EntityStore(str(tmp_path / "entities.sqlite3"))
+    asyncio.run(store.sync())
+    yield store
+    asyncio.run(store.stop())
+
+
+def _uuids(store, resource, filters):
+    result = asyncio.run(store.query(resource, filters, sort_by="uuid", limit=50))
+    return [row["uuid"] for row in result["rows"]]
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        (["postal_code = 10110"], ["c1"]),
+        (["phone contains 0812"], ["c1"]),
+        (["city = bangkok"], ["c1"]),
+        (["is_active = true"], ["c1"]),
+    ],
+)
+def test_text_columns_compare_as_text(store, filters, expected):
+    assert _uuids(store, "customers", filters) == expected
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        (["sale_date = 2025-01-31"], ["t1", "t2"]),
+        (["sale_date <= 2025-01-31"], ["t1", "t2"]),
+        (["sale_date < 2025-01-31"], []),
+        (["sale_date > 2025-01-31"], ["t3"]),
+        (["sale_date >= 2025-02-01"], ["t3"]),
+        (["sale_date != 2025-01-31"], ["t3"]),
+        (["total_amount >= 95.5"], ["t1", "t3"]),
+    ],
+)
+def test_date_only_filters_cover_the_whole_day(store, filters, expected):
+    assert _uuids(store, "transactions", filters) == expected
+
+
+def test_numeric_column_rejects_text(store):
+    with pytest.raises(ValueError):
+        asyncio.run(store.query("transactions", ["total_amount > lots"]))
+
+
+def test_overlapping_pages_do_not_delete_rows(store, backend):
+    # Two rows as the backend reports, but "c1" twice and "c2" skipped
+    backend["pages"]["/customers/list"] = [[CUSTOMERS[0]], [CUSTOMERS[0]]]
+    backend["counts"]["/customers/list"] = 2
+    asyncio.run(store.sync())
+
+    assert _uuids(store, "customers", []) == ["c1", "c2"]
+    assert store.synced["customers"]["complete"] is False
+
+
+def test_complete_scan_deletes_missing_rows(store, backend):
+    backend["pages"]["/customers/list"] = [[CUSTOMERS[0]]]
+    asyncio.run(store.sync())
+
+    assert _uuids(store, "customers", []) == ["c1"]
+
+
+def test_sync_invalidates_only_changed_resources(store, backend):
+    assert "/customers" in backend["invalidated"]
+    backend["invalidated"].clear()
+
+    asyncio.run(store.sync())
+    assert backend["invalidated"] == []
+
+    backend["pages"]["/transactions/list"] = [[{**TRANSACTIONS[0], "updated_at": "2"}, *TRANSACTIONS[1:]]]
+    asyncio.run(store.sync())
+    assert backend["invalidated"] == ["/transactions"]
+
+
+def test_fields_the_store_does_not_keep_are_not_changes(store, backend):
+    backend["invalidated"].clear()
+    backend["pages"]["/customers/list"] = [[{**CUSTOMERS[0], "updated_at": "later", "orders": 3}, CUSTOMERS[1]]]
+
+    changed = asyncio.run(store.sync())
+
+    assert changed["customers"] == 0
+    assert backend["invalidated"] == []
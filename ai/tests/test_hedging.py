@@ -0,0 +1,235 @@
+from typing import Any, AsyncIterator, List
+import asyncio
+import time
+import pytest
+from google.api_core.exceptions import InvalidArgument, PermissionDenied, ResourceExhausted, ServiceUnavailable
+from langchain_core.language_models import BaseChatModel, FakeListChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
+from app.config.config import Config
+from app.core.hedging import HedgedChatModel, hedging_stats
+
+
+def _wrapped(message):
+    """An error as the Gemini client raises it, wrapped around the API error"""
+    try:
+        raise InvalidArgument(message)
+    except InvalidArgument as e:
+        try:
+            raise ChatGoogleGenerativeAIError(f"Invalid argument provided to Gemini: {e}") from e
+        except ChatGoogleGenerativeAIError as wrapped:
+            return wrapped
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_HEDGE_ENABLED", False)
+    monkeypatch.setattr(Config, "LLM_RETRY_BACKOFF", 0.0)
+    monkeypatch.setattr(Config, "LLM_MAX_RETRIES", 2)
+    hedging_stats.reset()
+    return HedgedChatModel(
+        primary=FakeListChatModel(responses=["primary"]),
+        fallback=FakeListChatModel(responses=["fallback"]),
+    )
+
+
+def _run_failing(model, error):
+    """Call the model with `error` on the primary; return the models it tried"""
+    tried = []
+
+    async def run(attempt_model):
+        tried.append(attempt_model)
+        if attempt_model is model.primary:
+            raise error
+        return "ok"
+
+    result = asyncio.run(model._call(run, streaming=False))
+    return result, tried
+
+
+@pytest.mark.parametrize(
+    "error",
+    [ResourceExhausted("quota"), ServiceUnavailable("overloaded"), TimeoutError("slow")],
+)
+def test_transient_errors_fall_back(model, error):
+    result, tried = _run_failing(model, error)
+
+    assert result == "ok"
+    assert tried == [model.primary, model.fallback]
+
+
+@pytest.mark.parametrize(
+    "error",
+    [_wrapped("bad schema"), PermissionDenied("bad key"), ValueError("prompt blocked")],
+)
+def test_client_errors_are_raised_without_retry(model, error):
+    with pytest.raises(type(error)):
+        _run_failing(model, error)
+
+    stats = hedging_stats.get_stats()
+    assert stats["retries"] == 0 and stats["fallbacks"] == 0
+    assert stats["client_errors"] == 1
+
+
+class SlowChatModel(BaseChatModel):
+    """
+    Fake model whose nth call answers "reply n" after delays[n] seconds.
+
+    When `gated`, the first call instead waits until a later call starts,
+    so both answer in the same event loop turn.
+    """
+
+    delays: List[float]
+    gated: bool = False
+    gate: Any = None
+    started: List[int] = Field(default_factory=list)
+    cancelled: List[int] = Field(default_factory=list)
+    closed: List[int] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        call = len(self.started)
+        self.started.append(call)
+        time.sleep(self.delays[call])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"reply {call}"))])
+
+    async def _wait(self, call: int) -> None:
+        try:
+            if self.gated and call == 0:
+                self.gate = asyncio.Event()
+                await self.gate.wait()
+            elif self.gated:
+                self.gate.set()
+            elif self.delays[call] > 0:
+                await asyncio.sleep(self.delays[call])
+        except asyncio.CancelledError:
+            self.cancelled.append(call)
+            raise
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        call = len(self.started)
+        self.started.append(call)
+        await self._wait(call)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"reply {call}"))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        call = len(self.started)
+        self.started.append(call)
+        try:
+            await self._wait(call)
+            for word in ("reply ", str(call)):
+                yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+        finally:
+            self.closed.append(call)
+
+
+@pytest.fixture
+def hedged(monkeypatch):
+    """Hedge after 0.05s, with no fallback model and no retries"""
+    monkeypatch.setattr(Config, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(Config, "LLM_HEDGE_DELAY", 0.05)
+    monkeypatch.setattr(Config, "LLM_HEDGE_MIN_SAMPLES", 1000)
+    monkeypatch.setattr(Config, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(Config, "LLM_TOTAL_BUDGET", 5.0)
+    hedging_stats.reset()
+
+    def build(delays, gated=False):
+        return HedgedChatModel(primary=SlowChatModel(delays=delays, gated=gated))
+
+    return build
+
+
+async def _invoke(model):
+    started = time.monotonic()
+    message = await model.ainvoke([HumanMessage(content="hi")])
+    # Let cancelled attempts run their cleanup
+    await asyncio.sleep(0.01)
+    return message.content, time.monotonic() - started
+
+
+def test_slow_call_is_hedged_and_the_hedge_wins(hedged):
+    model = hedged([1.0, 0.05])
+
+    content, elapsed = asyncio.run(_invoke(model))
+
+    assert content == "reply 1"
+    assert elapsed < 0.5
+    assert model.primary.cancelled == [0]
+    stats = hedging_stats.get_stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_first_call_beats_its_hedge(hedged):
+    model = hedged([0.1, 1.0])
+
+    content, elapsed = asyncio.run(_invoke(model))
+
+    assert content == "reply 0"
+    assert elapsed < 0.5
+    assert model.primary.cancelled == [1]
+    stats = hedging_stats.get_stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 0
+
+
+def test_fast_call_is_not_hedged(hedged):
+    model = hedged([0.0])
+
+    content, _ = asyncio.run(_invoke(model))
+
+    assert content == "reply 0"
+    assert model.primary.started == [0]
+    assert hedging_stats.get_stats()["hedges"] == 0
+
+
+def test_total_budget_cuts_off_slow_calls(hedged, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_TOTAL_BUDGET", 0.2)
+    model = hedged([5.0, 5.0])
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(_invoke(model))
+
+    assert time.monotonic() - started < 1.0
+    assert sorted(model.primary.cancelled) == [0, 1]
+    stats = hedging_stats.get_stats()
+    assert stats["budget_exhausted"] == 1 and stats["failures"] == 1
+
+
+def test_streaming_hedge_closes_the_losing_stream(hedged):
+    model = hedged([1.0, 0.05])
+
+    async def stream():
+        chunks = [chunk.content async for chunk in model.astream([HumanMessage(content="hi")])]
+        await asyncio.sleep(0.01)
+        return "".join(chunks)
+
+    assert asyncio.run(stream()) == "reply 1"
+    assert model.primary.cancelled == [0]
+    assert sorted(model.primary.closed) == [0, 1]
+    assert hedging_stats.get_stats()["hedge_wins"] == 1
+
+
+def test_streams_that_open_together_discard_the_loser(hedged):
+    # The hedge releases the first call, so both streams open in the same loop turn
+    model = hedged([0.0, 0.0], gated=True)
+
+    async def stream():
+        closed_at_first_chunk = None
+        chunks = []
+        async for chunk in model.astream([HumanMessage(content="hi")]):
+            if closed_at_first_chunk is None:
+                closed_at_first_chunk = list(model.primary.closed)
+            chunks.append(chunk.content)
+        return "".join(chunks), closed_at_first_chunk
+
+    content, closed_at_first_chunk = asyncio.run(stream())
+
+    winner = int(content.split()[-1])
+    assert closed_at_first_chunk == [1 - winner]
+    assert model.primary.cancelled == []
+    assert hedging_stats.get_stats()["hedges"] == 1
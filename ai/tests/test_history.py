@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from mongomock_motor import AsyncMongoMockClient
+from app.config.config import Config
+from app.core.history import HistoryWindow, estimate_tokens
+from app.core.memory import SessionService
+
+
+def _turns(count):
+    """`count` user/assistant turns, each with a tool call and its result in between"""
+    messages = []
+    for n in range(count):
+        messages += [
+            HumanMessage(content=f"question {n}"),
+            AIMessage(content="", tool_calls=[{"name": "lookup", "args": {}, "id": f"call-{n}"}]),
+            ToolMessage(content="x" * 500, tool_call_id=f"call-{n}"),
+            AIMessage(content=f"answer {n}"),
+        ]
+    return messages
+
+
+@pytest.fixture
+def window(monkeypatch):
+    monkeypatch.setattr(Config, "HISTORY_MAX_TURNS", 2)
+    monkeypatch.setattr(Config, "HISTORY_TOKEN_BUDGET", 2000)
+    monkeypatch.setattr(Config, "HISTORY_SUMMARY_ENABLED", True)
+    monkeypatch.setattr(Config, "HISTORY_SUMMARY_BATCH", 4)
+    service = SessionService(client=AsyncMongoMockClient())
+    return HistoryWindow(FakeListChatModel(responses=["the user asked about 0 to 2"]), service)
+
+
+def _contents(messages):
+    return [message.content for message in messages]
+
+
+def test_only_recent_turns_are_replayed_without_tool_messages(window, monkeypatch):
+    monkeypatch.setattr(Config, "HISTORY_SUMMARY_ENABLED", False)
+
+    summary, replay = asyncio.run(window.load("s1", _turns(5)))
+
+    assert summary == ""
+    assert _contents(replay) == ["question 3", "answer 3", "question 4", "answer 4"]
+
+
+def test_turns_stay_verbatim_until_the_summary_covers_them(window):
+    summary, replay = asyncio.run(window.load("s1", _turns(5)))
+
+    assert summary == ""
+    assert _contents(replay) == [f"{kind} {n}" for n in range(5) for kind in ("question", "answer")]
+
+
+def test_token_budget_shrinks_the_window(window, monkeypatch):
+    monkeypatch.setattr(Config, "HISTORY_SUMMARY_ENABLED", False)
+    messages = _turns(2)
+    monkeypatch.setattr(Config, "HISTORY_TOKEN_BUDGET", estimate_tokens(messages[4]) + estimate_tokens(messages[7]))
+
+    _, replay = asyncio.run(window.load("s1", messages))
+
+    assert _contents(replay) == ["question 1", "answer 1"]
+
+
+def test_aged_out_turns_are_folded_into_the_summary(window):
+    async def scenario():
+        history = await window.session_service.get_or_create_session_history("s1")
+        await history.aadd_messages(_turns(5))
+        window.schedule_refresh("s1")
+        window.schedule_refresh("s1")
+        await asyncio.gather(*window._tasks)
+        return await window.load("s1", await history.aget_messages())
+
+    summary, replay = asyncio.run(scenario())
+
+    assert summary == "the user asked about 0 to 2"
+    assert _contents(replay) == ["question 3", "answer 3", "question 4", "answer 4"]
+
+
+def test_too_few_aged_out_messages_are_not_summarized(window):
+    async def scenario():
+        history = await window.session_service.get_or_create_session_history("s1")
+        await history.aadd_messages(_turns(3))
+        window.schedule_refresh("s1")
+        await asyncio.gather(*window._tasks)
+        return await window.session_service.summaries.find_one({})
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_summary_of_a_cleared_history_is_ignored(window):
+    async def scenario():
+        await window.session_service.summaries.insert_one(
+            {"session_id": "s1", "summary": "old", "message_count": 6}
+        )
+        return await window.load("s1", _turns(3))
+
+    summary, replay = asyncio.run(scenario())
+
+    assert summary == ""
+    assert len(replay) == 6
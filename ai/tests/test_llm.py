@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from langchain_core.messages import HumanMessage
+from benchmarks.fakes import ScriptedChatModel
+from app.config.config import Config
+from app.core import llm
+from app.core.llm import LIGHT, STRONG, TurnUsage, classify_tier, get_llm, get_tier_llm, llm_metrics, set_llm_factory
+
+
+@pytest.fixture
+def answered_by(monkeypatch):
+    """Build fake models, and return the model name that answers a question"""
+    monkeypatch.setattr(Config, "LLM_TIERING_ENABLED", True)
+    monkeypatch.setattr(Config, "LLM_MODEL_LIGHT", "fake-light")
+    monkeypatch.setattr(Config, "LLM_MODEL_STRONG", "fake-strong")
+    monkeypatch.setattr(Config, "LLM_FALLBACK_MODEL", "")
+    set_llm_factory(lambda model_name, temperature: ScriptedChatModel(model=model_name))
+    llm_metrics.reset()
+
+    def ask(question, usage=None):
+        tier = classify_tier(question)
+        model = get_tier_llm(tier)
+        config = {"metadata": {"model_tier": tier}, "callbacks": [usage] if usage else []}
+        asyncio.run(model.ainvoke([HumanMessage(content=question)], config=config))
+        return model.primary.model
+
+    yield ask
+    set_llm_factory()
+    llm_metrics.reset()
+
+
+@pytest.mark.parametrize("question", ["hello", "Show the customer list", "How many products are active?"])
+def test_simple_questions_use_the_light_model(answered_by, question):
+    assert answered_by(question) == "fake-light"
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Compare sales this month versus last month",
+        "Why did revenue drop in March?",
+        "Show the average order value per customer for each city in the north region last year",
+    ],
+)
+def test_complex_questions_use_the_strong_model(answered_by, question):
+    assert answered_by(question) == "fake-strong"
+
+
+def test_calls_and_tokens_are_counted_per_tier(answered_by):
+    usage = TurnUsage()
+    answered_by("hello", usage)
+    answered_by("Compare sales versus last year")
+
+    tiers = llm_metrics.get_stats()["tiers"]
+    assert tiers[LIGHT]["calls"] == 1 and tiers[STRONG]["calls"] == 1
+    assert tiers[LIGHT]["input_tokens"] > 0 and tiers[LIGHT]["output_tokens"] > 0
+    assert usage.summary()["llm_calls"] == 1
+    assert usage.summary()["input_tokens"] == tiers[LIGHT]["input_tokens"]
+
+
+def test_disabled_tiering_uses_the_default_model(answered_by, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_TIERING_ENABLED", False)
+
+    assert answered_by("hello") == "fake-strong"
+    assert answered_by("Compare sales versus last year") == "fake-strong"
+    assert get_tier_llm(classify_tier("hello")) is get_llm()
+
+
+def test_models_are_shared_per_settings(answered_by):
+    assert get_tier_llm(LIGHT) is get_tier_llm(LIGHT)
+    assert get_tier_llm(LIGHT) is not get_tier_llm(STRONG)
+    assert len(llm._instances) == 2
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, HumanMessage
+from mongomock_motor import AsyncMongoMockClient
+from app.config.config import Config
+from app.core.memory import SessionService
+
+
+@pytest.fixture
+def service():
+    return SessionService(client=AsyncMongoMockClient())
+
+
+def _history(service, session_id):
+    return asyncio.run(service.get_or_create_session_history(session_id))
+
+
+def test_history_is_async_only(service):
+    history = _history(service, "s1")
+
+    assert not isinstance(history, BaseChatMessageHistory)
+    assert not hasattr(history, "messages")
+    assert not hasattr(history, "add_messages")
+
+
+def test_messages_round_trip(service):
+    history = _history(service, "s1")
+    asyncio.run(history.aadd_messages([HumanMessage(content="hi"), AIMessage(content="hello")]))
+
+    messages = asyncio.run(history.aget_messages())
+
+    assert [(m.type, m.content) for m in messages] == [("human", "hi"), ("ai", "hello")]
+    asyncio.run(history.aclear())
+    assert asyncio.run(history.aget_messages()) == []
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, "SESSION_CACHE_MAX_MESSAGES", 200)
+    return AsyncMongoMockClient()
+
+
+def _history_reads(history, monkeypatch):
+    """Count full history reads made through `history`"""
+    reads = []
+    find = history.collection.find
+
+    def counting_find(*args, **kwargs):
+        reads.append(args)
+        return find(*args, **kwargs)
+
+    monkeypatch.setattr(history.collection, "find", counting_find)
+    return reads
+
+
+def test_cached_history_is_reused_while_current(client, monkeypatch):
+    history = _history(SessionService(client=client), "s1")
+    asyncio.run(history.aadd_messages([HumanMessage(content="hi")]))
+    asyncio.run(history.aget_messages())
+    reads = _history_reads(history, monkeypatch)
+
+    asyncio.run(history.aadd_messages([AIMessage(content="hello")]))
+    messages = asyncio.run(history.aget_messages())
+
+    assert [m.content for m in messages] == ["hi", "hello"]
+    assert reads == []
+
+
+def test_writes_from_another_worker_are_picked_up(client):
+    # Two workers, each with its own session cache, sharing one database
+    mine = _history(SessionService(client=client), "s1")
+    theirs = _history(SessionService(client=client), "s1")
+    asyncio.run(mine.aadd_messages([HumanMessage(content="hi")]))
+    assert len(asyncio.run(mine.aget_messages())) == 1
+
+    asyncio.run(theirs.aadd_messages([AIMessage(content="from another worker")]))
+    assert [m.content for m in asyncio.run(mine.aget_messages())] == ["hi", "from another worker"]
+
+    asyncio.run(theirs.aadd_messages([HumanMessage(content="again")]))
+    asyncio.run(mine.aadd_messages([AIMessage(content="mine")]))
+    assert [m.content for m in asyncio.run(mine.aget_messages())] == ["hi", "from another worker", "again", "mine"]
+
+    asyncio.run(theirs.aclear())
+    assert asyncio.run(mine.aget_messages()) == []
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+import app.core.mongo as mongo
+from app.core.memory import SessionService
+
+
+class CountingClient(AsyncMongoMockClient):
+    """In-memory client that records whether it was closed"""
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """Clients built by app.core.mongo, in order"""
+    clients = []
+
+    def build():
+        clients.append(CountingClient())
+        return clients[-1]
+
+    monkeypatch.setattr(mongo, "_build_client", build)
+    monkeypatch.setattr(mongo, "_client", None)
+    return clients
+
+
+def test_services_and_histories_share_one_client(built):
+    first, second = SessionService(), SessionService()
+    history = asyncio.run(first.get_or_create_session_history("s1"))
+
+    assert len(built) == 1
+    assert first.client is second.client is mongo.get_mongo_client()
+    assert history.collection.database.client is built[0]
+
+
+def test_close_releases_the_pool_and_the_next_use_reconnects(built):
+    client = mongo.init_mongo_client()
+    assert mongo.init_mongo_client() is client
+
+    mongo.close_mongo_client()
+    mongo.close_mongo_client()
+
+    assert client.closed
+    assert mongo.get_mongo_client() is not client
+    assert len(built) == 2
+
+
+def test_app_lifespan_opens_and_closes_the_shared_client(offline):
+    async def scenario(client):
+        await client.post("/chat", json={"message": "hello", "session_id": "s1"})
+        return mongo._client
+
+    during = offline(scenario)
+
+    assert during is not None
+    assert mongo._client is None
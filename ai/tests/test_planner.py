@@ -0,0 +1,162 @@
+import asyncio
+import json
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.tools import StructuredTool
+from benchmarks.fakes import ScriptRule, ScriptedChatModel
+from app.config.config import Config
+from app.core.planner import PlanExecutor
+
+RULES = [
+    ScriptRule(
+        r"customer and product",
+        [[
+            {"name": "get_customer_details", "args": {"id": "c-1"}},
+            {"name": "get_product_details", "args": {"id": "p-1"}},
+        ]],
+        "Customer c-1 bought product p-1.",
+    ),
+    ScriptRule(
+        r"first customer",
+        [
+            [{"name": "get_customer_list", "args": {"page": 1}}],
+            [{"name": "get_customer_details", "args": {"id": "c-1"}}],
+        ],
+        "The first customer is c-1.",
+    ),
+    ScriptRule(r"guess", [[{"name": "get_customer_details", "args": {"id": "<customer id>"}}]]),
+    ScriptRule(r"missing", [[{"name": "get_customer_details", "args": {"id": "c-9"}}]], "INCOMPLETE"),
+]
+
+
+def _tools(called):
+    """Lookup tools that record their calls and wait briefly, like the backend"""
+
+    def lookup(name):
+        async def run(id: str = "", page: int = 1) -> dict:
+            called.append(name)
+            await asyncio.sleep(0.05)
+            return {"success": True, "data": {"id": id or f"page {page}"}}
+
+        return StructuredTool.from_function(coroutine=run, name=name, description=f"Call {name}")
+
+    return [lookup(name) for name in ("get_customer_list", "get_customer_details", "get_product_details")]
+
+
+@pytest.fixture
+def called():
+    return []
+
+
+@pytest.fixture
+def planner(called):
+    return PlanExecutor(_tools(called), {"strong": ScriptedChatModel(rules=RULES)})
+
+
+def _run(planner, message):
+    return asyncio.run(planner.run(message, "You are a helpful assistant.", [], "strong"))
+
+
+def test_independent_calls_are_planned_and_run_together(planner, called):
+    result = _run(planner, "Show the customer and product")
+
+    assert result == {
+        "output": "Customer c-1 bought product p-1.",
+        "tool_calls": ["get_customer_details", "get_product_details"],
+    }
+    assert sorted(called) == ["get_customer_details", "get_product_details"]
+
+
+@pytest.mark.parametrize("message", ["Who is the first customer?", "guess the customer", "the missing customer"])
+def test_plans_that_cannot_answer_fall_back_to_react(planner, message):
+    assert _run(planner, message) is None
+
+
+def test_too_many_calls_fall_back_to_react(planner, monkeypatch):
+    monkeypatch.setattr(Config, "PLAN_MAX_TOOL_CALLS", 1)
+
+    assert _run(planner, "Show the customer and product") is None
+
+
+def _stream(planner, reply):
+    """Stream a synthesis `reply` one character at a time; return the pieces yielded, or the error"""
+    planner.models["strong"] = FakeListChatModel(responses=[reply])
+    pieces = []
+
+    async def stream():
+        async for text in planner.stream_synthesis([], "strong"):
+            pieces.append(text)
+
+    try:
+        asyncio.run(stream())
+    except LookupError as e:
+        return pieces, e
+    return pieces, None
+
+
+def test_synthesis_streams_once_it_cannot_be_the_marker(planner):
+    pieces, error = _stream(planner, "Customer c-1 bought product p-1.")
+
+    assert error is None
+    assert "".join(pieces) == "Customer c-1 bought product p-1."
+    # The start is held back until it is as long as the marker, then streamed as it comes
+    assert pieces[0] == "Customer c"
+    assert all(len(piece) == 1 for piece in pieces[1:])
+
+
+@pytest.mark.parametrize("reply", ["INCOMPLETE", "  INCOMPLETE: no payment data", "  "])
+def test_incomplete_synthesis_yields_nothing(planner, reply):
+    pieces, error = _stream(planner, reply)
+
+    assert pieces == []
+    assert isinstance(error, LookupError)
+
+
+def test_short_synthesis_is_sent_at_the_end(planner):
+    assert _stream(planner, "No.") == (["No."], None)
+
+
+def _events(body):
+    return [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in body.strip().split("\n\n")
+    ]
+
+
+def test_plan_mode_streams_planned_calls_and_falls_back_for_dependent_ones(offline, monkeypatch):
+    monkeypatch.setattr(Config, "AGENT_MODE", "plan")
+    rules = [
+        ScriptRule(
+            r"sales and products",
+            [[
+                {"name": "get_sales_summary", "args": {"start_date": "2025-01-01", "end_date": "2025-12-31"}},
+                {"name": "get_product_list", "args": {"page": 1, "limit": 5}},
+            ]],
+            "Sales and products are shown above.",
+        ),
+        ScriptRule(
+            r"details of a product",
+            [
+                [{"name": "get_product_list", "args": {"page": 1, "limit": 5}}],
+                [{"name": "get_product_details", "args": {"id": "PRD-00001"}}],
+            ],
+            "Here are the product details.",
+        ),
+    ]
+
+    async def scenario(client):
+        planned = await client.post("/chat/stream", json={"message": "Show sales and products for 2025"})
+        dependent = await client.post("/chat/stream", json={"message": "Give me the details of a product"})
+        return _events(planned.text), _events(dependent.text)
+
+    planned, dependent = offline(scenario, rules)
+
+    names = [name for name, _ in planned]
+    assert names[:4] == ["tool_start", "tool_start", "tool_end", "tool_end"]
+    assert planned[-1][1]["response"] == "Sales and products are shown above."
+    # The planner asked for steps, so ReAct ran them one after the other
+    assert [data["tool"] for name, data in dependent if name == "tool_start"] == [
+        "get_product_list",
+        "get_product_details",
+    ]
+    assert dependent[-1][1]["response"] == "Here are the product details."
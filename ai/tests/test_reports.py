@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.tools import reports
+from app.tools.reports import _parse_filter
+
+ROW = {
+    "uuid": "a",
+    "phone": "0812345678",
+    "postal_code": "10110",
+    "city": "Bangkok",
+    "sale_date": "2025-01-31T10:15:00.000Z",
+    "total_amount": "1234.50",
+    "quantity": 3,
+    "is_active": True,
+    "due_date": None,
+    "customer": {"customer_code": "C001"},
+}
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("phone contains 0812", True),
+        ("phone = 0812345678", True),
+        ("phone = 812345678", False),
+        ("postal_code = 10110", True),
+        ("city = bangkok", True),
+        ("city != Bangkok", False),
+        ("customer.customer_code = c001", True),
+        ("total_amount >= 1000", True),
+        ("total_amount = 1234.5", True),
+        ("quantity < 3", False),
+        ("is_active = true", True),
+        ("due_date = null", True),
+        ("due_date != null", False),
+        ("city > 5", False),
+    ],
+)
+def test_filter_compares_by_row_value_type(expression, expected):
+    assert _parse_filter(expression)(ROW) is expected
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("sale_date = 2025-01-31", True),
+        ("sale_date <= 2025-01-31", True),
+        ("sale_date < 2025-01-31", False),
+        ("sale_date >= 2025-01-31", True),
+        ("sale_date > 2025-01-31", False),
+        ("sale_date != 2025-01-31", False),
+        ("sale_date > 2025-01-30", True),
+    ],
+)
+def test_date_only_filter_covers_the_whole_day(expression, expected):
+    assert _parse_filter(expression)(ROW) is expected
+
+
+def test_invalid_filter_raises():
+    with pytest.raises(ValueError):
+        _parse_filter("city Bangkok")
+
+
+def _pages(pages, count):
+    async def iter_pages(endpoint, *args, **kwargs):
+        for number, rows in enumerate(pages, start=1):
+            yield {"page": number, "rows": rows, "count": count}
+
+    return iter_pages
+
+
+def test_scan_counts_overlapping_rows_once(monkeypatch):
+    # Page 2 repeats a row from page 1 and misses "c", as OFFSET pages can without a stable order
+    pages = [[{"uuid": "a"}, {"uuid": "b"}], [{"uuid": "b"}, {"uuid": "d"}]]
+    monkeypatch.setattr(reports, "iter_pages", _pages(pages, count=4))
+
+    scan = asyncio.run(reports._scan("customers", None))
+
+    assert scan == {"matched": 3, "scanned": 3, "total": 4, "complete": False}
+
+
+def test_scan_is_complete_when_every_row_is_seen(monkeypatch):
+    pages = [[{"uuid": "a"}, {"uuid": "b"}], [{"uuid": "c"}]]
+    monkeypatch.setattr(reports, "iter_pages", _pages(pages, count=3))
+
+    scan = asyncio.run(reports._scan("customers", ["uuid != b"]))
+
+    assert scan == {"matched": 2, "scanned": 3, "total": 3, "complete": True}
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+import pytest
+from app.config.config import Config
+from app.core.router import IntentRouter, RENDERERS
+from app.tools.analytics import resolve_period
+
+TODAY = date.today().isoformat()
+
+
+@pytest.fixture
+def router():
+    return IntentRouter([])
+
+
+def _routed(router, message):
+    """The match the router would answer on its own, or None if it defers to the agent"""
+    match = router.classify(message)
+    if match is None or match.confidence < Config.ROUTER_CONFIDENCE_THRESHOLD:
+        return None
+    return match
+
+
+@pytest.mark.parametrize(
+    "message, limit",
+    [
+        ("top 10 products", 10),
+        ("What are the top selling items this month?", 5),
+        ("best selling products", 5),
+    ],
+)
+def test_top_products(router, message, limit):
+    match = _routed(router, message)
+
+    assert match.tool == "get_top_selling_products"
+    assert match.args["limit"] == limit
+
+
+@pytest.mark.parametrize("message", ["top 10 customers", "top 5 warehouses by sales", "top 3 cities"])
+def test_top_n_of_something_else_goes_to_the_agent(router, message):
+    assert _routed(router, message) is None
+
+
+@pytest.mark.parametrize(
+    "message, args",
+    [
+        ("sales since 2025-01-15", {"start_date": "2025-01-15", "end_date": TODAY}),
+        ("sales from 2025-01-15", {"start_date": "2025-01-15", "end_date": TODAY}),
+        ("sales after 2025-01-15", {"start_date": "2025-01-16", "end_date": TODAY}),
+        ("sales until 2025-01-15", {"start_date": "2000-01-01", "end_date": "2025-01-15"}),
+        ("sales before 2025-01-15", {"start_date": "2000-01-01", "end_date": "2025-01-14"}),
+        ("sales on 2025-01-15", {"start_date": "2025-01-15", "end_date": "2025-01-15"}),
+        ("sales between 2025-01-01 and 2025-01-31", {"start_date": "2025-01-01", "end_date": "2025-01-31"}),
+    ],
+)
+def test_single_dates_are_start_or_end_bounds(router, message, args):
+    match = _routed(router, message)
+
+    assert match.tool == "get_sales_summary"
+    assert match.args == args
+
+
+@pytest.mark.parametrize("message", ["sales in the week around 2025-01-15", "sales during 2025-01-15 to now"])
+def test_unclear_date_ranges_go_to_the_agent(router, message):
+    assert _routed(router, message) is None
+
+
+def test_last_month_is_the_previous_calendar_month(router):
+    match = _routed(router, "sales last month")
+
+    month_end = date.today().replace(day=1) - timedelta(days=1)
+    assert match.args == {"start_date": month_end.replace(day=1).isoformat(), "end_date": month_end.isoformat()}
+    assert resolve_period("last_month") == (match.args["start_date"], match.args["end_date"])
+
+
+def test_out_of_stock_asks_for_zero_quantity(router):
+    match = _routed(router, "which products are out of stock?")
+
+    assert match.args == {"threshold": 0}
+    assert RENDERERS["low_stock"](match, []) == "No active inventory items are out of stock."
+
+
+@pytest.mark.parametrize(
+    "message, threshold",
+    [
+        ("low stock items below 5", 4),
+        ("low stock items under 5", 4),
+        ("low stock products with fewer than 5 units", 4),
+        ("low stock items < 5", 4),
+        ("low stock items at most 5", 5),
+        ("low stock items <= 5", 5),
+        ("low stock with a threshold of 5", 5),
+        ("low stock items", 10),
+    ],
+)
+def test_low_stock_threshold_matches_the_inclusive_backend_filter(router, message, threshold):
+    match = _routed(router, message)
+
+    assert match.tool == "get_low_stock_inventory"
+    assert match.args == {"threshold": threshold}
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "sales for Bangkok this month",
+        "sales of customer CUS-00012 this month",
+        "low stock in the Chiang Mai warehouse",
+        "pending payments for electronics",
+        "top products in electronics",
+    ],
+)
+def test_questions_narrowed_to_an_entity_go_to_the_agent(router, message):
+    assert _routed(router, message) is None
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["which customers have pending payments?", "low stock items", "sales this month", "sales for the last 30 days"],
+)
+def test_plain_questions_stay_on_the_fast_path(router, message):
+    assert _routed(router, message) is not None
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+import asyncio
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from mongomock_motor import AsyncMongoMockClient
+from app.core.memory import SESSION_ID_KEY, SessionService, decode_session_cursor, encode_session_cursor
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def service():
+    return SessionService(client=AsyncMongoMockClient())
+
+
+def _add(service, session_id, *contents):
+    async def add():
+        history = await service.get_or_create_session_history(session_id)
+        await history.aadd_messages(
+            [HumanMessage(content=c) if n % 2 == 0 else AIMessage(content=c) for n, c in enumerate(contents)]
+        )
+
+    asyncio.run(add())
+
+
+def _all_pages(fetch):
+    """Follow cursors until the last page; return every page"""
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(fetch(cursor))
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_session_cursor_round_trip():
+    cursor = encode_session_cursor(START, "s|1")
+
+    assert decode_session_cursor(cursor) == (START, "s|1")
+    with pytest.raises(ValueError):
+        decode_session_cursor("not a cursor")
+
+
+def test_session_pages_cover_every_session_once_newest_first(service):
+    # Two sessions share each timestamp, so the cursor has to break ties on the id
+    asyncio.run(service._ensure_indexes())
+    asyncio.run(service.session_index.insert_many([
+        {SESSION_ID_KEY: f"s{n}", "created_at": START, "updated_at": START + timedelta(minutes=n // 2), "message_count": n}
+        for n in range(7)
+    ]))
+
+    pages = _all_pages(lambda cursor: service.get_all_sessions(limit=2, cursor=cursor))
+
+    assert [len(page["sessions"]) for page in pages] == [2, 2, 2, 1]
+    ids = [session["session_id"] for page in pages for session in page["sessions"]]
+    assert ids == ["s6", "s5", "s4", "s3", "s2", "s1", "s0"]
+
+
+def test_writes_keep_the_session_index_current(service):
+    _add(service, "s1", "first question", "first answer")
+    _add(service, "s2", "other question")
+    _add(service, "s1", "second question")
+
+    sessions = asyncio.run(service.get_all_sessions())["sessions"]
+
+    assert sorted((s["session_id"], s["message_count"], s["preview"]) for s in sessions) == [
+        ("s1", 3, "second question..."),
+        ("s2", 1, "other question..."),
+    ]
+
+
+def test_history_pages_back_and_forward_with_message_cursors(service):
+    _add(service, "s1", *[f"m{n}" for n in range(5)])
+
+    newest = asyncio.run(service.get_session_history("s1", limit=2))
+    older = asyncio.run(service.get_session_history("s1", limit=2, before=newest["before"]))
+    oldest = asyncio.run(service.get_session_history("s1", limit=2, before=older["before"]))
+    forward = asyncio.run(service.get_session_history("s1", limit=3, after=oldest["after"], fields=["content"]))
+
+    def contents(page):
+        return [message["content"] for message in page["messages"]]
+
+    assert [contents(newest), contents(older), contents(oldest)] == [["m3", "m4"], ["m1", "m2"], ["m0"]]
+    assert newest["has_more"] and older["has_more"] and not oldest["has_more"]
+    assert forward["messages"] == [{"content": "m1"}, {"content": "m2"}, {"content": "m3"}]
+    assert forward["has_more"]
+
+
+def test_session_stats_are_aggregated_in_mongodb(service):
+    _add(service, "s1", "first question", "first answer", "second question")
+    _add(service, "s2", "elsewhere")
+
+    stats = asyncio.run(service.get_session_stats("s1"))
+
+    assert stats == {
+        "session_id": "s1",
+        "message_count": 3,
+        "user_messages": 2,
+        "ai_messages": 1,
+        "first_message": "first question",
+        "last_message": "second question",
+    }
+    assert asyncio.run(service.get_session_stats("missing"))["message_count"] == 0
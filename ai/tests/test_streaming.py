@@ -0,0 +1,55 @@
+import json
+from benchmarks.fakes import ScriptRule
+
+RULES = [
+    ScriptRule(
+        r"customers",
+        [[{"name": "get_customer_list", "args": {"page": 1, "limit": 5}}]],
+        "Here are the first five customers.",
+    )
+]
+
+
+def _events(body):
+    """Parse a Server-Sent Events body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_sends_tool_events_tokens_and_end(offline):
+    async def scenario(client):
+        response = await client.post("/chat/stream", json={"message": "Show me the customers", "session_id": "s1"})
+        history = await client.get("/sessions/s1/history")
+        return response, history.json()
+
+    response, history = offline(scenario, RULES)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "tool_start" and names[-1] == "end"
+    assert names.index("tool_end") < names.index("token")
+
+    tool_start, tool_end = events[0][1], events[names.index("tool_end")][1]
+    assert tool_start["tool"] == tool_end["tool"] == "get_customer_list"
+    assert tool_end["output"]["success"] is True
+
+    tokens = "".join(data["content"] for name, data in events if name == "token")
+    end = events[-1][1]
+    assert tokens == end["response"] == "Here are the first five customers."
+    assert end["success"] is True and end["session_id"] == "s1"
+    # Saved once, at the end of the turn
+    assert [message["content"] for message in history["messages"]] == ["Show me the customers", tokens]
+
+
+def test_routed_question_streams_without_the_agent(offline):
+    async def scenario(client):
+        return await client.post("/chat/stream", json={"message": "hello"})
+
+    events = _events(offline(scenario, RULES).text)
+
+    assert [name for name, _ in events] == ["token", "end"]
+    assert events[-1][1]["routed_intent"] == "greeting"
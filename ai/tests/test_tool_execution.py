@@ -0,0 +1,90 @@
+import asyncio
+import time
+import pytest
+from langchain_core.tools import StructuredTool
+from app.config.config import Config
+from app.core.tool_execution import as_agent_tool, tool_turn
+
+
+def _tool(name="lookup", seconds=0.0, error=None):
+    """Agent-wrapped tool that sleeps `seconds`, then raises `error` or returns its query"""
+    calls = []
+
+    async def lookup(query: str) -> dict:
+        calls.append(query)
+        await asyncio.sleep(seconds)
+        if error:
+            raise error
+        return {"success": True, "query": query}
+
+    tool = StructuredTool.from_function(coroutine=lookup, name=name, description="Look something up")
+    return as_agent_tool(tool), calls
+
+
+@pytest.fixture(autouse=True)
+def timeouts(monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_TIMEOUT", 0.1)
+    monkeypatch.setattr(Config, "TOOL_TIMEOUT_OVERRIDES", "")
+    monkeypatch.setattr(Config, "TOOL_OUTPUT_COMPACTION", False)
+
+
+def test_slow_tool_times_out_as_an_error_result():
+    tool, _ = _tool(seconds=1.0)
+
+    with tool_turn(5.0) as turn:
+        started = time.monotonic()
+        result = asyncio.run(tool.ainvoke({"query": "x"}))
+
+    assert time.monotonic() - started < 0.5
+    assert result == {"success": False, "error": "Tool lookup timed out after 0.1s"}
+    assert turn.summary()["timeouts"] == 1
+
+
+def test_per_tool_timeout_overrides(monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_TIMEOUT_OVERRIDES", "lookup=0.5, other=1")
+    tool, _ = _tool(seconds=0.2)
+
+    assert asyncio.run(tool.ainvoke({"query": "x"})) == {"success": True, "query": "x"}
+
+
+def test_calls_are_cut_to_what_is_left_of_the_turn_deadline(monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_TIMEOUT", 5.0)
+    tool, _ = _tool(seconds=1.0)
+
+    with tool_turn(0.1):
+        started = time.monotonic()
+        result = asyncio.run(tool.ainvoke({"query": "x"}))
+
+    assert time.monotonic() - started < 0.5
+    assert result["success"] is False and "timed out" in result["error"]
+
+
+def test_no_tool_runs_once_the_turn_deadline_passed():
+    tool, calls = _tool()
+
+    with tool_turn(0.01) as turn:
+        time.sleep(0.02)
+        result = asyncio.run(tool.ainvoke({"query": "x"}))
+
+    assert calls == []
+    assert result["success"] is False and "time budget" in result["error"]
+    assert turn.summary()["timeouts"] == 1
+
+
+def test_failures_go_back_to_the_model_and_parallel_calls_still_count():
+    failing, _ = _tool(name="broken", seconds=0.05, error=RuntimeError("backend down"))
+    working, _ = _tool(seconds=0.05)
+
+    async def step():
+        return await asyncio.gather(failing.ainvoke({"query": "a"}), working.ainvoke({"query": "b"}))
+
+    with tool_turn(5.0) as turn:
+        failed, succeeded = asyncio.run(step())
+
+    assert failed == {"success": False, "error": "Tool broken failed: backend down"}
+    assert succeeded == {"success": True, "query": "b"}
+    summary = turn.summary()
+    assert summary["tool_calls"] == 2 and summary["errors"] == 1
+    # The calls overlapped, so less wall time than their sum
+    assert summary["tool_time_wall"] < summary["tool_time_sum"]
+    assert turn.outputs == [{"tool": "lookup", "args": {"query": "b"}, "output": succeeded}]
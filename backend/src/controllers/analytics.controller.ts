@@ -61,7 +61,11 @@ export class AnalyticsController {
 
     private async getLowStockInventory(req: Request<{}, {}, {}, LowStockInventoryRequestType>, res: Response, next: NextFunction) {
         try {
-            const threshold = Number(req.query.threshold) || 10;
+            // 0 is a valid threshold ("out of stock"), so only default when it is missing or not a number
+            const rawThreshold = req.query.threshold;
+            const parsedThreshold = Number(rawThreshold);
+            const threshold =
+                rawThreshold === undefined || String(rawThreshold).trim() === "" || Number.isNaN(parsedThreshold) ? 10 : parsedThreshold;
             const response = await this.analyticsModule.getLowStockInventory(threshold);
             res.responseJson(s.SUCCESS, r.SUCCESS, m.SUCCESS, response, null);
         } catch (error) {
@@ -43,6 +43,7 @@ export class CustomerRepository {
                 where: { is_active: true },
                 limit,
                 offset,
+                order: [["uuid", "ASC"]],
                 attributes: { exclude: excludeAttributes },
             });
             return { rows, count };
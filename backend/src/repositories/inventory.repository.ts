@@ -44,6 +44,7 @@ export class InventoryRepository {
                 where: { is_active: true },
                 limit,
                 offset,
+                order: [["uuid", "ASC"]],
                 attributes: { exclude: excludeAttributes },
             });
             return response;
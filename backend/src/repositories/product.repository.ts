@@ -45,6 +45,7 @@ export class ProductRepository {
                 where: { is_active: true },
                 limit,
                 offset,
+                order: [["uuid", "ASC"]],
                 attributes: { exclude: excludeAttributes },
             });
             return response;
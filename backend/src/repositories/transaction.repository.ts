@@ -56,6 +56,7 @@ export class TransactionRepository {
             const { rows, count } = await SalesTransactionModel.findAndCountAll({
                 limit,
                 offset,
+                order: [["uuid", "ASC"]],
                 include: ["customer", "employee"],
             });
             return { rows, count };